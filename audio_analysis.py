@@ -0,0 +1,124 @@
+import os
+import math
+import logging
+from audio_probe import probe_audio_duration
+from cost_model import count_windows
+from ffmpeg_utils import cut_audio, detect_silences
+
+logger = logging.getLogger(__name__)
+
+# 무음 제거 후에도 말 앞뒤에 남겨 두는 여유 (초)
+SILENCE_MARGIN_SECONDS = 0.2
+# 이보다 적게 줄어들면 오디오를 다시 쓰지 않음 (초)
+MIN_TRIM_SECONDS = 0.5
+# 무음 구간이 파일 시작/끝에 닿았다고 볼 허용 오차 (초)
+EDGE_TOLERANCE_SECONDS = 0.05
+
+
+def edge_silence(path, duration):
+    """파일 앞뒤 무음 길이 (앞, 뒤)를 초 단위로 반환하는 함수"""
+    silences = detect_silences(path)
+    leading = trailing = 0.0
+    if silences and silences[0][0] <= EDGE_TOLERANCE_SECONDS:
+        end = silences[0][1]
+        if end is None:
+            # 전체가 무음이면 자르지 않음
+            return 0.0, 0.0
+        leading = end
+    if silences:
+        start, end = silences[-1]
+        if end is None or end >= duration - EDGE_TOLERANCE_SECONDS:
+            trailing = max(0.0, duration - start)
+    return leading, trailing
+
+
+def aligned_frame_count(duration, fps, frame_window_size=81, motion_frame=9):
+    """오디오 길이를 덮는 최소 윈도우 수와 그 윈도우들이 만드는 정확한 프레임 수를 반환하는 함수
+
+    첫 윈도우는 frame_window_size 프레임, 이후 윈도우는 motion_frame만큼 겹쳐
+    (frame_window_size - motion_frame) 프레임씩 늘어난다.
+    """
+    frames_needed = max(1, math.ceil(duration * fps))
+    windows = count_windows(frames_needed, frame_window_size, motion_frame)
+    max_frame = frame_window_size + (windows - 1) * (frame_window_size - motion_frame)
+    return max_frame, windows
+
+
+def analyze_audio(
+    wav_paths,
+    output_dir,
+    fps,
+    frame_window_size=81,
+    motion_frame=9,
+    trim_silence=False,
+):
+    """오디오 앞뒤 무음을 분석(선택적으로 제거)하고 윈도우에 맞춘 프레임 예산을 계산하는 함수
+
+    (사용할 오디오 경로 목록, 프레임 예산 dict)를 반환한다. 길이를 알 수 없으면 (원본 경로, None).
+    """
+    durations = [probe_audio_duration(path) for path in wav_paths]
+    if None in durations:
+        logger.warning("오디오 길이를 계산할 수 없어 프레임 예산을 계산하지 않습니다.")
+        return wav_paths, None
+    original_duration = max(durations)
+
+    # 여러 인물은 모두가 조용한 앞뒤 구간만 잘라야 싱크가 유지됨
+    leading = trailing = 0.0
+    try:
+        edges = [edge_silence(path, original_duration) for path in wav_paths]
+        leading = min(lead for lead, _ in edges)
+        trailing = min(
+            trail + (original_duration - duration)
+            for (_, trail), duration in zip(edges, durations)
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ 무음 구간 분석 실패, 원본 길이를 사용합니다: {e}")
+
+    trim_start = max(0.0, leading - SILENCE_MARGIN_SECONDS)
+    trim_end = max(0.0, trailing - SILENCE_MARGIN_SECONDS)
+    trimmed = trim_silence and trim_start + trim_end >= MIN_TRIM_SECONDS
+    if trimmed:
+        end = original_duration - trim_end
+        try:
+            paths = []
+            for index, path in enumerate(wav_paths):
+                output_path = os.path.join(output_dir, f"trimmed_audio_{index + 1}.wav")
+                cut_audio(path, output_path, trim_start, end, pad_to=end - trim_start)
+                paths.append(output_path)
+        except Exception as e:
+            logger.warning(f"⚠️ 무음 제거 실패, 원본 오디오를 사용합니다: {e}")
+            trimmed = False
+    if trimmed:
+        wav_paths = paths
+        duration = end - trim_start
+        logger.info(
+            f"✂️ 앞뒤 무음 제거: 앞 {trim_start:.2f}초, 뒤 {trim_end:.2f}초 "
+            f"({original_duration:.2f}초 → {duration:.2f}초)"
+        )
+    else:
+        trim_start = trim_end = 0.0
+        duration = original_duration
+
+    max_frame, windows = aligned_frame_count(
+        duration, fps, frame_window_size, motion_frame
+    )
+    # 이전 방식: 25fps 고정 + 전체 윈도우 하나 추가
+    legacy_max_frame = int(original_duration * 25) + 81
+    legacy_windows = count_windows(legacy_max_frame, frame_window_size, motion_frame)
+    budget = {
+        "fps": round(fps, 3),
+        "audio_seconds": round(original_duration, 3),
+        "rendered_seconds": round(duration, 3),
+        "leading_silence": round(leading, 3),
+        "trailing_silence": round(trailing, 3),
+        "trimmed_leading": round(trim_start, 3),
+        "trimmed_trailing": round(trim_end, 3),
+        "max_frame": max_frame,
+        "windows": windows,
+        "legacy_max_frame": legacy_max_frame,
+        "legacy_windows": legacy_windows,
+        "frames_saved": legacy_max_frame - max_frame,
+        "windows_saved": legacy_windows - windows,
+    }
+    logger.info(f"🎞️ 프레임 예산: {budget}")
+    return wav_paths, budget
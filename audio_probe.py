@@ -0,0 +1,318 @@
+import os
+import struct
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# MPEG 오디오 프레임 헤더 테이블
+MPEG_BITRATES = {
+    # (MPEG1 여부, layer) -> kbps 테이블 (인덱스 0은 free, 15는 잘못된 값)
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MPEG_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG1
+    2: [22050, 24000, 16000],  # MPEG2
+    0: [11025, 12000, 8000],  # MPEG2.5
+}
+
+# MP3 헤더를 찾을 때 읽는 최대 바이트 수
+MP3_SCAN_BYTES = 64 * 1024
+# 첫 프레임으로 인정하기 위해 이어져야 하는 프레임 헤더 수 (다른 포맷의 우연한 동기 신호 방지)
+MP3_SYNC_FRAMES = 4
+# OGG 마지막 페이지를 찾을 때 읽는 파일 끝 바이트 수
+OGG_TAIL_BYTES = 64 * 1024
+
+
+def _skip_id3v2(f):
+    """ID3v2 태그가 있으면 건너뛰고 오디오 데이터 시작 위치를 반환하는 함수"""
+    f.seek(0)
+    header = f.read(10)
+    if len(header) == 10 and header[:3] == b"ID3":
+        size = 0
+        for byte in header[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        # footer 플래그가 있으면 10바이트 추가
+        offset = 10 + size + (10 if header[5] & 0x10 else 0)
+    else:
+        offset = 0
+    f.seek(offset)
+    return offset
+
+
+def probe_wav(f, file_size):
+    """RIFF/WAVE 헤더에서 길이를 계산하는 함수"""
+    f.seek(0)
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        return None
+
+    byte_rate = None
+    format_tag = None
+    sample_rate = None
+    fact_samples = None
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+        if chunk_id == b"fmt ":
+            fmt = f.read(chunk_size)
+            format_tag, _, sample_rate, byte_rate = struct.unpack("<HHII", fmt[:12])
+            chunk_size = 0
+        elif chunk_id == b"fact" and chunk_size >= 4:
+            fact_samples = struct.unpack("<I", f.read(4))[0]
+            chunk_size -= 4
+        elif chunk_id == b"data":
+            # 스트리밍으로 기록되어 크기가 비어 있는 경우 파일 끝까지를 데이터로 간주
+            if chunk_size in (0, 0xFFFFFFFF):
+                chunk_size = file_size - f.tell()
+            if format_tag not in (1, 3, 0xFFFE) and fact_samples and sample_rate:
+                # 압축 포맷은 fact 청크의 샘플 수가 정확함
+                return fact_samples / sample_rate
+            if not byte_rate:
+                return None
+            return min(chunk_size, file_size - f.tell()) / byte_rate
+        # 청크는 2바이트 단위로 정렬됨
+        f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def probe_flac(f, file_size):
+    """FLAC STREAMINFO 블록에서 길이를 계산하는 함수"""
+    _skip_id3v2(f)
+    if f.read(4) != b"fLaC":
+        return None
+    block_header = f.read(4)
+    if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+        return None
+    info = f.read(34)
+    if len(info) < 34:
+        return None
+    # 샘플레이트 20비트, 채널 3비트, 비트 깊이 5비트, 전체 샘플 수 36비트
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def probe_ogg(f, file_size):
+    """OGG Vorbis/Opus의 마지막 페이지 granule position으로 길이를 계산하는 함수"""
+    f.seek(0)
+    head = f.read(4096)
+    if head[:4] != b"OggS":
+        return None
+
+    pre_skip = 0
+    vorbis = head.find(b"\x01vorbis")
+    opus = head.find(b"OpusHead")
+    if vorbis >= 0:
+        sample_rate = struct.unpack("<I", head[vorbis + 12 : vorbis + 16])[0]
+    elif opus >= 0:
+        # Opus는 항상 48kHz 기준 granule을 사용
+        sample_rate = 48000
+        pre_skip = struct.unpack("<H", head[opus + 10 : opus + 12])[0]
+    else:
+        return None
+
+    f.seek(max(0, file_size - OGG_TAIL_BYTES))
+    tail = f.read()
+    page = tail.rfind(b"OggS")
+    if page < 0 or page + 14 > len(tail) or not sample_rate:
+        return None
+    granule = struct.unpack("<q", tail[page + 6 : page + 14])[0]
+    if granule <= 0:
+        return None
+    return max(0, granule - pre_skip) / sample_rate
+
+
+def _parse_mpeg_header(header):
+    """MPEG 오디오 프레임 헤더 4바이트를 파싱하는 함수"""
+    if header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    sample_rate = MPEG_SAMPLE_RATES[version][sample_rate_index]
+    bitrate = MPEG_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    padding = (header[2] >> 1) & 0x01
+    mono = (header[3] >> 6) == 3
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if (layer == 2 or mpeg1) else 576
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "mono": mono,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "samples_per_frame": samples_per_frame,
+        "frame_length": frame_length,
+    }
+
+
+def _mpeg_frames_chain(data, position, first, at_eof):
+    """position부터 MP3_SYNC_FRAMES개의 같은 포맷 프레임 헤더가 이어지는지 확인하는 함수"""
+    frame = first
+    for _ in range(MP3_SYNC_FRAMES - 1):
+        position += frame["frame_length"]
+        if at_eof and position == len(data):
+            return True
+        if frame["frame_length"] < 4 or position + 4 > len(data):
+            return False
+        frame = _parse_mpeg_header(data[position : position + 4])
+        if frame is None or any(
+            frame[field] != first[field] for field in ("mpeg1", "layer", "sample_rate")
+        ):
+            return False
+    return True
+
+
+def probe_mp3(f, file_size):
+    """MP3 프레임 헤더와 Xing/Info/VBRI 헤더로 길이를 계산하는 함수"""
+    audio_start = _skip_id3v2(f)
+    data = f.read(MP3_SCAN_BYTES)
+
+    # MP3_SYNC_FRAMES개의 프레임 헤더가 같은 포맷으로 이어지는 위치를 첫 프레임으로 간주
+    # (읽은 범위 밖의 헤더는 확인할 수 없으므로 인정하지 않음, 파일 끝에서 끝나는 짧은 파일은 허용)
+    at_eof = len(data) < MP3_SCAN_BYTES
+    frame = None
+    position = data.find(b"\xff")
+    while 0 <= position <= len(data) - 4:
+        candidate = _parse_mpeg_header(data[position : position + 4])
+        if candidate and _mpeg_frames_chain(data, position, candidate, at_eof):
+            frame = candidate
+            break
+        position = data.find(b"\xff", position + 1)
+    if frame is None:
+        return None
+
+    frame_data = data[position : position + frame["frame_length"]]
+    frame_count = None
+
+    # Xing/Info 헤더 (side information 바로 뒤)
+    if frame["mpeg1"]:
+        side_info = 17 if frame["mono"] else 32
+    else:
+        side_info = 9 if frame["mono"] else 17
+    xing = frame_data[4 + side_info : 4 + side_info + 12]
+    if xing[:4] in (b"Xing", b"Info") and len(xing) == 12:
+        flags = struct.unpack(">I", xing[4:8])[0]
+        if flags & 0x01:
+            frame_count = struct.unpack(">I", xing[8:12])[0]
+
+    # VBRI 헤더 (프레임 헤더 뒤 32바이트 위치)
+    vbri = frame_data[36:54]
+    if frame_count is None and vbri[:4] == b"VBRI" and len(vbri) == 18:
+        frame_count = struct.unpack(">I", vbri[14:18])[0]
+
+    if frame_count:
+        return frame_count * frame["samples_per_frame"] / frame["sample_rate"]
+
+    # VBR 헤더가 없으면 CBR로 간주하고 파일 크기로 계산 (ID3v1 태그 제외)
+    audio_bytes = file_size - audio_start - position
+    f.seek(max(0, file_size - 128))
+    if f.read(3) == b"TAG":
+        audio_bytes -= 128
+    return audio_bytes * 8 / frame["bitrate"]
+
+
+HEADER_PROBES = {
+    ".wav": probe_wav,
+    ".wave": probe_wav,
+    ".flac": probe_flac,
+    ".ogg": probe_ogg,
+    ".oga": probe_ogg,
+    ".opus": probe_ogg,
+    ".mp3": probe_mp3,
+}
+
+
+def probe_header_duration(path):
+    """파일 헤더를 직접 파싱하여 길이(초)를 반환하는 함수 (알 수 없으면 None)"""
+    extension = os.path.splitext(path)[1].lower()
+    # 확장자에 맞는 파서를 먼저 시도하고, 확장자가 실제 포맷과 다를 수 있으므로 나머지도 시도
+    # (WAV/FLAC/OGG 파서는 매직 바이트를 확인하므로 다른 포맷에는 None을 반환)
+    probes = [HEADER_PROBES[extension]] if extension in HEADER_PROBES else []
+    probes += [probe for probe in (probe_wav, probe_flac, probe_ogg) if probe not in probes]
+
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        # MP3는 매직 바이트가 없어 다른 포맷(AAC/MP4 등)에서 동기 신호를 잘못 찾을 수 있으므로
+        # ID3 태그로 시작하거나 확장자가 .mp3인 경우에만 시도 (아니면 ffprobe로 넘어감)
+        if probe_mp3 not in probes and f.read(3) == b"ID3":
+            probes.append(probe_mp3)
+        for probe in probes:
+            try:
+                duration = probe(f, file_size)
+            except (struct.error, ValueError, IndexError, OSError):
+                duration = None
+            if duration:
+                return duration
+    return None
+
+
+def probe_ffprobe_duration(path, timeout=30):
+    """ffprobe로 컨테이너의 길이(초)를 반환하는 함수"""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.info(f"ffprobe 실행 실패 ({path}): {e}")
+        return None
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def probe_librosa_duration(path):
+    """librosa로 길이(초)를 반환하는 함수 (필요할 때만 import)"""
+    import librosa
+
+    return librosa.get_duration(path=path)
+
+
+def probe_audio_duration(path):
+    """헤더 파싱 → ffprobe → librosa 순서로 오디오 길이(초)를 반환하는 함수"""
+    for method, probe in (
+        ("header", probe_header_duration),
+        ("ffprobe", probe_ffprobe_duration),
+        ("librosa", probe_librosa_duration),
+    ):
+        try:
+            duration = probe(path)
+        except Exception as e:
+            logger.info(f"{method} 길이 계산 실패 ({path}): {e}")
+            continue
+        if duration:
+            logger.info(f"오디오 길이 계산 ({method}): {path} = {duration:.3f}초")
+            return duration
+    return None
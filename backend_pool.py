@@ -0,0 +1,202 @@
+import time
+import logging
+import threading
+from comfy_client import ComfyUISession
+
+logger = logging.getLogger(__name__)
+
+# 로드된 모델을 판별할 때 보는 가중치 파일 확장자
+MODEL_FILE_EXTENSIONS = (".safetensors", ".gguf", ".ckpt", ".pt", ".pth")
+
+
+def parse_addresses(value, default_port=8188):
+    """"host:port,host:port" 형식 문자열을 [(host, port), ...]로 바꾸는 함수 (포트가 없으면 default_port)"""
+    addresses = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(":") if ":" in item else (item, "", "")
+        addresses.append((host, int(port) if port else default_port))
+    if not addresses:
+        raise ValueError(f"ComfyUI 서버 주소가 비어 있습니다: {value!r}")
+    return addresses
+
+
+def model_key(prompt):
+    """워크플로우가 로드하는 모델 파일 이름들로 스티키 라우팅 키를 만드는 함수"""
+    names = set()
+    for node in prompt.values():
+        for value in node.get("inputs", {}).values():
+            if isinstance(value, str) and value.lower().endswith(MODEL_FILE_EXTENSIONS):
+                names.add(value)
+    return tuple(sorted(names))
+
+
+class BackendPool:
+    """여러 ComfyUI 인스턴스(GPU별 1개)의 상태를 추적하고 작업마다 백엔드를 고르는 클래스
+
+    백그라운드 스레드가 각 백엔드의 상태와 /queue 길이를 주기적으로 확인한다.
+    작업은 부하(큐 길이와 이 핸들러가 맡긴 작업 수 중 큰 값)가 가장 작은 백엔드로 보낸다.
+    부하 차이가 sticky_slack 이하이면 같은 모델이 이미 로드된 백엔드를 우선한다.
+    부하가 max_prompts 이상인 백엔드에는 보내지 않는다 (실행 중 1개 + 대기 1개면 GPU가 쉬지 않음).
+    """
+
+    def __init__(
+        self, addresses, client_id, poll_interval=2.0, sticky_slack=0, max_prompts=2
+    ):
+        self.sessions = [
+            ComfyUISession(host, client_id, port) for host, port in addresses
+        ]
+        self.poll_interval = poll_interval
+        self.sticky_slack = sticky_slack
+        self.max_prompts = max_prompts
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._healthy = {session: False for session in self.sessions}
+        self._queue_depth = {session: 0 for session in self.sessions}
+        self._inflight = {session: 0 for session in self.sessions}
+        # 백엔드 -> 마지막으로 실행한 워크플로우의 모델 키 (GPU에 로드되어 있을 모델)
+        self._loaded = {}
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def start(self):
+        """각 백엔드의 웹소켓 세션과 상태 확인 스레드를 시작하는 함수"""
+        for session in self.sessions:
+            session.start()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._poll_loop, name="comfyui-backends", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        for session in self.sessions:
+            session.stop()
+
+    def _poll_loop(self):
+        while not self._stopped.is_set():
+            self.poll()
+            self._stopped.wait(self.poll_interval)
+
+    def poll(self):
+        """모든 백엔드의 상태와 큐 길이(실행 중 + 대기 중)를 갱신하는 함수"""
+        for session in self.sessions:
+            healthy = session.is_healthy()
+            depth = 0
+            if healthy:
+                try:
+                    queue_info = session.get_queue()
+                    depth = len(queue_info.get("queue_running", [])) + len(
+                        queue_info.get("queue_pending", [])
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ ComfyUI 큐 조회 실패 ({session.base_url}): {e}")
+                    healthy = False
+            with self._available:
+                if healthy != self._healthy[session]:
+                    state = "정상" if healthy else "응답 없음"
+                    logger.info(f"🖥️ ComfyUI 백엔드 {session.base_url}: {state}")
+                self._healthy[session] = healthy
+                self._queue_depth[session] = depth
+                if healthy:
+                    self._available.notify_all()
+
+    def _load(self, session):
+        return max(self._queue_depth[session], self._inflight[session])
+
+    def _choose(self, key, pinned=None):
+        candidates = [
+            session
+            for session in ([pinned] if pinned is not None else self.sessions)
+            if self._healthy[session] and self._load(session) < self.max_prompts
+        ]
+        if not candidates:
+            return None
+        least = min(self._load(session) for session in candidates)
+        sticky = [
+            session
+            for session in candidates
+            if self._loaded.get(session) == key
+            and self._load(session) <= least + self.sticky_slack
+        ]
+        pool = sticky or [session for session in candidates if self._load(session) == least]
+        # 같은 조건이면 앞쪽 백엔드부터 사용
+        return min(pool, key=lambda session: (self._load(session), self.sessions.index(session)))
+
+    def acquire(self, key, timeout=180, cancelled=None, deadline=None, pinned=None):
+        """key(모델 키) 작업을 보낼 백엔드를 골라 예약하고 세션을 반환하는 함수
+
+        모든 백엔드가 가득 차 있으면 자리가 날 때까지 기다린다. 정상 백엔드가 timeout초 동안
+        하나도 없으면 Exception을 발생시키고, cancelled가 설정되거나 deadline이 지나면 None을 반환한다.
+        pinned(세션)가 주어지면 그 백엔드만 사용한다 (백엔드별 워밍업).
+        """
+        targets = [pinned] if pinned is not None else self.sessions
+        unhealthy_since = None
+        with self._available:
+            while True:
+                session = self._choose(key, pinned)
+                if session is not None:
+                    break
+                now = time.monotonic()
+                if (cancelled is not None and cancelled.is_set()) or (
+                    deadline is not None and now >= deadline
+                ):
+                    return None
+                if any(self._healthy[target] for target in targets):
+                    unhealthy_since = None
+                elif unhealthy_since is None:
+                    unhealthy_since = now
+                elif now - unhealthy_since >= timeout:
+                    raise Exception(
+                        "사용 가능한 ComfyUI 백엔드가 없습니다. 서버가 실행 중인지 확인하세요."
+                    )
+                self._available.wait(min(1.0, self.poll_interval))
+            sticky = self._loaded.get(session) == key
+            loads = {s.base_url: self._load(s) for s in self.sessions if self._healthy[s]}
+            self._inflight[session] += 1
+            self._loaded[session] = key
+        logger.info(
+            f"🖥️ ComfyUI 백엔드 선택: {session.base_url} "
+            f"({'같은 모델 로드됨' if sticky else '모델 전환'}, 부하 {loads})"
+        )
+        return session
+
+    def release(self, session):
+        with self._available:
+            self._inflight[session] = max(0, self._inflight[session] - 1)
+            self._available.notify_all()
+
+    def wait_until_ready(self, timeout=180):
+        """백엔드가 하나 이상 정상 상태가 될 때까지 기다리는 함수 (시간 초과 시 Exception)"""
+        self.start()
+        with self._available:
+            if any(self._healthy.values()):
+                return
+        # 시작 직후에는 상태 확인 스레드를 기다리지 않고 바로 확인
+        self.poll()
+        deadline = time.monotonic() + timeout
+        with self._available:
+            while not any(self._healthy.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception(
+                        "ComfyUI 서버에 연결할 수 없습니다. 서버가 실행 중인지 확인하세요."
+                    )
+                self._available.wait(min(remaining, self.poll_interval))
+
+    def interrupt_all(self):
+        """모든 백엔드의 실행을 중단하는 함수 (워커 종료 시)"""
+        for session in self.sessions:
+            try:
+                session.interrupt()
+            except Exception as e:
+                logger.warning(f"⚠️ ComfyUI 실행 중단 실패 ({session.base_url}): {e}")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Audio duration probe benchmark
+
+Compares worker import cost and per-file duration probe time of the
+header-parsing prober (audio_probe.py) against ffprobe and librosa.
+
+Usage:
+    python benchmarks/bench_audio_probe.py [audio files...]
+
+Without arguments a generated 60 s WAV and examples/audio.mp3 are used.
+"""
+
+import os
+import sys
+import time
+import wave
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import audio_probe  # noqa: E402
+
+
+def measure_import(module):
+    """Measure cold import time of a module in a fresh interpreter (seconds)"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_ROOT
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip())
+
+
+def measure_probe(probe, path, repeat):
+    """Return (duration, mean seconds per call) or (None, None) on failure"""
+    try:
+        duration = probe(path)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            probe(path)
+        return duration, (time.perf_counter() - started) / repeat
+    except Exception:
+        return None, None
+
+
+def make_wav(path, seconds=60, sample_rate=16000):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\x00\x00" * sample_rate * seconds)
+
+
+def main():
+    files = sys.argv[1:]
+    tmp_dir = tempfile.mkdtemp()
+    if not files:
+        wav_path = os.path.join(tmp_dir, "bench_60s.wav")
+        make_wav(wav_path)
+        files = [wav_path, os.path.join(REPO_ROOT, "examples", "audio.mp3")]
+
+    print("== Import time (fresh interpreter) ==")
+    for module in ("audio_probe", "librosa"):
+        elapsed = measure_import(module)
+        label = f"{elapsed * 1000:.1f} ms" if elapsed is not None else "not installed"
+        print(f"{module:<12} {label}")
+
+    print("\n== Per-file probe time ==")
+    probes = [
+        ("header", audio_probe.probe_header_duration, 200),
+        ("ffprobe", audio_probe.probe_ffprobe_duration, 5),
+        ("librosa", audio_probe.probe_librosa_duration, 5),
+    ]
+    for path in files:
+        print(f"\n{os.path.basename(path)} ({os.path.getsize(path)} bytes)")
+        for name, probe, repeat in probes:
+            duration, per_call = measure_probe(probe, path, repeat)
+            if duration is None:
+                print(f"  {name:<8} unavailable")
+            else:
+                print(f"  {name:<8} {duration:9.3f} s  {per_call * 1000:9.3f} ms/probe")
+
+
+if __name__ == "__main__":
+    main()
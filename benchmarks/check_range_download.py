@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Range download check against a local HTTP server
+
+Starts a stdlib HTTP/1.1 server that honours Range and If-Range and records
+every request, then runs HttpDownloader through DownloadCache.fetch():
+
+  parallel     ranged parallel GET after a single HEAD probe
+  if-range     the file changes after the probe and the first GET is cut off,
+               so the resume's If-Range does not match and the download restarts
+  head-reject  HEAD returns 405 and the probe falls back to a Range GET 0-0
+  keep-alive   three probe + download cycles on one pool reuse one connection
+
+Usage:
+    python benchmarks/check_range_download.py [--size-mb 8]
+
+Exits with status 1 if a scenario fails.
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from file_cache import DownloadCache  # noqa: E402
+from http_downloader import HostConnectionPool, HttpDownloader  # noqa: E402
+
+
+class RangeServer(ThreadingHTTPServer):
+    """Serves one file at /file with Range/If-Range support and a request log"""
+
+    daemon_threads = True
+
+    def __init__(self, content):
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.lock = threading.Lock()
+        self.reject_head = False
+        self.cut_first_get = False
+        self.change_after_head = None
+        self.requests = []
+        self.connections = 0
+        self.set_content(content)
+
+    def set_content(self, content):
+        with self.lock:
+            self.content = content
+            self.etag = f'"v{len(self.requests)}-{len(content)}"'
+
+    @property
+    def address(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/file"
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        server = self.server
+        server.requests.append(("HEAD", None, None, None))
+        if server.reject_head:
+            self._send(405, {}, b"")
+            return
+        self._send(200, self._headers(len(server.content)), b"", head=True)
+        if server.change_after_head is not None:
+            server.set_content(server.change_after_head)
+            server.change_after_head = None
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            content, etag = server.content, server.etag
+        byte_range = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        status, body, extra = 200, content, {}
+        if byte_range and (if_range is None or if_range == etag):
+            start, _, end = byte_range.partition("=")[2].partition("-")
+            start = int(start)
+            end = int(end) if end else len(content) - 1
+            status, body = 206, content[start : end + 1]
+            extra["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+        server.requests.append(("GET", byte_range, if_range, status))
+
+        if server.cut_first_get and status == 200:
+            server.cut_first_get = False
+            # Drop the connection mid-body so the downloader resumes with If-Range
+            self._send(status, {**self._headers(len(body)), **extra}, body[: len(body) // 2])
+            self.close_connection = True
+            return
+        self._send(status, {**self._headers(len(body)), **extra}, body)
+
+    def _headers(self, length):
+        return {
+            "Content-Length": str(length),
+            "Accept-Ranges": "bytes",
+            "ETag": self.server.etag,
+        }
+
+    def _send(self, status, headers, body, head=False):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if not head and "Content-Length" not in headers:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run_scenario(name, server, expected, check):
+    """Fetch the file through a fresh DownloadCache and return a list of failures"""
+    server.requests.clear()
+    scratch = tempfile.mkdtemp(prefix=f"range_{name}_")
+    downloader = HttpDownloader(
+        HostConnectionPool(), chunk_size=64 * 1024, parallel_threshold=1024 * 1024
+    )
+    cache = DownloadCache(os.path.join(scratch, "cache"), 1024**3, downloader.probe)
+    dest = os.path.join(scratch, "task", "file.bin")
+
+    failures = []
+    try:
+        path = cache.fetch(server.address, dest, downloader.download)
+        with open(path, "rb") as f:
+            if f.read() != expected:
+                failures.append("downloaded content does not match")
+    except Exception as e:
+        failures.append(f"download failed: {e}")
+    failures.extend(check(server.requests))
+
+    methods = [request[0] for request in server.requests]
+    print(f"{name:<12} {'FAIL' if failures else 'ok':<4} requests={len(methods)} "
+          f"heads={methods.count('HEAD')} statuses={[r[3] for r in server.requests if r[3]]}")
+    for failure in failures:
+        print(f"  - {failure}")
+    return failures
+
+
+def check_parallel(requests):
+    failures = []
+    heads = [r for r in requests if r[0] == "HEAD"]
+    ranged = [r for r in requests if r[0] == "GET" and r[3] == 206]
+    if len(heads) != 1:
+        failures.append(f"expected one HEAD probe, saw {len(heads)}")
+    if len(ranged) < 2:
+        failures.append(f"expected parallel 206 responses, saw {len(ranged)}")
+    if any(r[2] is None for r in ranged):
+        failures.append("ranged GET without If-Range")
+    return failures
+
+
+def check_if_range(requests):
+    restarted = [r for r in requests if r[0] == "GET" and r[1] and r[2] and r[3] == 200]
+    if not restarted:
+        return ["no If-Range resume was answered with a full 200 response"]
+    return []
+
+
+def check_head_reject(requests):
+    failures = []
+    if not any(r[0] == "GET" and r[1] == "bytes=0-0" for r in requests):
+        failures.append("probe did not fall back to a Range GET 0-0")
+    if not any(r[0] == "GET" and r[3] == 206 and r[1] != "bytes=0-0" for r in requests):
+        failures.append("no ranged GET after the fallback probe")
+    return failures
+
+
+def run_keep_alive(server, expected, cycles=3):
+    """Fetch the file several times with one downloader and return a list of failures"""
+    server.requests.clear()
+    server.connections = 0
+    scratch = tempfile.mkdtemp(prefix="range_keep_alive_")
+    downloader = HttpDownloader(HostConnectionPool(), chunk_size=64 * 1024)
+
+    failures = []
+    for cycle in range(cycles):
+        path = os.path.join(scratch, f"file_{cycle}.bin")
+        try:
+            downloader.download(server.address, path)
+            with open(path, "rb") as f:
+                if f.read() != expected:
+                    failures.append(f"cycle {cycle}: downloaded content does not match")
+        except Exception as e:
+            failures.append(f"cycle {cycle}: download failed: {e}")
+    if server.connections != 1:
+        failures.append(f"expected one pooled connection, server saw {server.connections}")
+
+    print(f"{'keep-alive':<12} {'FAIL' if failures else 'ok':<4} requests={len(server.requests)} "
+          f"connections={server.connections}")
+    for failure in failures:
+        print(f"  - {failure}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=8)
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    original = os.urandom(size)
+    changed = os.urandom(size)
+    server = RangeServer(original)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    failures = run_scenario("parallel", server, original, check_parallel)
+
+    # Below the parallel threshold, so the single-stream resume path is used
+    small, small_changed = original[: 512 * 1024], changed[: 512 * 1024]
+    server.set_content(small)
+    server.change_after_head = small_changed
+    server.cut_first_get = True
+    failures += run_scenario("if-range", server, small_changed, check_if_range)
+
+    server.set_content(changed)
+    server.reject_head = True
+    failures += run_scenario("head-reject", server, changed, check_head_reject)
+
+    server.reject_head = False
+    server.set_content(small)
+    failures += run_keep_alive(server, small)
+
+    server.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
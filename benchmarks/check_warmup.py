@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Warm-up check against fake ComfyUI backends
+
+Starts --backends fake ComfyUI servers (benchmarks/fake_comfyui.py), runs
+handler.warm_up() and checks that every backend received exactly one
+warm-up prompt and that no prompt history was left behind.
+
+Usage:
+    python benchmarks/check_warmup.py [--backends 2] [--step-delay 0.05]
+
+Requires the handler's runtime dependencies (runpod, websocket-client).
+Exits with status 1 if a backend was skipped or warmed up twice.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_comfyui import FakeComfyUI  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", type=int, default=2)
+    parser.add_argument("--step-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    fakes = [FakeComfyUI(step_delay=args.step_delay).start() for _ in range(args.backends)]
+    scratch = tempfile.mkdtemp(prefix="warmup_")
+    os.environ.update(
+        SERVER_ADDRESSES=",".join(fake.address for fake in fakes),
+        WORKFLOW_DIR=REPO_ROOT,
+        WORKSPACE_ROOT=os.path.join(scratch, "workspace"),
+        COMFYUI_TEMP_DIR=",".join(
+            os.path.join(scratch, f"comfy_temp_{index}") for index in range(args.backends)
+        ),
+    )
+    import handler  # noqa: E402
+
+    handler.backends.start()
+    started = time.perf_counter()
+    handler.warm_up()
+    print(f"warm-up finished in {time.perf_counter() - started:.2f} s")
+
+    failed = False
+    for fake in fakes:
+        stats = fake.fake_stats()
+        ok = stats["prompts"] == 1 and stats["history"] == 0
+        print(f"{fake.address:<22} prompts={stats['prompts']} history={stats['history']} {'ok' if ok else 'FAIL'}")
+        failed = failed or not ok
+
+    handler.backends.stop()
+    for fake in fakes:
+        fake.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
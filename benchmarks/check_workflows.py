@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Workflow template check
+
+Loads the four shipped workflow JSONs through WorkflowRegistry and checks
+that every logical slot resolves to a node ID, that pruning removes only
+the preview/debug nodes, and that the wav2vec loader (node 137) is kept.
+
+Usage:
+    python benchmarks/check_workflows.py [workflow dir]
+
+Exits with status 1 if any check fails.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from workflow_registry import (  # noqa: E402
+    COMMON_SLOTS,
+    WORKFLOW_FILES,
+    WORKFLOW_SLOTS,
+    WorkflowRegistry,
+)
+
+# Nodes that do not feed VHS_VideoCombine and are expected to be pruned
+EXPECTED_PRUNED = {
+    "image": {"177", "293", "300"},
+    "video": {"177", "293", "299", "306"},
+}
+# Nodes that must survive pruning
+EXPECTED_KEPT = ("137",)
+
+
+def check_template(template, key):
+    """Return a list of failure messages for one workflow template"""
+    input_type, _ = key
+    failures = []
+    for slot in {**COMMON_SLOTS, **WORKFLOW_SLOTS[key]}:
+        if not template.has_slot(slot):
+            failures.append(f"slot '{slot}' did not resolve")
+        elif template.node_id(slot) not in template.graph:
+            failures.append(f"slot '{slot}' points at missing node {template.node_id(slot)}")
+
+    pruned = set(template.pruned_nodes)
+    if pruned != EXPECTED_PRUNED[input_type]:
+        failures.append(
+            f"pruned {sorted(pruned)}, expected {sorted(EXPECTED_PRUNED[input_type])}"
+        )
+    for node_id in EXPECTED_KEPT:
+        if node_id not in template.graph:
+            failures.append(f"node {node_id} was pruned")
+    return failures
+
+
+def main():
+    workflow_dir = sys.argv[1] if len(sys.argv) > 1 else REPO_ROOT
+    registry = WorkflowRegistry(workflow_dir)
+
+    failed = False
+    for key, filename in WORKFLOW_FILES.items():
+        template = registry.get(*key)
+        failures = check_template(template, key)
+        status = "FAIL" if failures else "ok"
+        print(f"{filename:<16} {status:<4} slots={len(template.slots)} pruned={sorted(template.pruned_nodes)}")
+        for failure in failures:
+            print(f"  - {failure}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
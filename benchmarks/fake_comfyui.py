@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Fake ComfyUI server
+
+A stdlib-only stand-in for the ComfyUI HTTP + WebSocket API used by the
+handler: /prompt, /queue, /history, /interrupt, /system_stats, /view and
+/ws. Prompts run one at a time like ComfyUI. Each run sends
+execution_start, executing, progress, executed (for VHS_VideoCombine
+nodes) and execution_success messages, then records the outputs in
+/history.
+
+A prompt whose JSON contains "__FAIL__" ends with an execution_error.
+A prompt containing "__HANG__" runs until it is interrupted.
+Like older ComfyUI builds, /interrupt stops whatever is running even if
+its prompt_id names another prompt (pass honor_prompt_id=True to change).
+GET /fake_stats reports history size and prompt/interrupt counters.
+
+Usage:
+    python benchmarks/fake_comfyui.py [--port 8188] [--step-delay 0.05]
+
+The benchmark scripts start it in-process with FakeComfyUI(...).start().
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import socket
+import struct
+import hashlib
+import argparse
+import tempfile
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OUTPUT_CLASS_TYPES = ("VHS_VideoCombine",)
+PROGRESS_STEPS = 4
+
+
+class WebSocketClient:
+    """Server side of one WebSocket connection (text frames out, control frames in)"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def send_frame(self, opcode, payload=b""):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack("!H", length)
+        else:
+            header += bytes([127]) + struct.pack("!Q", length)
+        with self.lock:
+            if self.closed:
+                return
+            try:
+                self.connection.sendall(header + payload)
+            except OSError:
+                self.closed = True
+
+    def send_json(self, message):
+        self.send_frame(0x1, json.dumps(message).encode("utf-8"))
+
+    def _recv_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.connection.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("connection closed")
+            data += chunk
+        return data
+
+    def read_loop(self):
+        """Read client frames until close; answer pings"""
+        try:
+            while True:
+                first, second = self._recv_exact(2)
+                opcode = first & 0x0F
+                length = second & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", self._recv_exact(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", self._recv_exact(8))[0]
+                mask = self._recv_exact(4) if second & 0x80 else b"\x00" * 4
+                payload = bytes(
+                    b ^ mask[i % 4] for i, b in enumerate(self._recv_exact(length))
+                )
+                if opcode == 0x8:
+                    self.send_frame(0x8)
+                    return
+                if opcode == 0x9:
+                    self.send_frame(0xA, payload)
+        except (OSError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.closed = True
+
+    def close(self):
+        """Drop the connection without a close frame (simulates a network failure)"""
+        self.closed = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class FakeComfyUI:
+    """In-memory ComfyUI stand-in with a single execution thread"""
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        step_delay=0.0,
+        output_path=None,
+        vram_gb=24,
+        honor_prompt_id=False,
+    ):
+        self.step_delay = step_delay
+        self.honor_prompt_id = honor_prompt_id
+        self.vram_gb = vram_gb
+        if output_path is None:
+            fd, output_path = tempfile.mkstemp(suffix=".mp4", prefix="fake_comfyui_")
+            with os.fdopen(fd, "wb") as f:
+                f.write(os.urandom(256 * 1024))
+        self.output_path = output_path
+        self.lock = threading.Condition()
+        self.clients = {}
+        self.pending = []
+        self.running = None
+        self.history = {}
+        self.interrupt_requested = False
+        self.counter = 0
+        self.stats = {"prompts": 0, "interrupts": 0, "queue_deletes": 0}
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self._threads = []
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        for target in (self.server.serve_forever, self._execute_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def drop_connections(self):
+        """Close every WebSocket without a close frame"""
+        with self.lock:
+            clients = list(self.clients.values())
+        for client in clients:
+            client.close()
+
+    # ------------------------------------------------------------------
+    # API state
+    # ------------------------------------------------------------------
+    def queue_prompt(self, prompt, client_id):
+        with self.lock:
+            self.counter += 1
+            prompt_id = str(uuid.uuid4())
+            self.pending.append((self.counter, prompt_id, prompt, client_id))
+            self.stats["prompts"] += 1
+            self.lock.notify_all()
+            return {"prompt_id": prompt_id, "number": self.counter, "node_errors": {}}
+
+    def queue_info(self):
+        with self.lock:
+            running = [list(self.running[:3]) + [{}, []]] if self.running else []
+            pending = [list(item[:3]) + [{}, []] for item in self.pending]
+        return {"queue_running": running, "queue_pending": pending}
+
+    def delete_from_queue(self, prompt_ids):
+        with self.lock:
+            before = len(self.pending)
+            self.pending = [item for item in self.pending if item[1] not in prompt_ids]
+            self.stats["queue_deletes"] += before - len(self.pending)
+
+    def interrupt(self, prompt_id=None):
+        with self.lock:
+            if self.running is None:
+                return
+            if self.honor_prompt_id and prompt_id and self.running[1] != prompt_id:
+                return
+            self.interrupt_requested = True
+            self.stats["interrupts"] += 1
+            self.lock.notify_all()
+
+    def fake_stats(self):
+        with self.lock:
+            return {
+                **self.stats,
+                "history": len(self.history),
+                "pending": len(self.pending),
+                "running": self.running[1] if self.running else None,
+            }
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+    def _send(self, client_id, message_type, data):
+        client = self.clients.get(client_id)
+        if client is not None:
+            client.send_json({"type": message_type, "data": data})
+
+    def _wait_step(self, delay=None):
+        """Sleep one step; return True if this prompt was interrupted"""
+        delay = self.step_delay if delay is None else delay
+        with self.lock:
+            if not self.interrupt_requested and delay:
+                self.lock.wait(delay)
+            return self.interrupt_requested
+
+    def _execute_loop(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.lock.wait()
+                self.running = self.pending.pop(0)
+                self.interrupt_requested = False
+            number, prompt_id, prompt, client_id = self.running
+            try:
+                entry = self._execute(prompt_id, prompt, client_id)
+            finally:
+                with self.lock:
+                    self.history[prompt_id] = {"prompt": [number, prompt_id, prompt, {}, []], **entry}
+                    self.running = None
+                    self.interrupt_requested = False
+                    self.lock.notify_all()
+
+    def _execute(self, prompt_id, prompt, client_id):
+        text = json.dumps(prompt)
+        node_ids = list(prompt)
+        self._send(client_id, "execution_start", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000)})
+        self._send(client_id, "execution_cached", {"nodes": [], "prompt_id": prompt_id})
+
+        outputs = {}
+        for node_id in node_ids:
+            node_type = prompt[node_id].get("class_type")
+            self._send(client_id, "executing", {"node": node_id, "display_node": node_id, "prompt_id": prompt_id})
+            if "__FAIL__" in text and node_type == "WanVideoSampler":
+                self._send(client_id, "execution_error", {
+                    "prompt_id": prompt_id,
+                    "node_id": node_id,
+                    "node_type": node_type,
+                    "executed": [],
+                    "exception_type": "torch.OutOfMemoryError",
+                    "exception_message": "CUDA out of memory (fake)",
+                    "traceback": [],
+                })
+                return {"outputs": {}, "status": {"status_str": "error", "completed": False, "messages": []}}
+            while "__HANG__" in text and node_type == "WanVideoSampler":
+                if self._wait_step(max(self.step_delay, 0.05)):
+                    break
+            if node_type == "WanVideoSampler":
+                for value in range(1, PROGRESS_STEPS + 1):
+                    if self._wait_step():
+                        break
+                    self._send(client_id, "progress", {"value": value, "max": PROGRESS_STEPS, "node": node_id, "prompt_id": prompt_id})
+            if self._wait_step():
+                self._send(client_id, "execution_interrupted", {
+                    "prompt_id": prompt_id,
+                    "node_id": node_id,
+                    "node_type": node_type,
+                    "executed": [],
+                })
+                return {"outputs": {}, "status": {"status_str": "error", "completed": False, "messages": []}}
+            if node_type in OUTPUT_CLASS_TYPES:
+                output = {
+                    "gifs": [{
+                        "filename": os.path.basename(self.output_path),
+                        "subfolder": "",
+                        "type": "output",
+                        "format": "video/h264-mp4",
+                        "fullpath": self.output_path,
+                    }]
+                }
+                outputs[node_id] = output
+                self._send(client_id, "executed", {"node": node_id, "display_node": node_id, "output": output, "prompt_id": prompt_id})
+
+        self._send(client_id, "execution_success", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000)})
+        self._send(client_id, "executing", {"node": None, "prompt_id": prompt_id})
+        return {"outputs": outputs, "status": {"status_str": "success", "completed": True, "messages": []}}
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                if url.path == "/ws":
+                    return self._websocket(urllib.parse.parse_qs(url.query).get("clientId", [""])[0])
+                if url.path == "/system_stats":
+                    return self._json({
+                        "system": {"comfyui_version": "fake"},
+                        "devices": [{"name": "fake", "type": "cuda", "vram_total": fake.vram_gb * 1024**3, "vram_free": fake.vram_gb * 1024**3}],
+                    })
+                if url.path == "/queue":
+                    return self._json(fake.queue_info())
+                if url.path.startswith("/history/"):
+                    prompt_id = url.path.split("/", 2)[2]
+                    with fake.lock:
+                        entry = fake.history.get(prompt_id)
+                    return self._json({prompt_id: entry} if entry else {})
+                if url.path == "/fake_stats":
+                    return self._json(fake.fake_stats())
+                if url.path == "/view":
+                    size = os.path.getsize(fake.output_path)
+                    self.send_response(200)
+                    self.send_header("Content-Type", "video/mp4")
+                    self.send_header("Content-Length", str(size))
+                    self.end_headers()
+                    with open(fake.output_path, "rb") as f:
+                        while chunk := f.read(1024 * 1024):
+                            self.wfile.write(chunk)
+                    return
+                return self._json({})
+
+            def do_POST(self):
+                payload = self._body()
+                if self.path == "/prompt":
+                    return self._json(fake.queue_prompt(payload["prompt"], payload.get("client_id")))
+                if self.path == "/queue":
+                    fake.delete_from_queue(set(payload.get("delete", [])))
+                    return self._json({})
+                if self.path == "/history":
+                    with fake.lock:
+                        for prompt_id in payload.get("delete", []):
+                            fake.history.pop(prompt_id, None)
+                        if payload.get("clear"):
+                            fake.history.clear()
+                    return self._json({})
+                if self.path == "/interrupt":
+                    fake.interrupt(payload.get("prompt_id"))
+                    return self._json({})
+                return self._json({})
+
+            def _websocket(self, client_id):
+                key = self.headers.get("Sec-WebSocket-Key", "")
+                accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+                self.send_response(101)
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.wfile.flush()
+                client = WebSocketClient(self.connection)
+                with fake.lock:
+                    fake.clients[client_id] = client
+                client.send_json({"type": "status", "data": {"status": {"exec_info": {"queue_remaining": 0}}, "sid": client_id}})
+                client.read_loop()
+                with fake.lock:
+                    if fake.clients.get(client_id) is client:
+                        del fake.clients[client_id]
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake ComfyUI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8188)
+    parser.add_argument("--step-delay", type=float, default=0.05, help="seconds per execution step")
+    parser.add_argument("--output", help="file reported as the VHS_VideoCombine output")
+    args = parser.parse_args()
+    fake = FakeComfyUI(args.host, args.port, args.step_delay, args.output).start()
+    print(f"Fake ComfyUI listening on http://{fake.address} (output {fake.output_path})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Prompt loop soak test against a fake ComfyUI
+
+Runs get_videos() N times on one persistent ComfyUI session against
+benchmarks/fake_comfyui.py. Reports Python heap growth (tracemalloc),
+ComfyUI history size and the session's bookkeeping sizes every
+--report-every prompts. Outputs must come from the executed messages,
+and every prompt's history must be deleted afterwards.
+
+Usage:
+    python benchmarks/soak_fake_comfyui.py [--prompts 6000] [--report-every 1000]
+
+Requires the handler's runtime dependencies (runpod, websocket-client).
+Exits with status 1 if history entries leak or outputs are wrong.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_comfyui import FakeComfyUI  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=6000)
+    parser.add_argument("--report-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    fake = FakeComfyUI().start()
+    scratch = tempfile.mkdtemp(prefix="soak_")
+    os.environ.update(
+        SERVER_ADDRESSES=fake.address,
+        WORKFLOW_DIR=REPO_ROOT,
+        WORKSPACE_ROOT=os.path.join(scratch, "workspace"),
+        COMFYUI_TEMP_DIR=os.path.join(scratch, "comfy_temp"),
+    )
+    import handler  # noqa: E402
+
+    logging.disable(logging.INFO)
+    handler.backends.wait_until_ready(30)
+    session = handler.backends.sessions[0]
+    template = handler.workflow_registry.get("image", "single")
+    prompt = template.build([])
+
+    tracemalloc.start()
+    baseline = None
+    started = time.perf_counter()
+    failed = False
+    for index in range(1, args.prompts + 1):
+        videos = handler.get_videos(prompt, template, session)
+        outputs = [video for items in videos.values() for video in items]
+        if not outputs or outputs[0]["fullpath"] != fake.output_path:
+            print(f"prompt {index}: unexpected outputs {videos}")
+            failed = True
+            break
+        if index % args.report_every == 0 or index == args.prompts:
+            current, _ = tracemalloc.get_traced_memory()
+            baseline = baseline if baseline is not None else current
+            stats = fake.fake_stats()
+            print(
+                f"{index:>7} prompts  {index / (time.perf_counter() - started):7.1f}/s  "
+                f"heap {current // 1024:>6} KB (+{(current - baseline) // 1024} KB)  "
+                f"comfy history {stats['history']}  "
+                f"session finished {len(session._finished)} backlog {session._backlog_size}"
+            )
+            failed = failed or stats["history"] != 0
+
+    handler.backends.stop()
+    fake.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+import urllib.parse
+from collections import OrderedDict
+import websocket
+from http_downloader import HostConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# 재연결 대기 시간 (초, 실패할 때마다 두 배로 늘림)
+RECONNECT_BACKOFF_INITIAL = 1.0
+RECONNECT_BACKOFF_MAX = 30.0
+# 이 시간 동안 메시지가 없으면 ping으로 연결 상태 확인 (초)
+WS_IDLE_TIMEOUT = 30
+# prompt_id 없이 올 수 있어 현재 실행 중인 prompt로 전달하는 메시지 (구버전 ComfyUI)
+PROMPTLESS_MESSAGE_TYPES = ("progress",)
+# 구독 전에 도착한 prompt별 메시지를 보관하는 최대 개수
+BACKLOG_MAX_MESSAGES = 1000
+# 메시지를 기다리는 동안 마감 시각/취소 요청을 확인하는 간격 (초)
+CANCEL_CHECK_INTERVAL = 1.0
+# prompt 실행이 시작되었음을 뜻하는 메시지 (execution_start를 놓쳐도 실행 제한 시간을 시작)
+EXECUTION_MESSAGES = ("execution_start", "execution_cached", "executing", "progress", "executed")
+
+
+class PromptFailed(Exception):
+    """ComfyUI 프롬프트가 오류/중단/시간 초과/취소로 끝났음을 나타내는 예외
+
+    details에는 실패 종류(type)와 실패한 노드 등 구조화된 정보가 들어 있다.
+    """
+
+    def __init__(self, message, details):
+        super().__init__(message)
+        self.details = details
+
+
+class ComfyUISession:
+    """워커 전체에서 공유하는 ComfyUI HTTP 연결 풀 + 영구 웹소켓 세션
+
+    웹소켓은 백그라운드 스레드 하나가 읽고, 메시지를 prompt_id별 큐로 나누어 전달한다.
+    연결이 끊기면 지수 백오프로 자동 재연결한다.
+    """
+
+    def __init__(self, server_address, client_id, port=8188, http_timeout=60):
+        self.base_url = f"http://{server_address}:{port}"
+        self.ws_url = f"ws://{server_address}:{port}/ws?clientId={client_id}"
+        self.client_id = client_id
+        self.pool = HostConnectionPool(max_idle_per_host=4, timeout=http_timeout)
+        self._ws = None
+        self._connected = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        # prompt_id -> queue.Queue (구독 중인 작업)
+        self._subscribers = {}
+        # prompt_id -> [메시지] (구독 전에 도착한 메시지, 오래된 prompt부터 버림)
+        self._backlog = OrderedDict()
+        self._backlog_size = 0
+        # 구독이 끝난 prompt_id (늦게 도착한 메시지는 버림)
+        self._finished = OrderedDict()
+        # PROMPTLESS_MESSAGE_TYPES 메시지를 전달할 현재 실행 중인 prompt
+        self._running_prompt_id = None
+        self.reconnects = 0
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def request(self, method, path, payload=None, params=None):
+        """ComfyUI API를 호출하고 (상태 코드, 본문 bytes)를 반환하는 함수"""
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        headers = {}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        with self.pool.request(method, url, headers, body) as response:
+            return response.status, response.read()
+
+    def request_json(self, method, path, payload=None, params=None):
+        """JSON 응답을 반환하고, 2xx가 아니면 Exception을 발생시키는 함수"""
+        status, body = self.request(method, path, payload, params)
+        if not 200 <= status < 300:
+            raise Exception(
+                f"ComfyUI {method} {path} 실패: HTTP {status} - {body.decode('utf-8', 'replace')}"
+            )
+        return json.loads(body) if body else {}
+
+    def queue_prompt(self, prompt):
+        """프롬프트를 큐에 넣고 /prompt 응답(prompt_id 포함)을 반환하는 함수"""
+        return self.request_json(
+            "POST", "/prompt", {"prompt": prompt, "client_id": self.client_id}
+        )
+
+    def get_history(self, prompt_id):
+        return self.request_json("GET", f"/history/{prompt_id}")
+
+    def delete_history(self, prompt_id):
+        """prompt의 히스토리 항목을 삭제하는 함수 (실패해도 예외를 던지지 않음)"""
+        try:
+            self.request_json("POST", "/history", {"delete": [prompt_id]})
+        except Exception as e:
+            logger.warning(f"⚠️ ComfyUI 히스토리 삭제 실패 (prompt_id={prompt_id}): {e}")
+
+    def get_queue(self):
+        return self.request_json("GET", "/queue")
+
+    def get_system_stats(self):
+        return self.request_json("GET", "/system_stats")
+
+    def download_view(self, filename, subfolder, folder_type, output_path, chunk_bytes=1024 * 1024):
+        """/view 응답을 청크 단위로 output_path에 저장하고 받은 바이트 수를 반환하는 함수"""
+        query = urllib.parse.urlencode(
+            {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        )
+        tmp_path = f"{output_path}.part"
+        written = 0
+        try:
+            with self.pool.request("GET", f"{self.base_url}/view?{query}") as response:
+                if response.status != 200:
+                    raise Exception(f"ComfyUI /view 실패: HTTP {response.status} ({filename})")
+                expected = response.headers.get("Content-Length")
+                with open(tmp_path, "wb") as f:
+                    while True:
+                        chunk = response.read(chunk_bytes)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        written += len(chunk)
+            if expected is not None and written != int(expected):
+                raise ConnectionError(
+                    f"/view 응답이 중간에 끊겼습니다 ({written}/{expected} bytes, {filename})"
+                )
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return written
+
+    def interrupt(self, prompt_id=None):
+        """실행 중인 prompt를 중단하는 함수 (prompt_id를 지원하는 ComfyUI는 해당 prompt일 때만 중단)"""
+        payload = {"prompt_id": prompt_id} if prompt_id else {}
+        return self.request_json("POST", "/interrupt", payload)
+
+    def delete_from_queue(self, prompt_ids):
+        """대기 중인 prompt를 /queue에서 제거하는 함수"""
+        return self.request_json("POST", "/queue", {"delete": list(prompt_ids)})
+
+    def is_running(self, prompt_id):
+        """/queue에서 prompt_id가 현재 실행 중인 prompt인지 확인하는 함수"""
+        running = self.get_queue().get("queue_running", [])
+        return any(len(item) > 1 and item[1] == prompt_id for item in running)
+
+    def cancel_prompt(self, prompt_id):
+        """prompt를 큐에서 제거하고 실행 중이면 중단하는 함수 (실패해도 예외를 던지지 않음)
+
+        구버전 ComfyUI의 /interrupt는 prompt_id와 관계없이 실행 중인 prompt를 중단하므로,
+        같은 백엔드에 대기 중인 다른 작업의 prompt를 멈추지 않도록 이 prompt가 실행 중일 때만 호출한다.
+        """
+        # 먼저 큐에서 제거해야 중단 직후 같은 prompt가 다시 시작되지 않음
+        try:
+            self.delete_from_queue([prompt_id])
+        except Exception as e:
+            logger.warning(f"⚠️ ComfyUI 큐 제거 실패 (prompt_id={prompt_id}): {e}")
+        try:
+            if self.is_running(prompt_id):
+                self.interrupt(prompt_id)
+                logger.info(f"🛑 ComfyUI 실행 중단 요청: prompt_id={prompt_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ ComfyUI 실행 중단 실패 (prompt_id={prompt_id}): {e}")
+        logger.info(f"🛑 ComfyUI prompt 취소 요청 완료: prompt_id={prompt_id}")
+
+    def is_healthy(self):
+        """HTTP API가 응답하고 웹소켓이 연결되어 있는지 확인하는 함수"""
+        if not self._connected.is_set():
+            return False
+        try:
+            self.get_system_stats()
+            return True
+        except Exception:
+            return False
+
+    # ------------------------------------------------------------------
+    # 웹소켓
+    # ------------------------------------------------------------------
+    def start(self):
+        """백그라운드 웹소켓 리더 스레드를 시작하는 함수 (이미 시작했으면 무시)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="comfyui-ws", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        self.pool.close()
+
+    def _connect(self):
+        ws = websocket.WebSocket()
+        ws.connect(self.ws_url, timeout=10)
+        ws.settimeout(WS_IDLE_TIMEOUT)
+        return ws
+
+    def _run(self):
+        """웹소켓 연결을 유지하면서 메시지를 읽어 구독자에게 나누어 주는 루프"""
+        delay = RECONNECT_BACKOFF_INITIAL
+        while not self._stopped.is_set():
+            try:
+                self._ws = self._connect()
+            except Exception as e:
+                logger.warning(f"웹소켓 연결 실패, {delay:.0f}초 후 재시도: {e}")
+                self._stopped.wait(delay)
+                delay = min(delay * 2, RECONNECT_BACKOFF_MAX)
+                continue
+
+            logger.info(f"✅ ComfyUI 웹소켓 연결: {self.ws_url}")
+            delay = RECONNECT_BACKOFF_INITIAL
+            self._connected.set()
+            try:
+                self._read_loop(self._ws)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"⚠️ 웹소켓 연결 끊김, 재연결합니다: {e}")
+            finally:
+                self._connected.clear()
+                try:
+                    self._ws.close()
+                except Exception:
+                    pass
+                self._ws = None
+            if not self._stopped.is_set():
+                self.reconnects += 1
+                # 끊긴 동안의 메시지는 받을 수 없으므로 대기 중인 작업에 알림
+                self._broadcast({"type": "connection_lost", "data": {}})
+
+    def _read_loop(self, ws):
+        while not self._stopped.is_set():
+            try:
+                out = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                # 유휴 상태: ping으로 연결이 살아 있는지 확인
+                ws.ping()
+                continue
+            if not isinstance(out, str):
+                # 미리보기 이미지 등 바이너리 메시지는 사용하지 않음
+                continue
+            if not out:
+                raise ConnectionError("웹소켓이 닫혔습니다")
+            try:
+                message = json.loads(out)
+            except ValueError:
+                continue
+            self._dispatch(message)
+
+    def _dispatch(self, message):
+        data = message.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if message.get("type") == "executing" and prompt_id:
+            self._running_prompt_id = None if data.get("node") is None else prompt_id
+        if prompt_id is None and message.get("type") in PROMPTLESS_MESSAGE_TYPES:
+            prompt_id = self._running_prompt_id
+        if prompt_id is None:
+            return
+
+        with self._lock:
+            subscriber = self._subscribers.get(prompt_id)
+            if subscriber is None:
+                if prompt_id in self._finished:
+                    return
+                # 아직 /prompt 응답을 받기 전이면 보관했다가 구독 시 전달
+                self._backlog.setdefault(prompt_id, []).append(message)
+                self._backlog_size += 1
+                while self._backlog_size > BACKLOG_MAX_MESSAGES:
+                    _, dropped = self._backlog.popitem(last=False)
+                    self._backlog_size -= len(dropped)
+                return
+        subscriber.put(message)
+
+    def _broadcast(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def subscribe(self, prompt_id):
+        """prompt_id의 메시지 큐를 등록하고 그 전에 도착한 메시지를 먼저 넣어 반환하는 함수"""
+        subscriber = queue.Queue()
+        with self._lock:
+            for message in self._backlog.pop(prompt_id, []):
+                subscriber.put(message)
+                self._backlog_size -= 1
+            self._subscribers[prompt_id] = subscriber
+        return subscriber
+
+    def unsubscribe(self, prompt_id):
+        with self._lock:
+            self._subscribers.pop(prompt_id, None)
+            self._backlog_size -= len(self._backlog.pop(prompt_id, []))
+            self._finished[prompt_id] = True
+            while len(self._finished) > BACKLOG_MAX_MESSAGES:
+                self._finished.popitem(last=False)
+
+    def is_finished(self, prompt_id):
+        """/history로 prompt 실행이 끝났는지 확인하는 함수 (웹소켓 메시지를 놓친 경우 대비)"""
+        try:
+            history = self.get_history(prompt_id)
+        except Exception as e:
+            logger.info(f"히스토리 확인 실패: {e}")
+            return False
+        # ComfyUI는 실행이 끝난 prompt만 히스토리에 기록함
+        return prompt_id in history
+
+    @staticmethod
+    def _execution_deadline(deadline, execution_timeout):
+        """지금부터 execution_timeout초 뒤와 기존 deadline 중 이른 시각을 반환하는 함수"""
+        execution_deadline = time.monotonic() + execution_timeout
+        return execution_deadline if deadline is None else min(deadline, execution_deadline)
+
+    def iter_messages(
+        self,
+        prompt_id,
+        poll_interval=10,
+        deadline=None,
+        cancelled=None,
+        execution_timeout=None,
+    ):
+        """prompt_id의 웹소켓 메시지를 실행이 끝날 때까지 순서대로 내보내는 제너레이터
+
+        실행 완료(executing node=None), 성공/오류/중단 메시지를 내보낸 뒤 종료한다.
+        메시지가 poll_interval초 동안 없거나 재연결되면 /history로 완료 여부를 확인한다.
+        deadline(time.monotonic 기준)이 지나면 deadline_exceeded를, cancelled(threading.Event)가
+        설정되면 job_cancelled를 내보내고 종료한다 (prompt 취소는 호출한 쪽에서 처리).
+        execution_timeout(초)은 큐 대기 시간을 빼고 실행 시작부터 적용되는 제한 시간이다.
+        실행 시작은 이 prompt의 첫 실행 메시지나 /queue 확인(메시지가 없을 때)으로 판단하며,
+        둘 다 놓치는 경우에 대비해 호출한 쪽이 deadline에 제출 기준 절대 마감 시각을 넘겨야 한다.
+        """
+        subscriber = self.subscribe(prompt_id)
+        last_activity = time.monotonic()
+        execution_started = False
+        try:
+            while True:
+                if cancelled is not None and cancelled.is_set():
+                    yield {"type": "job_cancelled", "data": {"prompt_id": prompt_id}}
+                    return
+                if deadline is not None and time.monotonic() >= deadline:
+                    yield {"type": "deadline_exceeded", "data": {"prompt_id": prompt_id}}
+                    return
+                try:
+                    message = subscriber.get(timeout=CANCEL_CHECK_INTERVAL)
+                    last_activity = time.monotonic()
+                except queue.Empty:
+                    if time.monotonic() - last_activity < poll_interval:
+                        continue
+                    last_activity = time.monotonic()
+                    message = None
+
+                if message is None or message["type"] == "connection_lost":
+                    if self.is_finished(prompt_id):
+                        logger.info(f"히스토리에서 실행 완료 확인: prompt_id={prompt_id}")
+                        yield {"type": "history_completed", "data": {"prompt_id": prompt_id}}
+                        return
+                    # execution_start 메시지를 놓쳤어도 /queue에서 실행 중이면 실행 제한 시간 시작
+                    if execution_timeout is not None and not execution_started:
+                        try:
+                            execution_started = self.is_running(prompt_id)
+                        except Exception as e:
+                            logger.warning(f"⚠️ ComfyUI 큐 확인 실패 (prompt_id={prompt_id}): {e}")
+                        if execution_started:
+                            deadline = self._execution_deadline(deadline, execution_timeout)
+                    continue
+
+                yield message
+                message_type = message["type"]
+                if (
+                    execution_timeout is not None
+                    and not execution_started
+                    and message_type in EXECUTION_MESSAGES
+                ):
+                    execution_started = True
+                    deadline = self._execution_deadline(deadline, execution_timeout)
+                data = message.get("data") or {}
+                if message_type == "executing" and data.get("node") is None:
+                    return
+                if message_type in ("execution_error", "execution_interrupted"):
+                    return
+        finally:
+            self.unsubscribe(prompt_id)
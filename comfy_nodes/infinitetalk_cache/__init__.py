@@ -0,0 +1,8 @@
+from .clip_vision_cache import InfiniteTalkCachedClipVisionEncode
+
+NODE_CLASS_MAPPINGS = {
+    "InfiniteTalkCachedClipVisionEncode": InfiniteTalkCachedClipVisionEncode,
+}
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "InfiniteTalkCachedClipVisionEncode": "InfiniteTalk Cached ClipVision Encode",
+}
@@ -0,0 +1,119 @@
+import os
+import uuid
+import hashlib
+import logging
+
+import torch
+import nodes
+import folder_paths
+import comfy.clip_vision
+
+logger = logging.getLogger(__name__)
+
+# 인코딩을 위임하는 ComfyUI-WanVideoWrapper 노드
+BASE_CLASS = "WanVideoClipVisionEncode"
+
+stats = {"hits": 0, "misses": 0}
+
+
+def to_cpu(value):
+    """텐서(딕셔너리/리스트 안의 텐서 포함)를 CPU로 옮기는 함수 (디스크 저장용)"""
+    if isinstance(value, torch.Tensor):
+        return value.detach().cpu()
+    if isinstance(value, dict):
+        return {key: to_cpu(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(to_cpu(item) for item in value)
+    return value
+
+
+def image_cache_key(images, clip_name, settings):
+    """cache_key가 없을 때 입력 이미지 텐서 내용 + CLIP 모델 + 설정으로 키를 만드는 함수"""
+    digest = hashlib.sha256()
+    for image in images:
+        if image is None:
+            digest.update(b"none")
+            continue
+        array = image.detach().cpu().contiguous().numpy()
+        digest.update(str(array.shape).encode("utf-8"))
+        digest.update(array.tobytes())
+    digest.update(f"{clip_name}\n{sorted(settings.items())}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class InfiniteTalkCachedClipVisionEncode:
+    """WanVideoClipVisionEncode 결과를 디스크에 캐시하는 노드 클래스
+
+    CLIP vision 모델을 연결로 받지 않고 파일 이름으로 받아, 캐시 미스일 때만 모델을 로드한다.
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        # 인코딩 설정 입력은 원본 노드의 정의를 그대로 사용 (버전이 바뀌어도 검증 값 목록이 일치)
+        base = nodes.NODE_CLASS_MAPPINGS[BASE_CLASS].INPUT_TYPES()
+        required = {
+            "clip_name": (folder_paths.get_filename_list("clip_vision"),),
+            **{
+                name: spec
+                for name, spec in base["required"].items()
+                if name != "clip_vision"
+            },
+            "cache_dir": ("STRING", {"default": ""}),
+        }
+        optional = {
+            **base.get("optional", {}),
+            "cache_key": ("STRING", {"default": ""}),
+        }
+        return {"required": required, "optional": optional}
+
+    RETURN_TYPES = ("WANVIDIMAGE_EMBEDS",)
+    RETURN_NAMES = ("image_embeds",)
+    FUNCTION = "process"
+    CATEGORY = "InfiniteTalk"
+
+    def process(self, clip_name, cache_dir, cache_key="", **kwargs):
+        if not cache_key:
+            settings = {
+                name: value for name, value in kwargs.items() if not name.startswith("image_")
+            }
+            cache_key = image_cache_key(
+                [kwargs.get("image_1"), kwargs.get("image_2")], clip_name, settings
+            )
+        cache_path = os.path.join(cache_dir, f"{cache_key}.pt") if cache_dir else None
+
+        if cache_path and os.path.exists(cache_path):
+            try:
+                image_embeds = torch.load(cache_path, map_location="cpu", weights_only=True)
+                os.utime(cache_path)
+                stats["hits"] += 1
+                logger.info(
+                    f"✅ CLIP vision 캐시 적중: {cache_key} "
+                    f"(적중 {stats['hits']} / 미스 {stats['misses']})"
+                )
+                return (image_embeds,)
+            except Exception as e:
+                logger.warning(f"⚠️ CLIP vision 캐시 읽기 실패, 다시 인코딩합니다: {e}")
+
+        stats["misses"] += 1
+        clip_vision = comfy.clip_vision.load(folder_paths.get_full_path("clip_vision", clip_name))
+        encoder = nodes.NODE_CLASS_MAPPINGS[BASE_CLASS]()
+        (image_embeds,) = getattr(encoder, encoder.FUNCTION)(clip_vision=clip_vision, **kwargs)
+        del clip_vision
+
+        if cache_path:
+            # 같은 캐시 디렉토리를 쓰는 다른 워커와 겹치지 않도록 임시 파일에 저장한 뒤 교체
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = os.path.join(cache_dir, f".{cache_key}.{uuid.uuid4().hex}.tmp")
+            try:
+                torch.save(to_cpu(image_embeds), tmp_path)
+                os.replace(tmp_path, cache_path)
+                logger.info(
+                    f"💾 CLIP vision 캐시에 저장: {cache_key} "
+                    f"(적중 {stats['hits']} / 미스 {stats['misses']})"
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ CLIP vision 캐시 저장 실패: {e}")
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return (image_embeds,)
@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from file_cache import LRUFileCache
+from workflow_registry import is_link
+
+logger = logging.getLogger(__name__)
+
+# CLIP vision 인코딩을 캐시하는 커스텀 노드 (comfy_nodes/infinitetalk_cache, Dockerfile에서 설치)
+CACHED_CLIP_VISION_CLASS = "InfiniteTalkCachedClipVisionEncode"
+# WanVideoTextEncodeCached가 디스크 캐시를 확인하는 프롬프트 입력
+TEXT_PROMPT_INPUTS = ("positive_prompt", "negative_prompt")
+
+
+def text_cache_key(text):
+    """WanVideoTextEncodeCached가 디스크 캐시 파일 이름으로 쓰는 키(프롬프트 SHA-256 + .pt)를 반환하는 함수
+
+    노드 내부 규칙이라 LRU 갱신에만 쓰고, 적중/미스는 prompt 실행 후 새로 생긴 파일 수로 센다.
+    """
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest() + ".pt"
+
+
+def clip_vision_cache_key(media_key, clip_name, settings):
+    """입력 미디어 키 + CLIP 모델 + 인코딩 설정(crop 등)으로 CLIP vision 캐시 키를 만드는 함수"""
+    payload = json.dumps(
+        {"media": media_key, "clip_name": clip_name, "settings": settings}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ConditioningCache:
+    """텍스트 인코더/CLIP vision 인코딩 결과의 디스크 캐시를 관리하는 클래스
+
+    텍스트 임베딩은 WanVideoTextEncodeCached의 디스크 캐시(entrypoint.sh가 text_embeds를 가리키게 함)를,
+    CLIP vision 임베딩은 커스텀 노드의 캐시(clip_vision)를 사용한다. 캐시에 있으면 ComfyUI는 인코더를 로드하지 않는다.
+    CLIP vision 적중/미스는 prompt를 보내기 전에 캐시 파일로, 텍스트 적중/미스는 prompt 실행 후 텍스트 캐시에
+    새로 생긴 파일 수로 세고(count_text), 작업이 끝나면 크기 제한을 적용한다.
+    """
+
+    def __init__(self, root, text_max_bytes, clip_vision_max_bytes):
+        self.root = root
+        self.text = LRUFileCache(os.path.join(root, "text_embeds"), text_max_bytes)
+        self.clip_vision = LRUFileCache(
+            os.path.join(root, "clip_vision"), clip_vision_max_bytes
+        )
+        self._lock = threading.Lock()
+        self._naming_warned = False
+
+    @property
+    def enabled(self):
+        return bool(self.root)
+
+    def _lookup(self, cache, keys):
+        """키마다 캐시 파일이 있는지 확인하여 적중/미스 수를 세고 {"hits", "misses"}를 반환하는 함수"""
+        counts = {"hits": 0, "misses": 0}
+        for key in keys:
+            # 적중한 항목은 최근 사용 시간이 갱신되어 LRU 제거 대상에서 뒤로 밀림
+            found = cache.enabled and cache.get(key) is not None
+            counts["hits" if found else "misses"] += 1
+        with self._lock:
+            cache.hits += counts["hits"]
+            cache.misses += counts["misses"]
+        return counts
+
+    def apply(self, prompt, template, media_key):
+        """빌드된 프롬프트에 캐시 설정을 적용하고 이번 prompt의 캐시 적중/미스를 반환하는 함수"""
+        report = {}
+        if self.text.enabled:
+            text_inputs = prompt[template.node_id("prompt")]["inputs"]
+            text_inputs["use_disk_cache"] = True
+            # 적중할 항목의 최근 사용 시간을 갱신 (적중/미스는 실행 후 count_text에서 셈)
+            for name in TEXT_PROMPT_INPUTS:
+                self.text.get(text_cache_key(text_inputs[name]))
+
+        if self.clip_vision.enabled and template.has_slot("clip_vision"):
+            node_id = template.node_id("clip_vision")
+            node = prompt[node_id]
+            loader_id = node["inputs"]["clip_vision"][0]
+            clip_name = prompt[loader_id]["inputs"]["clip_name"]
+            # 로더 연결 대신 모델 파일 이름을 넘겨, 캐시 미스일 때만 노드 안에서 CLIP vision 모델을 로드
+            inputs = {
+                name: value
+                for name, value in node["inputs"].items()
+                if name != "clip_vision"
+            }
+            settings = {
+                name: value for name, value in inputs.items() if not name.startswith("image_")
+            }
+            key = clip_vision_cache_key(media_key, clip_name, settings)
+            inputs.update(
+                clip_name=clip_name,
+                cache_key=key,
+                cache_dir=self.clip_vision.cache_dir,
+            )
+            prompt[node_id] = {**node, "class_type": CACHED_CLIP_VISION_CLASS, "inputs": inputs}
+            # 다른 노드가 쓰지 않으면 CLIPVisionLoader를 제거 (ComfyUI가 모델을 미리 로드하지 않도록)
+            if not any(
+                is_link(value) and value[0] == loader_id
+                for other in prompt.values()
+                for value in other["inputs"].values()
+            ):
+                del prompt[loader_id]
+            report["clip_vision"] = self._lookup(self.clip_vision, [f"{key}.pt"])
+
+        return report
+
+    def text_entries(self):
+        """텍스트 캐시 디렉토리의 .pt 파일 이름 집합을 반환하는 함수 (prompt 실행 전후 비교용)"""
+        try:
+            return {name for name in os.listdir(self.text.cache_dir) if name.endswith(".pt")}
+        except FileNotFoundError:
+            return set()
+
+    def count_text(self, report, entries_before, prompt, template):
+        """prompt 실행 후 텍스트 캐시에 새로 생긴 파일 수로 텍스트 적중/미스를 세어 report에 기록하는 함수"""
+        if self.text.enabled:
+            text_inputs = prompt[template.node_id("prompt")]["inputs"]
+            texts = {text_inputs[name].strip() for name in TEXT_PROMPT_INPUTS}
+            # 같은 캐시 디렉토리를 쓰는 다른 작업이 만든 파일이 섞일 수 있으므로 프롬프트 수로 제한
+            created = self.text_entries() - entries_before
+            misses = min(len(created), len(texts))
+            counts = {"hits": len(texts) - misses, "misses": misses}
+            with self._lock:
+                self.text.hits += counts["hits"]
+                self.text.misses += counts["misses"]
+            report["text"] = counts
+
+            # 노드의 캐시 파일 이름 규칙이 바뀌면 적중 항목의 LRU 갱신이 동작하지 않으므로 한 번 경고
+            missing = [
+                text for text in texts if self.text.get(text_cache_key(text)) is None
+            ]
+            if missing and not self._naming_warned:
+                self._naming_warned = True
+                logger.warning(
+                    f"⚠️ 텍스트 캐시 파일 이름이 예상(SHA-256 + .pt)과 다릅니다. "
+                    f"WanVideoTextEncodeCached의 캐시 규칙이 바뀌었는지 확인하세요 (새 파일: {sorted(created)[:4]})"
+                )
+
+        logger.info(
+            f"🧠 컨디셔닝 캐시: 이번 prompt {report}, 누적 텍스트 적중 {self.text.hits} / 미스 {self.text.misses}, "
+            f"CLIP vision 적중 {self.clip_vision.hits} / 미스 {self.clip_vision.misses}"
+        )
+
+    def evict(self):
+        """캐시 디렉토리별 크기 제한을 넘으면 오래 사용되지 않은 항목부터 삭제하는 함수"""
+        for cache in (self.text, self.clip_vision):
+            if cache.enabled:
+                cache.evict()
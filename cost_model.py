@@ -0,0 +1,187 @@
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+GIB = 1024**3
+
+# ----------------------------------------------------------------------
+# 모델 상수 (Wan2.1 I2V 14B fp8 + InfiniteTalk, 480p 기준으로 대략 맞춘 값)
+# ----------------------------------------------------------------------
+TRANSFORMER_BLOCKS = 40
+# 블록 스왑 대상이 되는 트랜스포머 블록 전체 크기 (fp8)
+BLOCKS_BYTES = 14.0 * GIB
+# 항상 GPU에 남는 나머지 가중치 (임베딩, head, InfiniteTalk 오디오 어댑터 등)
+NON_BLOCK_BYTES = 2.5 * GIB
+# CUDA 컨텍스트, wav2vec, 텍스트 임베딩, 단편화 여유분
+BASE_OVERHEAD_BYTES = 2.0 * GIB
+VAE_WEIGHTS_BYTES = 0.3 * GIB
+# 샘플링 중 latent 토큰 하나당 활성값 메모리
+ACTIVATION_BYTES_PER_TOKEN = 120 * 1024
+# VAE 디코드 중 (프레임 × 픽셀) 하나당 메모리 (타일링하지 않는 경우)
+DECODE_BYTES_PER_PIXEL = 96
+# enable_vae_tiling 시 한 번에 디코드하는 타일 크기 (WanVideoDecode tile_x/tile_y)
+VAE_TILE_PIXELS = 272 * 272
+# 여러 인물일 때 오디오 cross-attention 등으로 늘어나는 활성값 비율
+MULTI_PERSON_ACTIVATION_FACTOR = 1.15
+# 추정치가 틀릴 수 있으므로 GPU 메모리 중 이 비율만 사용
+VRAM_SAFETY_RATIO = 0.9
+
+# 실행 시간 상수 (초)
+SECONDS_PER_STEP_PER_MTOKEN = 9.0  # 100만 토큰 × 1 스텝 (선형 항)
+SECONDS_PER_STEP_PER_MTOKEN_SQ = 6.0  # 100만 토큰² × 1 스텝 (attention 항)
+SWAP_BANDWIDTH_BYTES = 20 * GIB  # 블록 스왑 시 PCIe 대역폭
+OFFLOAD_SECONDS = 8.0  # force_offload로 모델을 내리고 다시 올리는 시간
+DECODE_SECONDS_PER_MPIXEL = 0.35  # 100만 (프레임 × 픽셀) 디코드 시간
+TILED_DECODE_SLOWDOWN = 1.6
+FIXED_SECONDS = 20.0  # 오디오 분리, wav2vec, CLIP, 텍스트 인코딩, 인코딩/저장
+
+
+def count_windows(max_frame, frame_window_size=81, motion_frame=9):
+    """InfiniteTalk 슬라이딩 윈도우 수를 계산하는 함수 (첫 윈도우 이후 motion_frame만큼 겹침)"""
+    if max_frame <= frame_window_size:
+        return 1
+    stride = frame_window_size - motion_frame
+    return 1 + math.ceil((max_frame - frame_window_size) / stride)
+
+
+def latent_tokens(width, height, frame_window_size=81):
+    """한 윈도우의 latent 토큰 수 (VAE 8배 축소 + 2x2 패치, 시간축 4배 축소)"""
+    latent_frames = (frame_window_size - 1) // 4 + 1
+    return latent_frames * (width // 16) * (height // 16)
+
+
+def estimate_vram(
+    width,
+    height,
+    person_count="single",
+    frame_window_size=81,
+    blocks_to_swap=0,
+    force_offload=True,
+    enable_vae_tiling=False,
+):
+    """샘플링/디코드 단계별 최대 VRAM 사용량(bytes)을 추정하는 함수"""
+    activation_factor = (
+        MULTI_PERSON_ACTIVATION_FACTOR if person_count == "multi" else 1.0
+    )
+    activations = (
+        latent_tokens(width, height, frame_window_size)
+        * ACTIVATION_BYTES_PER_TOKEN
+        * activation_factor
+    )
+    resident_blocks = BLOCKS_BYTES * (TRANSFORMER_BLOCKS - blocks_to_swap) / TRANSFORMER_BLOCKS
+    # 스왑 중인 블록 하나는 항상 GPU에 올라와 있음
+    swap_buffer = BLOCKS_BYTES / TRANSFORMER_BLOCKS if blocks_to_swap else 0
+    sampling = BASE_OVERHEAD_BYTES + NON_BLOCK_BYTES + resident_blocks + swap_buffer + activations + VAE_WEIGHTS_BYTES
+
+    decode_pixels = VAE_TILE_PIXELS if enable_vae_tiling else width * height
+    decode_activations = frame_window_size * decode_pixels * DECODE_BYTES_PER_PIXEL
+    model_during_decode = 0 if force_offload else NON_BLOCK_BYTES + resident_blocks
+    decode = BASE_OVERHEAD_BYTES + VAE_WEIGHTS_BYTES + model_during_decode + decode_activations
+
+    return {"sampling": sampling, "decode": decode, "peak": max(sampling, decode)}
+
+
+def estimate_runtime(
+    width,
+    height,
+    max_frame,
+    person_count="single",
+    input_type="image",
+    denoise_steps=6,
+    frame_window_size=81,
+    motion_frame=9,
+    blocks_to_swap=0,
+    force_offload=True,
+    enable_vae_tiling=False,
+):
+    """GPU 실행 시간(초)을 추정하는 함수"""
+    windows = count_windows(max_frame, frame_window_size, motion_frame)
+    mtokens = latent_tokens(width, height, frame_window_size) / 1e6
+    if person_count == "multi":
+        mtokens *= MULTI_PERSON_ACTIVATION_FACTOR
+
+    step_seconds = SECONDS_PER_STEP_PER_MTOKEN * mtokens + SECONDS_PER_STEP_PER_MTOKEN_SQ * mtokens**2
+    swap_seconds = blocks_to_swap * (BLOCKS_BYTES / TRANSFORMER_BLOCKS) / SWAP_BANDWIDTH_BYTES
+    sampling = windows * denoise_steps * (step_seconds + swap_seconds)
+
+    decode = windows * frame_window_size * width * height / 1e6 * DECODE_SECONDS_PER_MPIXEL
+    if enable_vae_tiling:
+        decode *= TILED_DECODE_SLOWDOWN
+
+    # V2V는 원본 비디오 인코딩이 추가됨
+    encode = decode * 0.5 if input_type == "video" else 0.0
+    offload = OFFLOAD_SECONDS if force_offload else 0.0
+    total = FIXED_SECONDS + sampling + decode + encode + offload
+    return {
+        "windows": windows,
+        "sampling": sampling,
+        "decode": decode + encode,
+        "total": total,
+    }
+
+
+def get_gpu_vram_bytes(system_stats):
+    """ComfyUI /system_stats 응답에서 첫 번째 CUDA 장치의 전체 VRAM(bytes)을 반환하는 함수"""
+    for device in (system_stats or {}).get("devices", []):
+        if device.get("type") == "cuda" and device.get("vram_total"):
+            return device["vram_total"]
+    return None
+
+
+def choose_memory_settings(
+    width,
+    height,
+    max_frame,
+    person_count,
+    input_type,
+    vram_bytes,
+    denoise_steps=6,
+    frame_window_size=81,
+    motion_frame=9,
+):
+    """VRAM 안에 들어가는 가장 빠른 blocks_to_swap / force_offload / enable_vae_tiling을 고르는 함수"""
+    budget = vram_bytes * VRAM_SAFETY_RATIO
+
+    def fits(blocks, offload, tiling):
+        vram = estimate_vram(width, height, person_count, frame_window_size, blocks, offload, tiling)
+        return vram["peak"] <= budget
+
+    # 1. 샘플링 단계가 들어가는 최소 블록 스왑 수
+    blocks_to_swap = TRANSFORMER_BLOCKS
+    for blocks in range(TRANSFORMER_BLOCKS + 1):
+        vram = estimate_vram(width, height, person_count, frame_window_size, blocks)
+        if vram["sampling"] <= budget:
+            blocks_to_swap = blocks
+            break
+
+    # 2. 디코드 단계: 모델을 GPU에 남겨둘 수 있으면 offload 생략, 타일링은 마지막 수단
+    if fits(blocks_to_swap, False, False):
+        force_offload, enable_vae_tiling = False, False
+    elif fits(blocks_to_swap, True, False):
+        force_offload, enable_vae_tiling = True, False
+    else:
+        force_offload, enable_vae_tiling = True, True
+
+    settings = {
+        "blocks_to_swap": blocks_to_swap,
+        "force_offload": force_offload,
+        "enable_vae_tiling": enable_vae_tiling,
+    }
+    vram = estimate_vram(
+        width, height, person_count, frame_window_size,
+        blocks_to_swap, force_offload, enable_vae_tiling,
+    )
+    runtime = estimate_runtime(
+        width, height, max_frame, person_count, input_type, denoise_steps,
+        frame_window_size, motion_frame, blocks_to_swap, force_offload, enable_vae_tiling,
+    )
+    estimate = {
+        "vram_total_gb": round(vram_bytes / GIB, 2),
+        "peak_vram_gb": round(vram["peak"] / GIB, 2),
+        "fits": vram["peak"] <= budget,
+        "windows": runtime["windows"],
+        "runtime_seconds": round(runtime["total"], 1),
+    }
+    logger.info(f"📐 비용 모델 선택: {settings}, 추정치: {estimate}")
+    return settings, estimate
@@ -3,20 +3,72 @@
 # Exit immediately if a command exits with a non-zero status.
 set -e
 
+# ComfyUI 인스턴스 수 (GPU당 하나, 기본값은 보이는 GPU 수)
+if [ -z "$COMFYUI_INSTANCES" ]; then
+    COMFYUI_INSTANCES=$(nvidia-smi -L 2>/dev/null | wc -l)
+    if [ "$COMFYUI_INSTANCES" -lt 1 ]; then
+        COMFYUI_INSTANCES=1
+    fi
+fi
+COMFYUI_BASE_PORT=${COMFYUI_BASE_PORT:-8188}
+
+# 텍스트 인코더/CLIP vision 컨디셔닝 캐시 (네트워크 볼륨이 있으면 워커 간에 공유, CONDITIONING_CACHE=false면 비활성화)
+if [ "${CONDITIONING_CACHE:-true}" = "true" ]; then
+    if [ -z "$CONDITIONING_CACHE_DIR" ]; then
+        if [ -d /runpod-volume ]; then
+            CONDITIONING_CACHE_DIR=/runpod-volume/infinitetalk_cache/conditioning
+        else
+            CONDITIONING_CACHE_DIR=/ComfyUI/conditioning_cache
+        fi
+    fi
+    mkdir -p "$CONDITIONING_CACHE_DIR/text_embeds" "$CONDITIONING_CACHE_DIR/clip_vision"
+    # WanVideoTextEncodeCached의 디스크 캐시 디렉토리를 관리 디렉토리로 연결
+    text_embed_cache=/ComfyUI/custom_nodes/ComfyUI-WanVideoWrapper/text_embed_cache
+    if [ ! -L "$text_embed_cache" ]; then
+        rm -rf "$text_embed_cache"
+    fi
+    ln -sfn "$CONDITIONING_CACHE_DIR/text_embeds" "$text_embed_cache"
+    export CONDITIONING_CACHE_DIR
+else
+    export CONDITIONING_CACHE_DIR=""
+fi
+
 # Start ComfyUI in the background
-echo "Starting ComfyUI in the background..."
-python /ComfyUI/main.py --listen --use-sage-attention &
+addresses=""
+temp_dirs=""
+for i in $(seq 0 $((COMFYUI_INSTANCES - 1))); do
+    port=$((COMFYUI_BASE_PORT + i))
+    if [ "$COMFYUI_INSTANCES" -eq 1 ]; then
+        echo "Starting ComfyUI in the background..."
+        python /ComfyUI/main.py --listen --port $port --use-sage-attention &
+        temp_dirs="/ComfyUI/temp"
+    else
+        # 인스턴스마다 GPU 하나와 임시 출력 디렉토리를 따로 사용 (출력 파일 이름 충돌 방지)
+        echo "Starting ComfyUI instance $i on GPU $i (port $port) in the background..."
+        mkdir -p /ComfyUI/instances/$i
+        CUDA_VISIBLE_DEVICES=$i python /ComfyUI/main.py --listen --port $port --use-sage-attention \
+            --temp-directory /ComfyUI/instances/$i &
+        temp_dirs="${temp_dirs:+$temp_dirs,}/ComfyUI/instances/$i/temp"
+    fi
+    addresses="${addresses:+$addresses,}127.0.0.1:$port"
+done
 
 # Wait for ComfyUI to be ready
 echo "Waiting for ComfyUI to be ready..."
 max_wait=120  # 최대 2분 대기
 wait_count=0
 while [ $wait_count -lt $max_wait ]; do
-    if curl -s http://127.0.0.1:8188/ > /dev/null 2>&1; then
+    ready=0
+    for address in ${addresses//,/ }; do
+        if curl -s http://$address/ > /dev/null 2>&1; then
+            ready=$((ready + 1))
+        fi
+    done
+    if [ $ready -eq $COMFYUI_INSTANCES ]; then
         echo "ComfyUI is ready!"
         break
     fi
-    echo "Waiting for ComfyUI... ($wait_count/$max_wait)"
+    echo "Waiting for ComfyUI... ($ready/$COMFYUI_INSTANCES ready, $wait_count/$max_wait)"
     sleep 2
     wait_count=$((wait_count + 2))
 done
@@ -26,6 +78,10 @@ if [ $wait_count -ge $max_wait ]; then
     exit 1
 fi
 
+# 핸들러가 모든 ComfyUI 인스턴스를 백엔드 풀로 사용
+export SERVER_ADDRESSES=${SERVER_ADDRESSES:-$addresses}
+export COMFYUI_TEMP_DIR=${COMFYUI_TEMP_DIR:-$temp_dirs}
+
 # Start the handler in the foreground
 # 이 스크립트가 컨테이너의 메인 프로세스가 됩니다.
 echo "Starting the handler..."
@@ -0,0 +1,201 @@
+import os
+import re
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# silencedetect 필터 출력 (stderr)
+SILENCE_START_PATTERN = re.compile(r"silence_start: (-?[\d.]+)")
+SILENCE_END_PATTERN = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+def run_ffmpeg(args, timeout=600):
+    """ffmpeg를 실행하고 stderr를 반환하는 함수 (실패 시 Exception)"""
+    command = ["ffmpeg", "-hide_banner", "-nostdin", "-y"] + list(args)
+    try:
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=timeout
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise Exception(f"ffmpeg 실행 실패: {e}")
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.strip().splitlines()[-5:])
+        raise Exception(f"ffmpeg 실행 실패 (코드 {result.returncode}): {tail}")
+    return result.stderr
+
+
+def detect_silences(path, noise_db=-35, min_silence=0.3):
+    """silencedetect 필터로 무음 구간 [(시작, 끝), ...]을 반환하는 함수 (초 단위)"""
+    stderr = run_ffmpeg(
+        [
+            "-i",
+            path,
+            "-af",
+            f"silencedetect=noise={noise_db}dB:d={min_silence}",
+            "-f",
+            "null",
+            "-",
+        ]
+    )
+    silences = []
+    start = None
+    for line in stderr.splitlines():
+        match = SILENCE_START_PATTERN.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END_PATTERN.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    # 파일 끝까지 무음이면 silence_end가 출력되지 않음
+    if start is not None:
+        silences.append((start, None))
+    return silences
+
+
+def cut_audio(source_path, output_path, start, end=None, pad_to=None):
+    """오디오의 [start, end) 구간을 PCM WAV로 잘라내는 함수 (샘플 단위로 정확)
+
+    pad_to가 주어지면 결과가 그보다 짧을 때 뒤를 무음으로 채운다.
+    """
+    args = ["-i", source_path, "-ss", f"{start:.3f}"]
+    if end is not None:
+        args += ["-to", f"{end:.3f}"]
+    if pad_to is not None:
+        args += ["-af", f"apad=whole_dur={pad_to:.3f}"]
+    args += ["-vn", "-acodec", "pcm_s16le", output_path]
+    run_ffmpeg(args)
+    return output_path
+
+
+def cut_video(source_path, output_path, start, duration, loop=False):
+    """비디오의 start부터 duration초를 오디오 없이 다시 인코딩하여 잘라내는 함수
+
+    loop가 True이면 원본이 짧을 때 처음부터 반복하여 길이를 채운다.
+    """
+    args = ["-stream_loop", "-1"] if loop else []
+    args += [
+        "-ss",
+        f"{start:.3f}",
+        "-i",
+        source_path,
+        "-t",
+        f"{duration:.3f}",
+        "-an",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-crf",
+        "16",
+        "-pix_fmt",
+        "yuv420p",
+        output_path,
+    ]
+    run_ffmpeg(args)
+    return output_path
+
+
+def trim_and_scale_video(source_path, output_path, width, height, duration):
+    """비디오 앞부분 duration초만 남기고 width×height로 가운데를 채워 자르는 함수 (프레임레이트 유지)
+
+    ComfyUI의 ImageResizeKJv2(keep_proportion=crop, crop_position=center)와 같은 방식으로 자른다.
+    """
+    run_ffmpeg(
+        [
+            "-i",
+            source_path,
+            "-t",
+            f"{duration:.3f}",
+            "-vf",
+            f"scale={width}:{height}:force_original_aspect_ratio=increase:flags=lanczos,"
+            f"crop={width}:{height},setsar=1",
+            "-an",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            "16",
+            "-pix_fmt",
+            "yuv420p",
+            output_path,
+        ]
+    )
+    return output_path
+
+
+def extract_last_frame(video_path, output_path):
+    """비디오의 마지막 프레임을 PNG 이미지로 저장하는 함수"""
+    # 끝에서 1초 전부터 디코드하면서 같은 파일을 계속 덮어써 마지막 프레임만 남김
+    run_ffmpeg(
+        ["-sseof", "-1", "-i", video_path, "-update", "1", "-an", output_path]
+    )
+    if not os.path.exists(output_path):
+        raise Exception(f"마지막 프레임 추출 실패: {video_path}")
+    return output_path
+
+
+def concat_videos(video_paths, output_path):
+    """같은 설정으로 인코딩된 MP4들을 재인코딩 없이(-c copy) 이어 붙이는 함수"""
+    list_path = f"{output_path}.txt"
+    with open(list_path, "w") as f:
+        for path in video_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        run_ffmpeg(
+            [
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_path,
+                "-c",
+                "copy",
+                "-movflags",
+                "+faststart",
+                output_path,
+            ]
+        )
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+def probe_video_fps(path, timeout=30):
+    """ffprobe로 첫 번째 비디오 스트림의 프레임레이트를 반환하는 함수 (알 수 없으면 None)"""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "stream=avg_frame_rate,r_frame_rate",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.info(f"ffprobe 실행 실패 ({path}): {e}")
+        return None
+    # "30000/1001" 형태의 분수 (avg_frame_rate가 0/0이면 r_frame_rate 사용)
+    for rate in result.stdout.split():
+        numerator, _, denominator = rate.partition("/")
+        try:
+            fps = float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            continue
+        if fps > 0:
+            return fps
+    return None
@@ -0,0 +1,178 @@
+import os
+import uuid
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class LRUFileCache:
+    """디렉토리 기반 파일 캐시 (크기 제한 + mtime 기준 LRU 제거 + 동일 키 요청 병합)"""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 사용 중인 키의 [잠금, 대기/사용 중인 수] (사용이 끝나면 제거되며, 여기 있는 키는 LRU 제거 대상에서 제외)
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    @contextmanager
+    def _key_lock(self, key):
+        """키별 잠금을 잡는 컨텍스트 매니저 (마지막 사용자가 나가면 잠금 항목을 제거)"""
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def get(self, key):
+        """캐시에 있으면 경로를 반환하고 최근 사용 시간을 갱신하는 함수"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_or_create(self, key, producer, dest_path=None):
+        """캐시 항목을 반환하고, 없으면 producer(임시 경로)로 한 번만 생성하는 함수
+
+        dest_path가 주어지면 키를 사용하는 동안(제거되지 않는 동안) dest_path에 연결하고 그 경로를 반환한다.
+        """
+        # 같은 키에 대한 동시 요청은 하나의 생성 작업으로 병합
+        with self._key_lock(key):
+            path = self.get(key)
+            if path is not None:
+                self.hits += 1
+                logger.info(f"✅ 캐시 적중: {key}")
+            else:
+                self.misses += 1
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+                try:
+                    producer(tmp_path)
+                    os.replace(tmp_path, self.path_for(key))
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                path = self.path_for(key)
+                logger.info(f"💾 캐시에 저장: {key}")
+            if dest_path is not None:
+                path = self.link_into(path, dest_path)
+
+        self.evict(keep=key)
+        return path
+
+    def evict(self, keep=None):
+        """전체 크기가 제한을 넘으면 오래 사용되지 않은 항목부터 삭제하는 함수"""
+        with self._lock:
+            entries = []
+            total = 0
+            try:
+                names = os.listdir(self.cache_dir)
+            except FileNotFoundError:
+                return
+            for name in names:
+                # 임시 파일과 생성/연결 중인 키는 제거하지 않음
+                if name.startswith(".") or name in self._key_locks:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+                total += stat.st_size
+
+            entries.sort()
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                    logger.info(f"🧹 캐시 항목 제거 (LRU): {name} ({size} bytes)")
+                except FileNotFoundError:
+                    pass
+
+    def link_into(self, cached_path, dest_path):
+        """캐시 파일을 작업 디렉토리에 하드링크하고, 실패하면 복사하는 함수
+
+        캐시 경로를 그대로 넘기면 작업 중에 LRU 제거로 파일이 삭제될 수 있으므로 항상 dest_path를 반환한다.
+        """
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(cached_path, dest_path)
+        except OSError as e:
+            logger.info(f"하드링크 불가, 캐시 파일을 복사합니다: {e}")
+            shutil.copyfile(cached_path, dest_path)
+        return dest_path
+
+
+class DownloadCache(LRUFileCache):
+    """URL + ETag/Last-Modified 기준으로 다운로드 결과를 재사용하는 캐시"""
+
+    def __init__(self, cache_dir, max_bytes, probe):
+        super().__init__(cache_dir, max_bytes)
+        # probe(url) -> {"etag": ..., "last_modified": ...} (다운로더에 그대로 넘겨 다시 조회하지 않음)
+        self.probe = probe
+
+    @staticmethod
+    def get_validator(info):
+        """probe 결과의 ETag 또는 Last-Modified 값을 가져오는 함수"""
+        if info is None:
+            return None
+        if info.get("etag"):
+            return f"etag:{info['etag']}"
+        if info.get("last_modified"):
+            return f"last-modified:{info['last_modified']}"
+        return None
+
+    def fetch(self, url, dest_path, download):
+        """캐시를 거쳐 URL을 dest_path에 준비하는 함수
+
+        download(url, 경로, probe 결과)는 이미 조회한 probe 결과를 받아 HEAD를 다시 보내지 않는다.
+        """
+        try:
+            info = self.probe(url)
+        except Exception as e:
+            logger.info(f"HEAD 요청 실패, 캐시를 사용하지 않습니다: {e}")
+            info = None
+        validator = self.get_validator(info)
+        # 검증자가 없으면 내용이 바뀌었는지 다운로드 없이는 알 수 없으므로 캐시하지 않음
+        # (내용 해시 기준 재사용은 다운로드 이후 단계의 캐시가 file_sha256으로 이미 처리)
+        if validator is None:
+            return download(url, dest_path, info)
+
+        key = hashlib.sha256(f"{url}\n{validator}".encode("utf-8")).hexdigest()
+        started = time.perf_counter()
+        path = self.get_or_create(key, lambda tmp_path: download(url, tmp_path, info), dest_path)
+        logger.info(
+            f"📦 다운로드 캐시 처리 완료: {url} ({time.perf_counter() - started:.3f}초, "
+            f"적중 {self.hits} / 미스 {self.misses})"
+        )
+        return path
@@ -1,16 +1,48 @@
 import runpod
 import os
-import websocket
 import base64
 import json
 import uuid
 import logging
-import urllib.request
-import urllib.parse
 import binascii  # Base64 에러 처리를 위해 import
-import subprocess
-import librosa
 import shutil
+import time
+import mmap
+import hashlib
+import signal
+import urllib.parse
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from file_cache import DownloadCache
+from http_downloader import HostConnectionPool, HttpDownloader
+from comfy_client import PromptFailed
+from backend_pool import BackendPool, model_key, parse_addresses
+from workspace import WorkspaceManager
+from audio_probe import probe_audio_duration, probe_ffprobe_duration
+from workflow_registry import WorkflowRegistry
+from tuning import TUNING_FIELDS, resolve_tuning, effective_tuning
+from cost_model import (
+    choose_memory_settings,
+    estimate_runtime,
+    get_gpu_vram_bytes,
+)
+from ffmpeg_utils import (
+    concat_videos,
+    cut_video,
+    extract_last_frame,
+    probe_video_fps,
+    trim_and_scale_video,
+)
+from audio_analysis import analyze_audio
+from image_prep import PreparedImageCache, file_sha256
+from progress import ProgressTracker, ThrottledProgress
+from segmenter import split_audio
+from timings import JobTimings
+from warmup import run_warmup
+from job_control import JobControl, cancel_all, cancel_job, parse_timeout
+from output_transport import OutputTransport
+from conditioning_cache import ConditioningCache
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -29,51 +61,164 @@ def truncate_base64_for_log(base64_str, max_length=50):
 server_address = os.getenv("SERVER_ADDRESS", "127.0.0.1")
 client_id = str(uuid.uuid4())
 
-
-def download_file_from_url(url, output_path):
-    """URL에서 파일을 다운로드하는 함수"""
+# ComfyUI 백엔드 풀 (GPU별 ComfyUI마다 HTTP/웹소켓 세션 하나, 워커 시작 시 연결하고 작업 간에 재사용)
+# SERVER_ADDRESSES="127.0.0.1:8188,127.0.0.1:8189"처럼 여러 개를 지정할 수 있고, 없으면 SERVER_ADDRESS:8188 하나
+backends = BackendPool(
+    parse_addresses(os.getenv("SERVER_ADDRESSES", f"{server_address}:8188")),
+    client_id,
+    float(os.getenv("BACKEND_POLL_INTERVAL", "2")),
+    int(os.getenv("BACKEND_STICKY_SLACK", "0")),
+    # 백엔드 하나에 동시에 맡길 prompt 수 (실행 중 1개 + 대기 1개, VRAM은 ComfyUI가 한 번에 하나만 사용)
+    int(os.getenv("BACKEND_MAX_PROMPTS", "2")),
+)
+COMFYUI_READY_TIMEOUT = int(os.getenv("COMFYUI_READY_TIMEOUT", "180"))
+
+# 워커 하나가 동시에 받을 작업 수 (기본값: 백엔드 수 + 1)
+# 한 작업이 GPU에서 렌더링되는 동안 다른 작업의 입력 준비와 결과 전송이 함께 진행된다.
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "0")) or len(backends) + 1
+
+# 입력 스테이징에 사용할 최대 스레드 수
+INPUT_STAGING_WORKERS = int(os.getenv("INPUT_STAGING_WORKERS", "4"))
+# URL 오디오 입력을 저장할 때 유지하는 확장자 (그 외에는 input_audio.wav로 저장)
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".oga", ".opus", ".m4a", ".aac", ".webm")
+
+# Base64 입력을 한 번에 디코딩할 문자 수 (4의 배수, 기본 4MB)
+BASE64_CHUNK_CHARS = 4 * 1024 * 1024
+
+# 결과 비디오를 manifest + Base64 청크로 나누어 스트리밍할지 여부
+RESULT_STREAMING = os.getenv("RESULT_STREAMING", "false").lower() == "true"
+RESULT_CHUNK_BYTES = int(os.getenv("RESULT_CHUNK_BYTES", str(3 * 1024 * 1024)))
+
+# 워크플로우 템플릿 (시작 시 한 번 로드/검증, 노드 ID가 어긋나면 여기서 실패)
+workflow_registry = WorkflowRegistry(os.getenv("WORKFLOW_DIR", "/"))
+
+# V2V 원본 비디오를 ffmpeg로 미리 자르고 축소할지 여부와 길이 여유분 (초)
+VIDEO_PREPROCESS = os.getenv("VIDEO_PREPROCESS", "true").lower() == "true"
+VIDEO_TRIM_MARGIN_SECONDS = float(os.getenv("VIDEO_TRIM_MARGIN_SECONDS", "0.5"))
+
+# I2V 입력 이미지를 CPU에서 미리 정규화할지 여부와 정규화 결과 캐시 (IMAGE_CACHE_MAX_GB=0 이면 캐시 비활성화)
+IMAGE_PREPROCESS = os.getenv("IMAGE_PREPROCESS", "true").lower() == "true"
+image_cache = PreparedImageCache(
+    os.getenv("IMAGE_CACHE_DIR", "/tmp/infinitetalk_cache/images"),
+    int(float(os.getenv("IMAGE_CACHE_MAX_GB", "1")) * 1024**3),
+)
+
+# prompt 실행 제한 시간: 비용 모델 추정치 × 배수 (최소값 보장, 작업에 timeout_seconds가 있으면 그 값 사용)
+PROMPT_TIMEOUT_FACTOR = float(os.getenv("PROMPT_TIMEOUT_FACTOR", "3"))
+PROMPT_TIMEOUT_MIN_SECONDS = float(os.getenv("PROMPT_TIMEOUT_MIN_SECONDS", "600"))
+# 실행 시작을 확인하지 못해도 제출 후 (최대 큐 대기 시간 + 제한 시간)이 지나면 prompt를 취소
+PROMPT_MAX_QUEUE_WAIT_SECONDS = float(os.getenv("PROMPT_MAX_QUEUE_WAIT_SECONDS", "1800"))
+
+# RunPod 작업 진행률 전송 최소 간격 (초)
+PROGRESS_UPDATE_INTERVAL = float(os.getenv("PROGRESS_UPDATE_INTERVAL", "5"))
+
+# 출력 파일 전송 방식 (auto: 로컬 경로가 보이면 직접 사용, 아니면 /view 스트리밍 / local / http)
+output_transport = OutputTransport(
+    os.getenv("OUTPUT_TRANSPORT", "auto"),
+    int(os.getenv("OUTPUT_FETCH_CHUNK_BYTES", str(1024 * 1024))),
+)
+
+# 텍스트 인코더/CLIP vision 인코딩 결과 디스크 캐시 (entrypoint.sh가 설정, 비어 있으면 비활성화)
+# 캐시에 있으면 ComfyUI가 umt5-xxl/CLIP vision 모델을 로드하지 않음 (*_MAX_GB=0 이면 해당 캐시 비활성화)
+conditioning_cache = ConditioningCache(
+    os.getenv("CONDITIONING_CACHE_DIR", ""),
+    int(float(os.getenv("TEXT_EMBED_CACHE_MAX_GB", "2")) * 1024**3),
+    int(float(os.getenv("CLIP_VISION_CACHE_MAX_GB", "1")) * 1024**3),
+)
+
+# 렌더링 결과에서 작업 응답에 그대로 포함하는 보고 항목
+JOB_REPORT_KEYS = ("frame_budget", "conditioning_cache", "timings")
+
+# 구간 분할 렌더링 설정 (segmented=true 작업에서 사용)
+SEGMENT_SECONDS = float(os.getenv("SEGMENT_SECONDS", "60"))
+SEGMENT_MIN_SECONDS = float(os.getenv("SEGMENT_MIN_SECONDS", "10"))
+SEGMENT_MAX_ATTEMPTS = int(os.getenv("SEGMENT_MAX_ATTEMPTS", "2"))
+
+# 워커 시작 시 작업을 받기 전에 합성 입력으로 워크플로우를 한 번 실행할지 여부 (모델 로드/torch.compile 선행)
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "false").lower() == "true"
+WARMUP_INPUT_TYPE = os.getenv("WARMUP_INPUT_TYPE", "image")
+WARMUP_PERSON_COUNT = os.getenv("WARMUP_PERSON_COUNT", "single")
+WARMUP_WIDTH = int(os.getenv("WARMUP_WIDTH", "512"))
+WARMUP_HEIGHT = int(os.getenv("WARMUP_HEIGHT", "512"))
+
+# GPU 메모리 기반으로 blocks_to_swap / force_offload / VAE 타일링 자동 선택 여부
+AUTO_MEMORY_TUNING = os.getenv("AUTO_MEMORY_TUNING", "true").lower() == "true"
+
+# 작업별 스크래치 디렉토리 관리 (입력 파일 + ComfyUI 임시 출력, 디스크 예산 포함)
+# COMFYUI_TEMP_DIR는 ComfyUI 인스턴스가 여러 개면 쉼표로 구분한 목록
+workspace = WorkspaceManager(
+    os.getenv("WORKSPACE_ROOT", "/tmp/infinitetalk_workspace"),
+    int(float(os.getenv("WORKSPACE_BUDGET_GB", "20")) * 1024**3),
+    os.getenv("COMFYUI_TEMP_DIR", "/ComfyUI/temp").split(","),
+)
+
+# URL 입력 다운로더 (호스트별 keep-alive 연결 풀 공유)
+http_pool = HostConnectionPool()
+downloader = HttpDownloader(
+    http_pool,
+    max_bytes=int(float(os.getenv("DOWNLOAD_MAX_GB", "4")) * 1024**3),
+)
+
+# URL 입력 다운로드 캐시 (DOWNLOAD_CACHE_MAX_GB=0 이면 비활성화)
+download_cache = DownloadCache(
+    os.getenv("DOWNLOAD_CACHE_DIR", "/tmp/infinitetalk_cache/downloads"),
+    int(float(os.getenv("DOWNLOAD_CACHE_MAX_GB", "10")) * 1024**3),
+    downloader.probe,
+)
+
+
+def download_file_from_url(url, output_path, info=None):
+    """URL에서 파일을 다운로드하는 함수 (info는 이미 조회한 probe 결과)"""
     try:
-        # wget을 사용하여 파일 다운로드
-        result = subprocess.run(
-            ["wget", "-O", output_path, "--no-verbose", "--timeout=30", url],
-            capture_output=True,
-            text=True,
-            timeout=60,
+        # 프로세스 내 다운로더로 연결을 재사용하며 스트리밍 다운로드
+        downloader.download(url, output_path, info)
+        logger.info(
+            f"✅ URL에서 파일을 성공적으로 다운로드했습니다: {url} -> {output_path}"
         )
-
-        if result.returncode == 0:
-            logger.info(
-                f"✅ URL에서 파일을 성공적으로 다운로드했습니다: {url} -> {output_path}"
-            )
-            return output_path
-        else:
-            logger.error(f"❌ wget 다운로드 실패: {result.stderr}")
-            raise Exception(f"URL 다운로드 실패: {result.stderr}")
-    except subprocess.TimeoutExpired:
-        logger.error("❌ 다운로드 시간 초과")
-        raise Exception("다운로드 시간 초과")
+        return output_path
     except Exception as e:
         logger.error(f"❌ 다운로드 중 오류 발생: {e}")
         raise Exception(f"다운로드 중 오류 발생: {e}")
 
 
 def save_base64_to_file(base64_data, temp_dir, output_filename):
-    """Base64 데이터를 파일로 저장하는 함수"""
-    try:
-        # Base64 문자열 디코딩
-        decoded_data = base64.b64decode(base64_data)
-
-        # 디렉토리가 존재하지 않으면 생성
-        os.makedirs(temp_dir, exist_ok=True)
+    """Base64 데이터를 청크 단위로 디코딩하면서 파일로 저장하는 함수"""
+    # 디렉토리가 존재하지 않으면 생성
+    os.makedirs(temp_dir, exist_ok=True)
+    file_path = os.path.abspath(os.path.join(temp_dir, output_filename))
 
-        # 파일로 저장
-        file_path = os.path.abspath(os.path.join(temp_dir, output_filename))
+    try:
+        # data URI 접두사(data:...;base64,)가 있으면 건너뜀
+        start = 0
+        if base64_data.startswith("data:"):
+            start = base64_data.find(",") + 1
+
+        # 전체 문자열을 한 번에 디코딩하지 않고 4의 배수 단위로 나누어 기록
+        carry = ""
+        padded = False
         with open(file_path, "wb") as f:
-            f.write(decoded_data)
+            for offset in range(start, len(base64_data), BASE64_CHUNK_CHARS):
+                chunk = carry + "".join(
+                    base64_data[offset : offset + BASE64_CHUNK_CHARS].split()
+                )
+                usable = len(chunk) - len(chunk) % 4
+                if usable == 0:
+                    carry = chunk
+                    continue
+                if padded:
+                    raise ValueError("패딩 문자(=) 뒤에 데이터가 있습니다")
+                f.write(base64.b64decode(chunk[:usable], validate=True))
+                padded = chunk[usable - 1] == "="
+                carry = chunk[usable:]
+
+        if carry:
+            raise ValueError(f"잘못된 Base64 길이입니다 (남은 문자 {len(carry)}개)")
 
         logger.info(f"✅ Base64 입력을 '{file_path}' 파일로 저장했습니다.")
         return file_path
     except (binascii.Error, ValueError) as e:
+        if os.path.exists(file_path):
+            os.remove(file_path)
         logger.error(f"❌ Base64 디코딩 실패: {e}")
         raise Exception(f"Base64 디코딩 실패: {e}")
 
@@ -89,6 +234,8 @@ def process_input(input_data, temp_dir, output_filename, input_type):
         logger.info(f"🌐 URL 입력 처리: {input_data}")
         os.makedirs(temp_dir, exist_ok=True)
         file_path = os.path.abspath(os.path.join(temp_dir, output_filename))
+        if download_cache.enabled:
+            return download_cache.fetch(input_data, file_path, download_file_from_url)
         return download_file_from_url(input_data, file_path)
     elif input_type == "base64":
         # Base64인 경우 디코딩하여 저장
@@ -98,185 +245,309 @@ def process_input(input_data, temp_dir, output_filename, input_type):
         raise Exception(f"지원하지 않는 입력 타입: {input_type}")
 
 
-def queue_prompt(prompt, input_type="image", person_count="single"):
-    url = f"http://{server_address}:8188/prompt"
-    logger.info(f"Queueing prompt to: {url}")
-    p = {"prompt": prompt, "client_id": client_id}
-    data = json.dumps(p).encode("utf-8")
+def select_input_source(job_input, prefix, suffix=""):
+    """path → url → base64 순서로 사용할 입력 키와 입력 타입을 선택하는 함수"""
+    for source in ("path", "url", "base64"):
+        key = f"{prefix}_{source}{suffix}"
+        if key in job_input:
+            return key, source
+    return None, None
 
-    # 디버깅을 위해 워크플로우 내용 로깅
-    logger.info(f"워크플로우 노드 수: {len(prompt)}")
+
+def audio_filename(filename, url):
+    """URL의 오디오 확장자를 저장 파일명에 유지하는 함수 (헤더 파싱이 실제 포맷을 알 수 있도록)"""
+    extension = os.path.splitext(urllib.parse.urlsplit(url).path)[1].lower()
+    if extension in AUDIO_EXTENSIONS:
+        return os.path.splitext(filename)[0] + extension
+    return filename
+
+
+def stage_inputs(job_input, task_dir, input_type, person_count):
+    """미디어/오디오 입력을 스레드 풀에서 동시에 준비하고 (경로, 소요 시간)을 반환하는 함수"""
+    # 스테이징 대상: (이름, 키 접두사, 키 접미사, 저장 파일명)
     if input_type == "image":
-        logger.info(
-            f"이미지 노드(284) 설정: {prompt.get('284', {}).get('inputs', {}).get('image', 'NOT_FOUND')}"
-        )
+        targets = [("media", "image", "", "input_image.jpg")]
     else:
-        logger.info(
-            f"비디오 노드(228) 설정: {prompt.get('228', {}).get('inputs', {}).get('video', 'NOT_FOUND')}"
-        )
-    logger.info(
-        f"오디오 노드(125) 설정: {prompt.get('125', {}).get('inputs', {}).get('audio', 'NOT_FOUND')}"
-    )
-    logger.info(
-        f"텍스트 노드(241) 설정: {prompt.get('241', {}).get('inputs', {}).get('positive_prompt', 'NOT_FOUND')}"
-    )
+        targets = [("media", "video", "", "input_video.mp4")]
+    targets.append(("wav", "wav", "", "input_audio.wav"))
     if person_count == "multi":
-        if "307" in prompt:
-            logger.info(
-                f"두 번째 오디오 노드(307) 설정: {prompt.get('307', {}).get('inputs', {}).get('audio', 'NOT_FOUND')}"
-            )
-        elif "313" in prompt:
-            logger.info(
-                f"두 번째 오디오 노드(313) 설정: {prompt.get('313', {}).get('inputs', {}).get('audio', 'NOT_FOUND')}"
-            )
+        targets.append(("wav_2", "wav", "_2", "input_audio_2.wav"))
+
+    pending = []
+    base64_keys = []
+    for name, prefix, suffix, filename in targets:
+        key, source = select_input_source(job_input, prefix, suffix)
+        if key is not None:
+            if prefix == "wav" and source == "url":
+                filename = audio_filename(filename, job_input[key])
+            pending.append((name, job_input[key], filename, source))
+            if source == "base64":
+                base64_keys.append(key)
+
+    staged_paths = {}
+    timings = {}
+    if not pending:
+        return staged_paths, timings
+
+    def _stage(name, input_data, filename, source):
+        started = time.perf_counter()
+        try:
+            return process_input(input_data, task_dir, filename, source)
+        finally:
+            timings[name] = round(time.perf_counter() - started, 3)
+            logger.info(f"⏱️ 입력 '{name}' 준비 시간: {timings[name]:.3f}초")
+
+    with ThreadPoolExecutor(
+        max_workers=min(INPUT_STAGING_WORKERS, len(pending))
+    ) as executor:
+        futures = [(item[0], executor.submit(_stage, *item)) for item in pending]
+        errors = []
+        for name, future in futures:
+            try:
+                staged_paths[name] = future.result()
+            except Exception as e:
+                errors.append(e)
+
+    # 파일로 저장된 Base64 페이로드는 작업 입력에서 제거하여 메모리를 해제
+    for key in base64_keys:
+        job_input.pop(key, None)
+
+    # 순차 처리 때와 동일하게 첫 번째 실패를 그대로 전달
+    if errors:
+        raise errors[0]
+    return staged_paths, timings
+
+
+def queue_prompt(prompt, template, session):
+    logger.info(f"Queueing prompt to: {session.base_url}/prompt")
 
-    req = urllib.request.Request(url, data=data)
-    req.add_header("Content-Type", "application/json")
+    # 디버깅을 위해 워크플로우 내용 로깅
+    logger.info(f"워크플로우 노드 수: {len(prompt)}")
+    for slot, value in template.describe(prompt).items():
+        logger.info(f"슬롯 {slot} 설정: {value}")
 
     try:
-        response = urllib.request.urlopen(req)
-        result = json.loads(response.read())
+        result = session.queue_prompt(prompt)
         logger.info(f"프롬프트 전송 성공: {result}")
         return result
-    except urllib.error.HTTPError as e:
-        logger.error(f"HTTP 에러 발생: {e.code} - {e.reason}")
-        logger.error(f"응답 내용: {e.read().decode('utf-8')}")
-        raise
     except Exception as e:
         logger.error(f"프롬프트 전송 중 오류: {e}")
         raise
 
 
-def get_image(filename, subfolder, folder_type):
-    url = f"http://{server_address}:8188/view"
-    logger.info(f"Getting image from: {url}")
-    data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
-    url_values = urllib.parse.urlencode(data)
-    with urllib.request.urlopen(f"{url}?{url_values}") as response:
-        return response.read()
-
+_system_stats = None
 
-def get_history(prompt_id):
-    url = f"http://{server_address}:8188/history/{prompt_id}"
-    logger.info(f"Getting history from: {url}")
-    with urllib.request.urlopen(url) as response:
-        return json.loads(response.read())
 
-
-def get_videos(ws, prompt, input_type="image", person_count="single"):
-    prompt_id = queue_prompt(prompt, input_type, person_count)["prompt_id"]
-    logger.info(f"워크플로우 실행 시작: prompt_id={prompt_id}")
-
-    output_videos = {}
-    while True:
-        out = ws.recv()
-        if isinstance(out, str):
-            message = json.loads(out)
+def get_system_stats():
+    """ComfyUI /system_stats 응답을 반환하는 함수 (GPU 정보는 바뀌지 않고 백엔드 간에 같으므로 캐시)"""
+    global _system_stats
+    if _system_stats is None:
+        for session in backends.sessions:
+            try:
+                _system_stats = session.get_system_stats()
+                break
+            except Exception as e:
+                logger.warning(f"⚠️ system_stats 조회 실패 ({session.base_url}): {e}")
+    return _system_stats
+
+
+def get_history(prompt_id, session):
+    logger.info(f"Getting history from: {session.base_url}/history/{prompt_id}")
+    return session.get_history(prompt_id)
+
+
+def describe_prompt_failure(message, tracker, prompt_id, queued_at, control):
+    """실패로 끝난 웹소켓 메시지를 (오류 메시지, 구조화된 오류 정보)로 바꾸는 함수"""
+    message_type = message["type"]
+    data = message.get("data") or {}
+    node_id = data.get("node_id", tracker.current_node)
+    node_type = data.get("node_type", tracker.class_types.get(node_id))
+    details = {"prompt_id": prompt_id, "node_id": node_id, "node_type": node_type}
+    if message_type == "execution_error":
+        details.update(
+            type="execution_error",
+            exception_type=data.get("exception_type"),
+            exception_message=data.get("exception_message"),
+        )
+        text = (
+            f"ComfyUI 노드 {node_id}({node_type}) 실행 오류: "
+            f"{data.get('exception_type')}: {data.get('exception_message')}"
+        )
+    elif message_type == "execution_interrupted":
+        details["type"] = "interrupted"
+        text = f"ComfyUI 실행이 노드 {node_id}({node_type})에서 중단되었습니다"
+    elif message_type == "deadline_exceeded":
+        details.update(
+            type="timeout", elapsed_seconds=round(time.monotonic() - queued_at, 1)
+        )
+        text = (
+            f"ComfyUI 실행 제한 시간을 초과했습니다 "
+            f"({details['elapsed_seconds']}초, 노드 {node_id}({node_type}))"
+        )
+    else:
+        details.update(type="cancelled", reason=control.cancel_reason)
+        text = f"작업이 취소되었습니다 (노드 {node_id}({node_type})): {control.cancel_reason}"
+    return text, details
+
+
+def wait_for_outputs(
+    prompt_id,
+    tracker,
+    session,
+    progress_callback=None,
+    timings=None,
+    deadline=None,
+    control=None,
+    execution_timeout=None,
+):
+    """prompt 실행이 끝날 때까지 기다리며 executed 메시지의 출력을 모아 {노드 ID: 출력}으로 반환하는 함수
+
+    웹소켓 메시지를 놓쳤을 수 있으면(재연결, 히스토리로 완료 확인) /history에서 출력을 읽는다.
+    """
+    queued_at = time.monotonic()
+    reconnects = session.reconnects
+    node_outputs = {}
+    last_message = None
+    try:
+        # 공유 웹소켓 세션에서 이 prompt의 메시지만 받아 실행 완료까지 대기
+        for message in session.iter_messages(
+            prompt_id,
+            deadline=deadline,
+            cancelled=control.cancelled,
+            execution_timeout=execution_timeout,
+        ):
+            last_message = message
+            timings.update(message)
+            if tracker.update(message) and progress_callback is not None:
+                progress_callback(tracker.snapshot())
             if message["type"] == "executing":
                 data = message["data"]
                 if data["node"] is not None:
                     logger.info(f"노드 실행 중: {data['node']}")
-                if data["node"] is None and data["prompt_id"] == prompt_id:
+                else:
                     logger.info("워크플로우 실행 완료")
-                    break
-        else:
-            continue
+            elif message["type"] == "executed":
+                data = message["data"]
+                node_outputs[data["node"]] = data.get("output") or {}
+    except BaseException:
+        # 대기 중 예외가 나도 ComfyUI가 계속 렌더링하지 않도록 취소
+        session.cancel_prompt(prompt_id)
+        raise
+    timings.prompt_finished()
+
+    if last_message is not None and last_message["type"] in (
+        "execution_error",
+        "execution_interrupted",
+        "deadline_exceeded",
+        "job_cancelled",
+    ):
+        text, details = describe_prompt_failure(
+            last_message, tracker, prompt_id, queued_at, control
+        )
+        logger.error(f"❌ {text}")
+        # 오류/중단으로 끝난 prompt는 이미 멈췄으므로 시간 초과/취소일 때만 ComfyUI에서 제거
+        if last_message["type"] in ("deadline_exceeded", "job_cancelled"):
+            session.cancel_prompt(prompt_id)
+        raise PromptFailed(text, details)
+
+    missed_messages = (
+        last_message is None
+        or last_message["type"] == "history_completed"
+        or session.reconnects != reconnects
+    )
+    if missed_messages or not any("gifs" in output for output in node_outputs.values()):
+        logger.info(f"히스토리 조회 중: prompt_id={prompt_id}")
+        with timings.phase("output_collect"):
+            node_outputs = get_history(prompt_id, session)[prompt_id]["outputs"]
+    return node_outputs
+
+
+def get_videos(
+    prompt,
+    template,
+    session,
+    expected_windows=1,
+    progress_callback=None,
+    timings=None,
+    deadline=None,
+    control=None,
+    execution_timeout=None,
+):
+    """프롬프트를 실행하고 노드별 비디오 출력 항목({"filename", "subfolder", "type", "fullpath"})을 반환하는 함수
+
+    execution_timeout(초)은 ComfyUI 큐에서 기다린 시간을 빼고 실행 시작부터 적용된다.
+    실행 오류, 중단, deadline/execution_timeout 초과, control 취소 시에는 prompt를 ComfyUI에서 제거/중단하고
+    PromptFailed를 발생시킨다.
+    """
+    timings = timings or JobTimings()
+    control = control or JobControl()
+    prompt_id = queue_prompt(prompt, template, session)["prompt_id"]
+    timings.prompt_queued(prompt)
+    logger.info(f"워크플로우 실행 시작: prompt_id={prompt_id}")
 
-    logger.info(f"히스토리 조회 중: prompt_id={prompt_id}")
-    history = get_history(prompt_id)[prompt_id]
-    logger.info(f"출력 노드 수: {len(history['outputs'])}")
+    output_videos = {}
+    tracker = ProgressTracker(prompt, expected_windows)
+    try:
+        node_outputs = wait_for_outputs(
+            prompt_id,
+            tracker,
+            session,
+            progress_callback,
+            timings,
+            deadline,
+            control,
+            execution_timeout,
+        )
+    finally:
+        # 워커가 오래 실행되어도 ComfyUI 메모리의 히스토리가 쌓이지 않도록 삭제 (출력 파일은 유지)
+        session.delete_history(prompt_id)
+    logger.info(f"출력 노드 수: {len(node_outputs)}")
 
-    for node_id in history["outputs"]:
-        node_output = history["outputs"][node_id]
+    for node_id, node_output in node_outputs.items():
         videos_output = []
         if "gifs" in node_output:
             logger.info(
                 f"노드 {node_id}에서 {len(node_output['gifs'])}개의 비디오 발견"
             )
             for idx, video in enumerate(node_output["gifs"]):
-                # fullpath를 그대로 반환 (base64 인코딩하지 않음)
-                video_path = video["fullpath"]
-                logger.info(f"비디오 파일 경로: {video_path}")
-
-                # 파일 존재 여부 및 크기 확인
-                if os.path.exists(video_path):
-                    file_size = os.path.getsize(video_path)
-                    logger.info(
-                        f"비디오 {idx+1} 발견: {video_path} (크기: {file_size} bytes)"
-                    )
-                else:
-                    logger.warning(f"비디오 파일이 존재하지 않습니다: {video_path}")
-
-                videos_output.append(video_path)
+                # 파일 항목을 그대로 반환 (로컬 경로/HTTP 전송은 output_transport가 결정)
+                logger.info(
+                    f"비디오 {idx+1}: {video.get('fullpath') or video.get('filename')}"
+                )
+                videos_output.append(video)
         else:
             logger.info(f"노드 {node_id}에 비디오 출력 없음")
         output_videos[node_id] = videos_output
 
-    logger.info(f"총 {len(output_videos)}개 노드에서 비디오 파일 경로 수집 완료")
+    logger.info(f"총 {len(output_videos)}개 노드에서 비디오 출력 항목 수집 완료")
     return output_videos
 
 
-def load_workflow(workflow_path):
-    with open(workflow_path, "r") as file:
-        return json.load(file)
-
-
-def get_workflow_path(input_type, person_count):
-    """input_type과 person_count에 따라 적절한 워크플로우 파일 경로를 반환"""
-    if input_type == "image":
-        if person_count == "single":
-            return "/I2V_single.json"
-        else:  # multi
-            return "/I2V_multi.json"
-    else:  # video
-        if person_count == "single":
-            return "/V2V_single.json"
-        else:  # multi
-            return "/V2V_multi.json"
-
-
 def get_audio_duration(audio_path):
     """오디오 파일의 길이(초)를 반환"""
     try:
-        duration = librosa.get_duration(path=audio_path)
-        return duration
+        # 헤더 파싱 → ffprobe → librosa 순서로 시도 (librosa는 필요할 때만 import)
+        return probe_audio_duration(audio_path)
     except Exception as e:
         logger.warning(f"오디오 길이 계산 실패 ({audio_path}): {e}")
         return None
 
 
-def calculate_max_frames_from_audio(wav_path, wav_path_2=None, fps=25):
-    """오디오 길이를 기반으로 max_frames를 계산"""
-    durations = []
-
-    # 첫 번째 오디오 길이 계산
-    duration1 = get_audio_duration(wav_path)
-    if duration1 is not None:
-        durations.append(duration1)
-        logger.info(f"첫 번째 오디오 길이: {duration1:.2f}초")
+def get_workflow_fps(template, media_path):
+    """워크플로우의 프레임레이트를 반환하는 함수 (V2V는 원본 비디오의 프레임레이트를 따름)"""
+    fps = template.default_value("wav2vec", "fps")
+    if isinstance(fps, (int, float)):
+        return fps
+    # 노드 연결이면 VHS_LoadVideo가 읽은 원본 프레임레이트 사용
+    fps = probe_video_fps(media_path)
+    if fps is None:
+        logger.warning(f"비디오 프레임레이트를 알 수 없어 25fps로 계산합니다: {media_path}")
+        return 25
+    return fps
 
-    # 두 번째 오디오 길이 계산 (multi person인 경우)
-    if wav_path_2:
-        duration2 = get_audio_duration(wav_path_2)
-        if duration2 is not None:
-            durations.append(duration2)
-            logger.info(f"두 번째 오디오 길이: {duration2:.2f}초")
 
-    if not durations:
-        logger.warning("오디오 길이를 계산할 수 없습니다. 기본값 81을 사용합니다.")
-        return 81
-
-    # 가장 긴 오디오 길이를 기준으로 max_frames 계산
-    max_duration = max(durations)
-    max_frames = int(max_duration * fps) + 81
-
-    logger.info(
-        f"가장 긴 오디오 길이: {max_duration:.2f}초, 계산된 max_frames: {max_frames}"
-    )
-    return max_frames
-
-
-def handler(job):
+def start_job(job):
+    """작업 입력을 로깅하고 (job_input, task_id)를 반환하는 함수"""
     job_input = job.get("input", {})
 
     # job_input을 로깅할 때 base64 데이터는 truncate해서 출력
@@ -287,110 +558,156 @@ def handler(job):
 
     logger.info(f"Received job input: {log_input}")
     task_id = f"task_{uuid.uuid4()}"
+    return job_input, task_id
+
+
+def preprocess_source_video(media_path, task_dir, width, height, max_frame, template):
+    """V2V 원본을 max_frame 길이와 목표 크기로 미리 자르고 (비디오 경로, 노드 228 패치)를 반환하는 함수"""
+    # 필요한 프레임만 로드하도록 제한 (미리 자른 경우 앞부분을 건너뛸 필요 없음)
+    patches = [
+        ("video", "frame_load_cap", max_frame),
+        ("video", "skip_first_frames", 0),
+    ]
+    if not VIDEO_PREPROCESS:
+        return media_path, patches
+
+    fps = get_workflow_fps(template, media_path)
+    duration = max_frame / fps + VIDEO_TRIM_MARGIN_SECONDS
+    output_path = os.path.join(task_dir, f"source_video_{width}x{height}.mp4")
+    started = time.perf_counter()
+    try:
+        trim_and_scale_video(media_path, output_path, width, height, duration)
+    except Exception as e:
+        logger.warning(f"⚠️ 원본 비디오 전처리 실패, 원본을 그대로 사용합니다: {e}")
+        return media_path, patches
+    logger.info(
+        f"🎞️ 원본 비디오 전처리 완료 ({time.perf_counter() - started:.2f}초): "
+        f"{os.path.getsize(media_path)} → {os.path.getsize(output_path)} bytes, "
+        f"{width}x{height}, {duration:.2f}초"
+    )
+    return output_path, patches
 
-    # 입력 타입과 인물 수 확인
-    input_type = job_input.get("input_type", "image")  # "image" 또는 "video"
-    person_count = job_input.get("person_count", "single")  # "single" 또는 "multi"
-
-    logger.info(f"워크플로우 타입: {input_type}, 인물 수: {person_count}")
-
-    # 워크플로우 파일 경로 결정
-    workflow_path = get_workflow_path(input_type, person_count)
-    logger.info(f"사용할 워크플로우: {workflow_path}")
 
-    # 이미지/비디오 입력 처리
-    media_path = None
-    if input_type == "image":
-        # 이미지 입력 처리 (image_path, image_url, image_base64 중 하나만 사용)
-        if "image_path" in job_input:
-            media_path = process_input(
-                job_input["image_path"], task_id, "input_image.jpg", "path"
-            )
-        elif "image_url" in job_input:
-            media_path = process_input(
-                job_input["image_url"], task_id, "input_image.jpg", "url"
-            )
-        elif "image_base64" in job_input:
-            media_path = process_input(
-                job_input["image_base64"], task_id, "input_image.jpg", "base64"
-            )
-        else:
-            # 기본값 사용
-            media_path = "/examples/image.jpg"
-            logger.info("기본 이미지 파일을 사용합니다: /examples/image.jpg")
-    else:  # video
-        # 비디오 입력 처리 (video_path, video_url, video_base64 중 하나만 사용)
-        if "video_path" in job_input:
-            media_path = process_input(
-                job_input["video_path"], task_id, "input_video.mp4", "path"
-            )
-        elif "video_url" in job_input:
-            media_path = process_input(
-                job_input["video_url"], task_id, "input_video.mp4", "url"
-            )
-        elif "video_base64" in job_input:
-            media_path = process_input(
-                job_input["video_base64"], task_id, "input_video.mp4", "base64"
-            )
-        else:
-            # 기본값 사용 (비디오가 없는 경우 기본 이미지 사용)
-            media_path = "/examples/image.jpg"
-            logger.info("기본 이미지 파일을 사용합니다: /examples/image.jpg")
+def prepare_inputs(job_input, task_id, input_type, person_count, timings=None):
+    """작업 디렉토리를 만들고 입력을 준비하여 (작업 디렉토리, 미디어, 오디오, 두 번째 오디오) 경로를 반환하는 함수"""
+    timings = timings or JobTimings()
+    # 이미지/비디오/오디오 입력을 작업 디렉토리에 병렬로 준비
+    task_dir = workspace.create(task_id)
+    with timings.phase("input_staging"):
+        staged_paths, staging_timings = stage_inputs(
+            job_input, task_dir, input_type, person_count
+        )
+    timings.inputs.update(staging_timings)
+    logger.info(f"⏱️ 입력 준비 소요 시간: {staging_timings}")
 
-    # 오디오 입력 처리 (wav_path, wav_url, wav_base64 중 하나만 사용)
-    wav_path = None
-    wav_path_2 = None  # 다중 인물용 두 번째 오디오
+    media_path = staged_paths.get("media")
+    if media_path is None:
+        # 기본값 사용 (비디오가 없는 경우에도 기본 이미지 사용)
+        media_path = "/examples/image.jpg"
+        logger.info("기본 이미지 파일을 사용합니다: /examples/image.jpg")
 
-    if "wav_path" in job_input:
-        wav_path = process_input(
-            job_input["wav_path"], task_id, "input_audio.wav", "path"
-        )
-    elif "wav_url" in job_input:
-        wav_path = process_input(
-            job_input["wav_url"], task_id, "input_audio.wav", "url"
-        )
-    elif "wav_base64" in job_input:
-        wav_path = process_input(
-            job_input["wav_base64"], task_id, "input_audio.wav", "base64"
-        )
-    else:
+    wav_path = staged_paths.get("wav")
+    if wav_path is None:
         # 기본값 사용
         wav_path = "/examples/audio.mp3"
         logger.info("기본 오디오 파일을 사용합니다: /examples/audio.mp3")
 
-    # 다중 인물용 두 번째 오디오 처리
+    # 다중 인물용 두 번째 오디오
+    wav_path_2 = None
     if person_count == "multi":
-        if "wav_path_2" in job_input:
-            wav_path_2 = process_input(
-                job_input["wav_path_2"], task_id, "input_audio_2.wav", "path"
-            )
-        elif "wav_url_2" in job_input:
-            wav_path_2 = process_input(
-                job_input["wav_url_2"], task_id, "input_audio_2.wav", "url"
-            )
-        elif "wav_base64_2" in job_input:
-            wav_path_2 = process_input(
-                job_input["wav_base64_2"], task_id, "input_audio_2.wav", "base64"
-            )
-        else:
+        wav_path_2 = staged_paths.get("wav_2")
+        if wav_path_2 is None:
             # 기본값 사용 (첫 번째 오디오와 동일)
             wav_path_2 = wav_path
             logger.info("두 번째 오디오가 없어 첫 번째 오디오를 사용합니다.")
 
+    return task_dir, media_path, wav_path, wav_path_2
+
+
+def render_video(
+    job_input,
+    task_id,
+    progress_callback=None,
+    timings=None,
+    control=None,
+    backend=None,
+):
+    """워크플로우를 실행하고 {"output_video_path": ...} 또는 {"error": ...}를 반환하는 함수
+
+    progress_callback(snapshot)은 ComfyUI 진행 메시지가 올 때마다 호출된다.
+    단계/노드별 소요 시간은 timings(JobTimings)에 누적된다.
+    control(JobControl)의 마감 시각/취소 요청으로 실패하면 {"error", "error_details"}를 반환한다.
+    backend(ComfyUI 세션)가 주어지면 백엔드를 고르지 않고 그 백엔드에서 실행한다.
+    """
+    timings = timings or JobTimings()
+    control = control or JobControl()
+    # 입력 타입과 인물 수 확인
+    input_type = job_input.get("input_type", "image")  # "image" 또는 "video"
+    person_count = job_input.get("person_count", "single")  # "single" 또는 "multi"
+
+    logger.info(f"워크플로우 타입: {input_type}, 인물 수: {person_count}")
+
+    # 긴 오디오는 구간별 프롬프트로 나누어 렌더링
+    if job_input.get("segmented", False):
+        return render_segmented(
+            job_input,
+            task_id,
+            input_type,
+            person_count,
+            progress_callback,
+            timings,
+            control,
+        )
+
+    # 시작 시 검증해 둔 워크플로우 템플릿 선택
+    template = workflow_registry.get(input_type, person_count)
+    logger.info(f"사용할 워크플로우: {template.path}")
+    if template.pruned_nodes:
+        logger.info(f"✂️ 출력에 기여하지 않아 제외된 노드: {template.pruned_nodes}")
+
+    task_dir, media_path, wav_path, wav_path_2 = prepare_inputs(
+        job_input, task_id, input_type, person_count, timings
+    )
+
     # 필수 필드 검증 및 기본값 설정
     prompt_text = job_input.get("prompt", "A person talking naturally")
     width = job_input.get("width", 512)
     height = job_input.get("height", 512)
 
-    # max_frame 설정 (입력이 없으면 오디오 길이 기반으로 자동 계산)
+    # 속도/품질 프리셋과 작업별 튜닝 값 검증
+    try:
+        tuning_patches, tuning = resolve_tuning(job_input, template, input_type)
+    except ValueError as e:
+        logger.error(f"❌ 튜닝 설정 오류: {e}")
+        return {"error": f"튜닝 설정 오류: {e}"}
+
+    effective = effective_tuning(template, tuning)
+
+    # max_frame 설정 (입력이 없으면 오디오를 분석하여 윈도우 단위로 정확히 계산)
     max_frame = job_input.get("max_frame")
+    frame_budget = None
     if max_frame is None:
         logger.info(
             "max_frame이 입력되지 않았습니다. 오디오 길이를 기반으로 자동 계산합니다."
         )
-        max_frame = calculate_max_frames_from_audio(
-            wav_path, wav_path_2 if person_count == "multi" else None
-        )
+        wav_paths = [wav_path] + ([wav_path_2] if person_count == "multi" else [])
+        with timings.phase("duration_probe"):
+            wav_paths, frame_budget = analyze_audio(
+                wav_paths,
+                task_dir,
+                get_workflow_fps(template, media_path),
+                effective["frame_window_size"],
+                effective["motion_frame"],
+                trim_silence=job_input.get("trim_silence", False),
+            )
+        if frame_budget is None:
+            logger.warning("오디오 길이를 계산할 수 없습니다. 기본값 81을 사용합니다.")
+            max_frame = 81
+        else:
+            max_frame = frame_budget["max_frame"]
+            wav_path = wav_paths[0]
+            if person_count == "multi":
+                wav_path_2 = wav_paths[1]
     else:
         logger.info(f"사용자 지정 max_frame: {max_frame}")
 
@@ -402,38 +719,55 @@ def handler(job):
     if person_count == "multi":
         logger.info(f"두 번째 오디오 경로: {wav_path_2}")
 
-    prompt = load_workflow(workflow_path)
+    # I2V 입력 이미지를 목표 크기로 미리 정규화 (같은 이미지/크기는 캐시 재사용)
+    if input_type == "image" and IMAGE_PREPROCESS and os.path.exists(media_path):
+        with timings.phase("media_preprocess"):
+            try:
+                media_path = image_cache.prepare(media_path, task_dir, width, height)
+            except Exception as e:
+                logger.warning(f"⚠️ 이미지 정규화 실패, 원본을 그대로 사용합니다: {e}")
+
+    # V2V 원본 비디오를 필요한 길이/크기로 미리 줄여 ComfyUI의 디코딩 부담을 줄임
+    video_patches = []
+    if input_type == "video" and os.path.exists(media_path):
+        with timings.phase("media_preprocess"):
+            media_path, video_patches = preprocess_source_video(
+                media_path, task_dir, width, height, max_frame, template
+            )
 
-    # ------------------------------------------------------------------
-    # 동적 Force Offload 설정
-    # ------------------------------------------------------------------
-    # 1. 입력에서 force_offload 읽기 (기본값 True: 작은 GPU에서 OOM 방지)
+    # 입력에서 force_offload 읽기 (기본값 True: 작은 GPU에서 OOM 방지)
     force_offload = job_input.get("force_offload", True)
     logger.info(f"🔧 설정: force_offload={force_offload}")
 
-    # 2. WanVideoSampler 노드에 force_offload 파라미터 주입
-    sampler_node_id = None
-    preferred_id = "128"
-
-    # 효율성을 위해 먼저 선호 ID(128) 확인
-    if preferred_id in prompt and prompt[preferred_id].get("class_type") == "WanVideoSampler":
-        sampler_node_id = preferred_id
-    else:
-        # ID가 다른 경우 class type으로 검색 (폴백)
-        for node_id, node_data in prompt.items():
-            if node_data.get("class_type") == "WanVideoSampler":
-                sampler_node_id = node_id
-                break
-
-    # sampler 노드를 찾은 경우 force_offload 파라미터 주입
-    if sampler_node_id:
-        # setdefault를 사용하여 'inputs' 딕셔너리가 없으면 생성
-        inputs = prompt[sampler_node_id].setdefault("inputs", {})
-        inputs["force_offload"] = force_offload
-        logger.info(f"✅ 노드 {sampler_node_id} (WanVideoSampler) 업데이트됨: force_offload={force_offload}")
-    else:
-        logger.warning("⚠️ 경고: WanVideoSampler 노드를 찾을 수 없습니다. 워크플로우 기본값을 사용합니다.")
-    # ------------------------------------------------------------------
+    # 백엔드가 하나 이상 준비될 때까지 대기 (이미 연결되어 있으면 즉시 반환)
+    with timings.phase("comfyui_ready"):
+        backends.wait_until_ready(COMFYUI_READY_TIMEOUT)
+
+    # 비용 모델로 메모리 관련 설정 자동 선택 (작업에서 직접 지정한 값은 유지)
+    if job_input.get("auto_tune", AUTO_MEMORY_TUNING):
+        vram_bytes = get_gpu_vram_bytes(get_system_stats())
+        if vram_bytes:
+            settings, _ = choose_memory_settings(
+                width,
+                height,
+                max_frame,
+                person_count,
+                input_type,
+                vram_bytes,
+                denoise_steps=effective["steps"] - effective["start_step"],
+                frame_window_size=effective["frame_window_size"],
+                motion_frame=effective["motion_frame"],
+            )
+            if "force_offload" not in job_input:
+                force_offload = settings["force_offload"]
+            for name in ("blocks_to_swap", "enable_vae_tiling"):
+                if name not in tuning:
+                    slot, input_name = TUNING_FIELDS[name][:2]
+                    tuning_patches.append((slot, input_name, settings[name]))
+                    effective[name] = settings[name]
+            logger.info(f"🔧 자동 메모리 설정 적용: force_offload={force_offload}, {settings}")
+        else:
+            logger.info("GPU 메모리 정보를 알 수 없어 워크플로우 기본 메모리 설정을 사용합니다.")
 
     # 파일 존재 여부 확인
     if not os.path.exists(media_path):
@@ -453,162 +787,638 @@ def handler(job):
     if person_count == "multi" and wav_path_2:
         logger.info(f"두 번째 오디오 파일 크기: {os.path.getsize(wav_path_2)} bytes")
 
-    # 워크플로우 노드 설정
+    # 워크플로우 패치 계획: (슬롯, 입력 이름, 값)
+    patches = [
+        ("audio1", "audio", wav_path),
+        ("prompt", "positive_prompt", prompt_text),
+        ("width", "value", width),
+        ("height", "value", height),
+        ("max_frames", "value", max_frame),
+        ("sampler", "force_offload", force_offload),
+    ]
+    patches.extend(tuning_patches)
     if input_type == "image":
         # I2V 워크플로우: 이미지 입력 설정
-        prompt["284"]["inputs"]["image"] = media_path
+        patches.append(("image", "image", media_path))
     else:
         # V2V 워크플로우: 비디오 입력 설정
-        prompt["228"]["inputs"]["video"] = media_path
-
-    # 공통 설정
-    prompt["125"]["inputs"]["audio"] = wav_path
-    prompt["241"]["inputs"]["positive_prompt"] = prompt_text
-    prompt["245"]["inputs"]["value"] = width
-    prompt["246"]["inputs"]["value"] = height
-
-    prompt["270"]["inputs"]["value"] = max_frame
-
-    # 다중 인물용 두 번째 오디오 설정
+        patches.append(("video", "video", media_path))
+        patches.extend(video_patches)
     if person_count == "multi":
-        # 워크플로우 타입에 따라 두 번째 오디오 노드 설정
-        if input_type == "image":  # I2V_multi.json의 경우
-            if "307" in prompt:
-                prompt["307"]["inputs"]["audio"] = wav_path_2
-        else:  # V2V_multi.json의 경우
-            if "313" in prompt:
-                prompt["313"]["inputs"]["audio"] = wav_path_2
-
-    ws_url = f"ws://{server_address}:8188/ws?clientId={client_id}"
-    logger.info(f"Connecting to WebSocket: {ws_url}")
-
-    # 먼저 HTTP 연결이 가능한지 확인
-    http_url = f"http://{server_address}:8188/"
-    logger.info(f"Checking HTTP connection to: {http_url}")
-
-    # HTTP 연결 확인 (최대 1분)
-    max_http_attempts = 180
-    for http_attempt in range(max_http_attempts):
-        try:
-            import urllib.request
+        # 다중 인물용 두 번째 오디오 설정
+        patches.append(("audio2", "audio", wav_path_2))
+
+    with timings.phase("workflow_build"):
+        prompt = template.build(patches)
+        cache_report = None
+        if conditioning_cache.enabled:
+            # CLIP vision 입력은 ComfyUI에 넘기는 미디어 파일(정규화/전처리 후)과 목표 크기로 결정됨
+            media_key = f"{input_type}:{file_sha256(media_path)}:{width}x{height}"
+            cache_report = conditioning_cache.apply(prompt, template, media_key)
+            text_entries = conditioning_cache.text_entries()
+
+    # prompt 실행 제한 시간 (작업에 timeout_seconds가 있으면 작업 전체 마감 시각 사용,
+    # 없으면 추정치 기준 제한 시간을 다른 작업 뒤에서 기다린 시간을 빼고 실행 시작부터 적용)
+    estimate = estimate_runtime(
+        width,
+        height,
+        max_frame,
+        person_count,
+        input_type,
+        denoise_steps=effective["steps"] - effective["start_step"],
+        frame_window_size=effective["frame_window_size"],
+        motion_frame=effective["motion_frame"],
+        blocks_to_swap=effective["blocks_to_swap"],
+        force_offload=force_offload,
+        enable_vae_tiling=effective["enable_vae_tiling"],
+    )
+    execution_timeout = None
+    if control.deadline is None:
+        execution_timeout = max(
+            PROMPT_TIMEOUT_MIN_SECONDS, estimate["total"] * PROMPT_TIMEOUT_FACTOR
+        )
+    remaining = (
+        control.deadline - time.monotonic()
+        if control.deadline is not None
+        else execution_timeout
+    )
+    logger.info(
+        f"⏳ 추정 실행 시간 {estimate['total']:.0f}초, 제한 시간 {remaining:.0f}초"
+    )
+    prompt_deadline = control.deadline
+    if execution_timeout is not None:
+        # 실행 시작 메시지를 놓쳐도 끝없이 기다리지 않도록 제출 기준 절대 마감 시각도 적용
+        prompt_deadline = time.monotonic() + PROMPT_MAX_QUEUE_WAIT_SECONDS + execution_timeout
 
-            response = urllib.request.urlopen(http_url, timeout=5)
-            logger.info(f"HTTP 연결 성공 (시도 {http_attempt+1})")
-            break
-        except Exception as e:
-            logger.warning(
-                f"HTTP 연결 실패 (시도 {http_attempt+1}/{max_http_attempts}): {e}"
+    session = None
+    try:
+        # 부하가 가장 작은 백엔드 선택 (같은 모델이 로드된 백엔드 우선, 모두 가득 차 있으면 대기)
+        with timings.phase("backend_wait"):
+            session = backends.acquire(
+                model_key(template.graph),
+                COMFYUI_READY_TIMEOUT,
+                control.cancelled,
+                control.deadline,
+                backend,
             )
-            if http_attempt == max_http_attempts - 1:
-                raise Exception(
-                    "ComfyUI 서버에 연결할 수 없습니다. 서버가 실행 중인지 확인하세요."
-                )
-            time.sleep(1)
-
-    ws = websocket.WebSocket()
-    # 웹소켓 연결 시도 (최대 3분)
-    max_attempts = int(180 / 5)  # 3분 (1초에 한 번씩 시도)
-    for attempt in range(max_attempts):
-        import time
-
-        try:
-            ws.connect(ws_url)
-            logger.info(f"웹소켓 연결 성공 (시도 {attempt+1})")
-            break
-        except Exception as e:
-            logger.warning(f"웹소켓 연결 실패 (시도 {attempt+1}/{max_attempts}): {e}")
-            if attempt == max_attempts - 1:
-                raise Exception("웹소켓 연결 시간 초과 (3분)")
-            time.sleep(5)
-    videos = get_videos(ws, prompt, input_type, person_count)
-    ws.close()
-    logger.info("웹소켓 연결 종료")
+        control.check("backend_wait")
+        videos = get_videos(
+            prompt,
+            template,
+            session,
+            estimate["windows"],
+            progress_callback,
+            timings,
+            prompt_deadline,
+            control,
+            execution_timeout,
+        )
+        if cache_report is not None:
+            conditioning_cache.count_text(cache_report, text_entries, prompt, template)
+    except PromptFailed as e:
+        return {"error": str(e), "error_details": e.details}
+    finally:
+        if session is not None:
+            backends.release(session)
+        if conditioning_cache.enabled:
+            conditioning_cache.evict()
 
     # 비디오가 없는 경우 처리
-    output_video_path = None
+    output_video = None
     logger.info("출력 비디오 검색 중...")
 
     for node_id in videos:
         if videos[node_id]:
-            output_video_path = videos[node_id][0]
-            logger.info(f"노드 {node_id}에서 출력 비디오 발견: {output_video_path}")
+            output_video = videos[node_id][0]
+            logger.info(f"노드 {node_id}에서 출력 비디오 발견: {output_video}")
             break
         else:
             logger.info(f"노드 {node_id}는 비어있음")
 
-    if not output_video_path:
+    if not output_video:
         logger.error("출력 비디오를 찾을 수 없습니다. 모든 노드가 비어있습니다.")
         return {"error": "비디오를 찾을 수 없습니다."}
 
+    # 로컬에서 보이면 그대로 사용하고, 원격 ComfyUI면 /view로 작업 디렉토리에 받음
+    try:
+        with timings.phase("output_fetch"):
+            output_video_path = output_transport.fetch(output_video, task_dir, session)
+    except Exception as e:
+        logger.error(f"❌ 출력 비디오 가져오기 실패: {e}")
+        return {"error": f"출력 비디오 가져오기 실패: {e}"}
+
     # 비디오 파일 존재 여부 확인
     if not os.path.exists(output_video_path):
         logger.error(f"출력 비디오 파일이 존재하지 않습니다: {output_video_path}")
         return {"error": f"비디오 파일을 찾을 수 없습니다: {output_video_path}"}
 
-    # network_volume 파라미터 확인
-    use_network_volume = job_input.get("network_volume", False)
-    logger.info(f"네트워크 볼륨 사용 여부: {use_network_volume}")
-
-    if use_network_volume:
-        # 네트워크 볼륨 사용: 파일 복사
-        logger.info("네트워크 볼륨에 비디오 복사 시작")
+    result = {"output_video_path": output_video_path}
+    if frame_budget is not None:
+        result["frame_budget"] = frame_budget
+    if cache_report is not None:
+        result["conditioning_cache"] = cache_report
+    return result
+
+
+def render_segment(
+    segment_input,
+    segment_task_id,
+    label,
+    progress_callback=None,
+    timings=None,
+    control=None,
+):
+    """구간 하나를 렌더링하고, 실패하면 그 구간만 SEGMENT_MAX_ATTEMPTS번까지 재시도하는 함수"""
+    control = control or JobControl()
+    for attempt in range(1, SEGMENT_MAX_ATTEMPTS + 1):
         try:
-            # 결과 비디오 파일 경로 생성
-            output_filename = f"infinitetalk_{task_id}.mp4"
-            output_path = f"/runpod-volume/{output_filename}"
-            logger.info(f"원본 파일: {output_video_path}")
-            logger.info(f"대상 경로: {output_path}")
+            result = render_video(
+                segment_input, segment_task_id, progress_callback, timings, control
+            )
+        except Exception as e:
+            result = {"error": str(e)}
+        if "error" not in result:
+            return result
+        # 취소/작업 마감 초과는 재시도해도 소용없음
+        if result.get("error_details", {}).get("type") == "cancelled" or (
+            control.deadline is not None and time.monotonic() >= control.deadline
+        ):
+            workspace.release(segment_task_id)
+            return result
+        logger.warning(
+            f"⚠️ {label} 렌더링 실패 (시도 {attempt}/{SEGMENT_MAX_ATTEMPTS}): {result['error']}"
+        )
+        workspace.release(segment_task_id)
+    return result
 
-            # 원본 파일 크기 확인
-            source_file_size = os.path.getsize(output_video_path)
-            logger.info(f"원본 파일 크기: {source_file_size} bytes")
 
-            # 파일 복사 (shutil.copy2는 메타데이터도 함께 복사)
-            shutil.copy2(output_video_path, output_path)
-            logger.info("파일 복사 완료")
+def segment_progress_callback(progress_callback, index, count):
+    """구간 하나의 진행률을 전체 구간 기준 진행률로 바꾸어 전달하는 콜백을 만드는 함수"""
 
-            # 복사된 파일 크기 확인
-            copied_file_size = os.path.getsize(output_path)
-            logger.info(f"복사된 파일 크기: {copied_file_size} bytes")
+    def callback(snapshot):
+        progress_callback(
+            {
+                **snapshot,
+                "percent": round((index + snapshot["percent"] / 100) / count * 100, 1),
+                "segment": index + 1,
+                "segments": count,
+            }
+        )
 
-            if source_file_size == copied_file_size:
-                logger.info(
-                    f"✅ 결과 비디오를 '{output_path}'에 성공적으로 복사했습니다"
-                )
+    return callback
+
+
+def render_segmented(
+    job_input,
+    task_id,
+    input_type,
+    person_count,
+    progress_callback=None,
+    timings=None,
+    control=None,
+):
+    """오디오를 무음 경계에서 나누어 구간별 프롬프트로 렌더링하고 MP4를 이어 붙이는 함수"""
+    timings = timings or JobTimings()
+    control = control or JobControl()
+    task_dir, media_path, wav_path, wav_path_2 = prepare_inputs(
+        job_input, task_id, input_type, person_count, timings
+    )
+    wav_paths = [wav_path] + ([wav_path_2] if person_count == "multi" else [])
+    with timings.phase("duration_probe"):
+        durations = [get_audio_duration(path) for path in wav_paths]
+    if None in durations:
+        return {"error": "구간 분할을 위한 오디오 길이를 계산할 수 없습니다."}
+
+    segment_seconds = job_input.get("segment_seconds", SEGMENT_SECONDS)
+    if (
+        isinstance(segment_seconds, bool)
+        or not isinstance(segment_seconds, (int, float))
+        or segment_seconds < 5
+    ):
+        return {"error": f"segment_seconds는 5 이상의 숫자여야 합니다: {segment_seconds!r}"}
+    try:
+        with timings.phase("audio_split"):
+            segments = split_audio(
+                wav_paths,
+                max(durations),
+                task_dir,
+                segment_seconds,
+                min(SEGMENT_MIN_SECONDS, segment_seconds / 2),
+            )
+    except Exception as e:
+        logger.error(f"❌ 오디오 구간 분할 실패: {e}")
+        return {"error": f"오디오 구간 분할 실패: {e}"}
+
+    # 구간별 입력은 경로로 전달 (원본 URL/Base64 입력과 전체 길이용 max_frame은 제외)
+    base_input = {
+        key: value
+        for key, value in job_input.items()
+        if not key.startswith(("image_", "video_", "wav_"))
+        and key not in ("max_frame", "segmented", "segment_seconds", "trim_silence")
+    }
+    media_key = "image_path" if input_type == "image" else "video_path"
+    reference_path = media_path
+    video_duration = probe_ffprobe_duration(media_path) if input_type == "video" else None
+    rendered = []
+    try:
+        for index, segment in enumerate(segments):
+            label = f"구간 {index + 1}/{len(segments)}"
+            segment_input = dict(base_input)
+            segment_input["wav_path"] = segment["wav_paths"][0]
+            if person_count == "multi":
+                segment_input["wav_path_2"] = segment["wav_paths"][1]
+            if input_type == "image":
+                # 이전 구간의 마지막 프레임을 다음 구간의 참조 이미지로 사용
+                segment_input[media_key] = reference_path
             else:
-                logger.warning(
-                    f"⚠️ 파일 크기가 일치하지 않습니다: 원본={source_file_size}, 복사본={copied_file_size}"
+                # 원본 비디오에서 같은 시간대를 잘라 사용 (짧으면 반복)
+                segment_input[media_key] = cut_video(
+                    media_path,
+                    os.path.join(task_dir, f"segment_{index:03d}_video.mp4"),
+                    (
+                        segment["start"] % video_duration
+                        if video_duration
+                        else segment["start"]
+                    ),
+                    segment["end"] - segment["start"],
+                    loop=True,
+                )
+
+            logger.info(
+                f"🎬 {label} 렌더링 시작: {segment['start']:.2f}-{segment['end']:.2f}초"
+            )
+            segment_task_id = f"{task_id}_seg{index:03d}"
+            segment_progress = None
+            if progress_callback is not None:
+                segment_progress = segment_progress_callback(
+                    progress_callback, index, len(segments)
+                )
+            result = render_segment(
+                segment_input,
+                segment_task_id,
+                label,
+                segment_progress,
+                timings,
+                control,
+            )
+            if "error" in result:
+                return {
+                    **result,
+                    "error": f"{label} 렌더링 실패: {result['error']}",
+                }
+            rendered.append((segment_task_id, result["output_video_path"]))
+
+            if input_type == "image" and index < len(segments) - 1:
+                reference_path = extract_last_frame(
+                    result["output_video_path"],
+                    os.path.join(task_dir, f"segment_{index:03d}_last.png"),
                 )
 
-            return {"video_path": output_path}
+        output_video_path = os.path.join(task_dir, "segmented_output.mp4")
+        with timings.phase("segment_concat"):
+            concat_videos([path for _, path in rendered], output_video_path)
+        logger.info(f"✅ {len(rendered)}개 구간을 이어 붙였습니다: {output_video_path}")
+        return {"output_video_path": output_video_path}
+    except Exception as e:
+        logger.error(f"❌ 구간 렌더링 처리 실패: {e}")
+        return {"error": f"구간 렌더링 처리 실패: {e}"}
+    finally:
+        # 구간별 작업 디렉토리와 ComfyUI 출력 정리 (최종 결과는 작업 디렉토리에 있음)
+        for segment_task_id, path in rendered:
+            workspace.release(segment_task_id, [path])
+
+
+def copy_to_network_volume(output_video_path, task_id):
+    """결과 비디오를 네트워크 볼륨에 복사하고 응답을 반환하는 함수"""
+    # 네트워크 볼륨 사용: 파일 복사
+    logger.info("네트워크 볼륨에 비디오 복사 시작")
+    try:
+        # 결과 비디오 파일 경로 생성
+        output_filename = f"infinitetalk_{task_id}.mp4"
+        output_path = f"/runpod-volume/{output_filename}"
+        logger.info(f"원본 파일: {output_video_path}")
+        logger.info(f"대상 경로: {output_path}")
+
+        # 원본 파일 크기 확인
+        source_file_size = os.path.getsize(output_video_path)
+        logger.info(f"원본 파일 크기: {source_file_size} bytes")
+
+        # 파일 복사 (shutil.copy2는 메타데이터도 함께 복사)
+        shutil.copy2(output_video_path, output_path)
+        logger.info("파일 복사 완료")
+
+        # 복사된 파일 크기 확인
+        copied_file_size = os.path.getsize(output_path)
+        logger.info(f"복사된 파일 크기: {copied_file_size} bytes")
+
+        if source_file_size == copied_file_size:
+            logger.info(f"✅ 결과 비디오를 '{output_path}'에 성공적으로 복사했습니다")
+        else:
+            logger.warning(
+                f"⚠️ 파일 크기가 일치하지 않습니다: 원본={source_file_size}, 복사본={copied_file_size}"
+            )
 
-        except Exception as e:
-            logger.error(f"❌ 비디오 복사 실패: {e}")
-            return {"error": f"비디오 복사 실패: {e}"}
-    else:
-        # 네트워크 볼륨 미사용: Base64 인코딩하여 반환
-        logger.info("Base64 인코딩 시작")
-        logger.info(f"비디오 파일 경로: {output_video_path}")
+        return {"video_path": output_path}
 
-        try:
-            # 파일 크기 확인
-            file_size = os.path.getsize(output_video_path)
-            logger.info(f"원본 파일 크기: {file_size} bytes")
+    except Exception as e:
+        logger.error(f"❌ 비디오 복사 실패: {e}")
+        return {"error": f"비디오 복사 실패: {e}"}
 
-            # 파일을 읽어 base64 인코딩
-            with open(output_video_path, "rb") as f:
-                video_data = base64.b64encode(f.read()).decode("utf-8")
 
-            encoded_size = len(video_data)
-            logger.info(f"Base64 인코딩 완료: {encoded_size} 문자")
-            logger.info(
-                f"✅ Base64 인코딩된 비디오 반환: {truncate_base64_for_log(video_data)}"
+def encode_video_base64(output_video_path):
+    """결과 비디오 전체를 하나의 Base64 문자열로 인코딩하여 응답을 반환하는 함수"""
+    # 네트워크 볼륨 미사용: Base64 인코딩하여 반환
+    logger.info("Base64 인코딩 시작")
+    logger.info(f"비디오 파일 경로: {output_video_path}")
+
+    try:
+        # 파일 크기 확인
+        file_size = os.path.getsize(output_video_path)
+        logger.info(f"원본 파일 크기: {file_size} bytes")
+
+        # 파일을 읽어 base64 인코딩
+        with open(output_video_path, "rb") as f:
+            video_data = base64.b64encode(f.read()).decode("utf-8")
+
+        encoded_size = len(video_data)
+        logger.info(f"Base64 인코딩 완료: {encoded_size} 문자")
+        logger.info(
+            f"✅ Base64 인코딩된 비디오 반환: {truncate_base64_for_log(video_data)}"
+        )
+        return {"video": video_data}
+
+    except Exception as e:
+        logger.error(f"❌ Base64 인코딩 실패: {e}")
+        return {"error": f"Base64 인코딩 실패: {e}"}
+
+
+def iter_video_chunks(output_video_path, chunk_bytes=None, report=None):
+    """결과 비디오를 mmap으로 열어 manifest와 순서가 있는 Base64 청크를 생성하는 함수
+
+    report(frame_budget 등)는 manifest와 같은 첫 번째 항목에 담아 보낸다.
+    """
+    chunk_bytes = chunk_bytes or RESULT_CHUNK_BYTES
+    # 3바이트 단위로 잘라야 청크마다 패딩 없이 독립적으로 인코딩됨
+    chunk_bytes -= chunk_bytes % 3
+    file_size = os.path.getsize(output_video_path)
+    chunk_count = -(-file_size // chunk_bytes)
+    logger.info(
+        f"스트리밍 결과 전송 시작: {output_video_path} ({file_size} bytes, {chunk_count}개 청크)"
+    )
+
+    with open(output_video_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm, memoryview(mm) as view:
+        yield {
+            "manifest": {
+                "format": "base64_chunks",
+                "total_size": file_size,
+                "chunk_size": chunk_bytes,
+                "chunk_count": chunk_count,
+                "sha256": hashlib.sha256(view).hexdigest(),
+            },
+            **(report or {}),
+        }
+        for index in range(chunk_count):
+            start = index * chunk_bytes
+            data = base64.b64encode(view[start : start + chunk_bytes]).decode("ascii")
+            yield {"chunk_index": index, "data": data}
+
+    logger.info(f"✅ 스트리밍 결과 전송 완료: {chunk_count}개 청크")
+
+
+def make_progress_callback(job):
+    """진행 상태를 RunPod 작업 진행률로 전송하는 (주기 제한된) 콜백을 만드는 함수"""
+    return ThrottledProgress(
+        lambda snapshot: runpod.serverless.progress_update(job, snapshot),
+        PROGRESS_UPDATE_INTERVAL,
+    )
+
+
+def with_job_report(response, result):
+    """렌더링 결과의 보고 항목(JOB_REPORT_KEYS)을 성공 응답에 추가하는 함수"""
+    if "error" not in response:
+        for key in JOB_REPORT_KEYS:
+            if key in result:
+                response[key] = result[key]
+    return response
+
+
+def log_timings(task_id, timings):
+    """작업의 단계/노드별 소요 시간을 JSON 한 줄로 로깅하는 함수 (로그 수집기에서 파싱용)"""
+    report = {"task_id": task_id, **timings.to_dict()}
+    logger.info(f"⏱️ JOB_TIMINGS {json.dumps(report, ensure_ascii=False)}")
+
+
+def handler(job):
+    job_input, task_id = start_job(job)
+    try:
+        timeout_seconds = parse_timeout(job_input)
+    except ValueError as e:
+        logger.error(f"❌ 작업 설정 오류: {e}")
+        return {"error": f"작업 설정 오류: {e}"}
+    timings = JobTimings()
+    output_video_path = None
+    try:
+        with JobControl(timeout_seconds, job.get("id")) as control:
+            result = render_video(
+                job_input, task_id, make_progress_callback(job), timings, control
             )
-            return {"video": video_data}
+        if "error" in result:
+            return {**result, "timings": timings.to_dict()}
+        output_video_path = result["output_video_path"]
 
+        # network_volume 파라미터 확인
+        use_network_volume = job_input.get("network_volume", False)
+        logger.info(f"네트워크 볼륨 사용 여부: {use_network_volume}")
+
+        with timings.phase("result_delivery"):
+            if use_network_volume:
+                response = copy_to_network_volume(output_video_path, task_id)
+            else:
+                response = encode_video_base64(output_video_path)
+        result["timings"] = timings.to_dict()
+        return with_job_report(response, result)
+    finally:
+        # 결과 전달이 끝나면 입력 파일과 ComfyUI 임시 출력을 정리
+        workspace.release(task_id, [output_video_path])
+        log_timings(task_id, timings)
+
+
+def stream_handler(job):
+    """결과 비디오를 manifest + Base64 청크 순서로 내보내는 제너레이터 핸들러"""
+    job_input, task_id = start_job(job)
+    try:
+        timeout_seconds = parse_timeout(job_input)
+    except ValueError as e:
+        logger.error(f"❌ 작업 설정 오류: {e}")
+        yield {"error": f"작업 설정 오류: {e}"}
+        return
+    timings = JobTimings()
+    output_video_path = None
+    try:
+        with JobControl(timeout_seconds, job.get("id")) as control:
+            result = render_video(
+                job_input, task_id, make_progress_callback(job), timings, control
+            )
+        if "error" in result:
+            yield {**result, "timings": timings.to_dict()}
+            return
+        output_video_path = result["output_video_path"]
+
+        if job_input.get("network_volume", False):
+            with timings.phase("result_delivery"):
+                response = copy_to_network_volume(output_video_path, task_id)
+            result["timings"] = timings.to_dict()
+            yield with_job_report(response, result)
+            return
+
+        # manifest에는 렌더링까지의 소요 시간만 담김 (전송 시간은 JOB_TIMINGS 로그에 기록)
+        result["timings"] = timings.to_dict()
+        try:
+            with timings.phase("result_delivery"):
+                yield from iter_video_chunks(
+                    output_video_path, report=with_job_report({}, result)
+                )
         except Exception as e:
-            logger.error(f"❌ Base64 인코딩 실패: {e}")
-            return {"error": f"Base64 인코딩 실패: {e}"}
+            logger.error(f"❌ 스트리밍 결과 전송 실패: {e}")
+            yield {"error": f"스트리밍 결과 전송 실패: {e}"}
+    finally:
+        workspace.release(task_id, [output_video_path])
+        log_timings(task_id, timings)
+
+
+async def async_handler(job):
+    """handler를 작업 스레드에서 실행하는 비동기 핸들러 (여러 작업을 동시에 처리)"""
+    try:
+        return await asyncio.to_thread(handler, job)
+    except asyncio.CancelledError:
+        # RunPod가 작업을 중지하면 태스크만 취소되므로 작업 스레드에도 취소를 알림
+        cancel_job(job.get("id"), "RunPod 작업 중지")
+        raise
+
+
+async def async_stream_handler(job):
+    """stream_handler의 결과 청크를 작업 스레드에서 하나씩 받아 내보내는 비동기 제너레이터 핸들러"""
+    chunks = stream_handler(job)
+    finished = object()
+    while True:
+        try:
+            chunk = await asyncio.to_thread(next, chunks, finished)
+        except asyncio.CancelledError:
+            # 작업 스레드가 아직 제너레이터를 실행 중이므로 닫지 않고 취소만 알림 (스레드가 끝난 뒤 정리됨)
+            cancel_job(job.get("id"), "RunPod 작업 중지")
+            raise
+        if chunk is finished:
+            return
+        try:
+            yield chunk
+        except BaseException:
+            chunks.close()
+            raise
+
+
+def concurrency_modifier(current_concurrency):
+    """워커가 동시에 받을 작업 수를 반환하는 함수 (RunPod가 메인 스레드의 이벤트 루프에서 주기적으로 호출)"""
+    # RunPod SDK는 runpod.serverless.start() 안에서 자체 SIGTERM 처리기를 설치하므로 그 뒤에 다시 연결
+    install_sigterm_handler()
+    return JOB_CONCURRENCY
+
+
+def warm_up_backend(index, max_frame):
+    """index번째 백엔드에서 합성 입력으로 워밍업 작업 하나를 실행하는 함수"""
+    task_id = f"warmup_{index}"
+    backend = backends.sessions[index]
+    timings = JobTimings()
+    result = {}
+    try:
+        result = run_warmup(
+            lambda job_input: render_video(
+                job_input, task_id, timings=timings, backend=backend
+            ),
+            workspace.create(task_id),
+            WARMUP_INPUT_TYPE,
+            WARMUP_PERSON_COUNT,
+            WARMUP_WIDTH,
+            WARMUP_HEIGHT,
+            max_frame,
+        )
+    finally:
+        workspace.release(task_id, [result.get("output_video_path")])
+        log_timings(task_id, timings)
+
+
+def warm_up():
+    """첫 작업을 받기 전에 윈도우 하나 분량의 합성 입력으로 기본 워크플로우를 실행하는 함수
+
+    백엔드가 여러 개면 백엔드마다 하나씩 고정하여 동시에 실행한다 (같은 인스턴스에 몰리지 않도록).
+    """
+    template = workflow_registry.get(WARMUP_INPUT_TYPE, WARMUP_PERSON_COUNT)
+    # 슬라이딩 윈도우 하나만 샘플링하도록 max_frame을 윈도우 크기로 맞춤
+    max_frame = effective_tuning(template, {})["frame_window_size"]
+    with ThreadPoolExecutor(max_workers=len(backends)) as executor:
+        futures = {
+            executor.submit(warm_up_backend, index, max_frame): backends.sessions[index]
+            for index in range(len(backends))
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"❌ 워밍업 실패 ({futures[future].base_url}): {e}")
+
+
+def handle_sigterm(signum, frame):
+    """종료 신호를 받으면 실행 중인 작업을 취소하고 ComfyUI 렌더링을 중단한 뒤 종료하는 함수"""
+    if cancel_all("워커 종료 신호(SIGTERM)"):
+        backends.interrupt_all()
+    if callable(previous_sigterm_handler):
+        # RunPod SDK 처리기: 새 작업을 받지 않고 실행 중인 작업(취소되어 곧 끝남)을 기다린 뒤 종료
+        previous_sigterm_handler(signum, frame)
+    else:
+        raise SystemExit(128 + signum)
+
+
+previous_sigterm_handler = None
+
+
+def install_sigterm_handler():
+    """SIGTERM 처리기를 설치하고 기존 처리기를 이어서 호출하도록 하는 함수 (이미 설치되어 있으면 무시)"""
+    global previous_sigterm_handler
+    if threading.current_thread() is not threading.main_thread():
+        return
+    current = signal.getsignal(signal.SIGTERM)
+    if current is handle_sigterm:
+        return
+    previous_sigterm_handler = current
+    signal.signal(signal.SIGTERM, handle_sigterm)
 
 
-runpod.serverless.start({"handler": handler})
+# 워커 시작 (benchmarks/의 스크립트는 모듈로 import하여 함수만 사용)
+if __name__ == "__main__":
+    # 이전에 비정상 종료된 작업이 남긴 스크래치 파일 정리
+    workspace.sweep_orphans()
+
+    # ComfyUI 웹소켓 연결과 백엔드 상태 확인 시작 (끊기면 백그라운드에서 자동 재연결)
+    backends.start()
+
+    # 워커가 종료될 때 ComfyUI에 남은 작업이 계속 GPU를 쓰지 않도록 취소 (워밍업 중에도 적용)
+    install_sigterm_handler()
+
+    if WARMUP_ON_START:
+        warm_up()
+
+    logger.info(f"🔀 동시 작업 수: {JOB_CONCURRENCY} (백엔드 {len(backends)}개)")
+    if RESULT_STREAMING:
+        runpod.serverless.start(
+            {
+                "handler": async_stream_handler,
+                # 청크를 모아 두지 않음 (클라이언트가 /stream으로 받는 즉시 디스크에 기록)
+                "return_aggregate_stream": False,
+                "concurrency_modifier": concurrency_modifier,
+            }
+        )
+    else:
+        runpod.serverless.start(
+            {"handler": async_handler, "concurrency_modifier": concurrency_modifier}
+        )
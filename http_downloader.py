@@ -0,0 +1,332 @@
+import os
+import ssl
+import time
+import logging
+import threading
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+# 재시도 가능한 오류 (연결 끊김, 타임아웃, 불완전한 응답 등)
+RETRYABLE_ERRORS = (OSError, http.client.HTTPException)
+
+
+class PooledResponse:
+    """응답을 다 읽으면 연결을 풀에 반환하는 http.client 응답 래퍼"""
+
+    def __init__(self, pool, key, conn, response):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.status = response.status
+        self.headers = response.headers
+
+    def read(self, amt=None):
+        return self._response.read(amt)
+
+    def close(self):
+        if self._conn is None:
+            return
+        # 본문이 없는 응답(HEAD, 204, 304, Content-Length: 0)은 read()를 해야 닫힌 것으로 표시됨
+        if not self._response.isclosed() and self._response.length == 0:
+            self._response.read()
+        # 본문을 끝까지 읽었고 서버가 keep-alive를 허용한 경우에만 재사용
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(self._key, self._conn)
+        else:
+            self._response.close()
+            self._conn.close()
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HostConnectionPool:
+    """호스트별 keep-alive HTTP(S) 연결을 재사용하는 연결 풀"""
+
+    def __init__(self, max_idle_per_host=8, timeout=30):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, netloc = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(
+                netloc, timeout=self.timeout, context=self._ssl_context
+            )
+        elif scheme == "http":
+            conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+        else:
+            raise Exception(f"지원하지 않는 URL 스킴: {scheme}")
+        return conn, False
+
+    def release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, url, headers=None, body=None):
+        """요청을 보내고 PooledResponse를 반환하는 함수"""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        for attempt in range(2):
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            except RETRYABLE_ERRORS:
+                conn.close()
+                # 재사용한 연결이 서버 쪽에서 이미 닫힌 경우 새 연결로 한 번 더 시도
+                if reused and attempt == 0:
+                    continue
+                raise
+            return PooledResponse(self, key, conn, response)
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+class HttpDownloader:
+    """연결 풀, 병렬 Range 요청, 이어받기, 최대 크기 제한을 지원하는 다운로더"""
+
+    def __init__(
+        self,
+        pool=None,
+        max_bytes=4 * 1024**3,
+        chunk_size=1024 * 1024,
+        parallel_threshold=32 * 1024 * 1024,
+        parallel_parts=4,
+        max_retries=3,
+    ):
+        self.pool = pool or HostConnectionPool()
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.parallel_parts = parallel_parts
+        self.max_retries = max_retries
+
+    def _open(self, method, url, headers=None):
+        """리다이렉트를 따라가며 요청하고 (응답, 최종 URL)을 반환하는 함수"""
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.pool.request(method, url, headers)
+            if response.status not in REDIRECT_STATUSES:
+                return response, url
+            location = response.headers.get("Location")
+            with response:
+                response.read()
+            if not location:
+                raise Exception(f"리다이렉트 응답에 Location 헤더가 없습니다: {url}")
+            url = urllib.parse.urljoin(url, location)
+        raise Exception(f"리다이렉트 횟수 초과: {url}")
+
+    @staticmethod
+    def _status_error(status, url):
+        # 서버 오류와 429는 재시도 대상
+        if status >= 500 or status == 429:
+            return ConnectionError(f"HTTP {status}: {url}")
+        return Exception(f"HTTP {status}: {url}")
+
+    def probe(self, url):
+        """HEAD(거부되면 Range GET 0-0)로 최종 URL, 크기, Range 지원 여부, 검증자를 조회하는 함수"""
+        response, final_url = self._open("HEAD", url)
+        with response:
+            status = response.status
+            headers = response.headers
+
+        size = None
+        accept_ranges = False
+        if status < 400:
+            if headers.get("Content-Length"):
+                size = int(headers["Content-Length"])
+            accept_ranges = headers.get("Accept-Ranges", "").lower() == "bytes"
+        else:
+            # 서명된 URL 등 HEAD를 허용하지 않는 서버는 1바이트 Range GET으로 확인
+            response, final_url = self._open("GET", url, {"Range": "bytes=0-0"})
+            with response:
+                status = response.status
+                headers = response.headers
+                if status == 206:
+                    response.read()
+                    total = headers.get("Content-Range", "").rpartition("/")[2]
+                    size = int(total) if total.isdigit() else None
+                    accept_ranges = True
+                elif status == 200:
+                    if headers.get("Content-Length"):
+                        size = int(headers["Content-Length"])
+                else:
+                    raise self._status_error(status, url)
+
+        return {
+            "url": final_url,
+            "size": size,
+            "accept_ranges": accept_ranges and size is not None,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+
+    def download(self, url, output_path, info=None):
+        """URL을 output_path에 스트리밍으로 저장하는 함수 (info가 주어지면 probe 결과로 재사용)"""
+        started = time.perf_counter()
+        info = info or self.probe(url)
+        size = info["size"]
+        if size is not None and size > self.max_bytes:
+            raise Exception(f"파일 크기 제한 초과: {size} > {self.max_bytes} bytes")
+
+        try:
+            if (
+                info["accept_ranges"]
+                and size >= self.parallel_threshold
+                and self.parallel_parts > 1
+            ):
+                self._download_parallel(info, output_path)
+            else:
+                self._download_single(info, output_path)
+        except Exception:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+
+        elapsed = time.perf_counter() - started
+        written = os.path.getsize(output_path)
+        logger.info(
+            f"다운로드 완료: {url} ({written} bytes, {elapsed:.2f}초, "
+            f"{written / max(elapsed, 1e-6) / 1024**2:.1f} MB/s)"
+        )
+        return output_path
+
+    def _download_single(self, info, output_path):
+        """단일 스트림으로 받고, 끊기면 Range 요청으로 이어받는 함수"""
+        url = info["url"]
+        size = info["size"]
+        written = 0
+        with open(output_path, "wb") as f:
+            for attempt in range(self.max_retries + 1):
+                headers = {}
+                if written and info["accept_ranges"]:
+                    headers["Range"] = f"bytes={written}-"
+                    if info["etag"]:
+                        headers["If-Range"] = info["etag"]
+                elif written:
+                    f.seek(0)
+                    f.truncate()
+                    written = 0
+
+                try:
+                    response, _ = self._open("GET", url, headers)
+                    with response:
+                        if response.status == 200 and written:
+                            # 서버가 Range를 무시했거나 파일이 바뀐 경우 처음부터 다시 받음
+                            f.seek(0)
+                            f.truncate()
+                            written = 0
+                        elif response.status not in (200, 206):
+                            raise self._status_error(response.status, url)
+
+                        while True:
+                            chunk = response.read(self.chunk_size)
+                            if not chunk:
+                                break
+                            written += len(chunk)
+                            if written > self.max_bytes:
+                                raise Exception(
+                                    f"파일 크기 제한 초과: {written} > {self.max_bytes} bytes"
+                                )
+                            f.write(chunk)
+
+                    if size is not None and written < size:
+                        raise ConnectionError(f"응답이 중간에 끊겼습니다 ({written}/{size} bytes)")
+                    return
+                except RETRYABLE_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    logger.warning(
+                        f"다운로드 재시도 ({attempt + 1}/{self.max_retries}): {e} - {written} bytes부터 이어받기"
+                    )
+                    time.sleep(min(2**attempt, 10))
+
+    def _download_parallel(self, info, output_path):
+        """파일을 구간으로 나누어 병렬 Range 요청으로 받는 함수"""
+        size = info["size"]
+        part_size = -(-size // self.parallel_parts)
+        ranges = [
+            (start, min(start + part_size, size) - 1)
+            for start in range(0, size, part_size)
+        ]
+        logger.info(f"병렬 다운로드: {size} bytes를 {len(ranges)}개 구간으로 요청")
+
+        # 전체 크기로 미리 파일을 만든 뒤 구간마다 해당 위치에 기록
+        with open(output_path, "wb") as f:
+            f.truncate(size)
+
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(self._download_range, info, output_path, start, end)
+                for start, end in ranges
+            ]
+            for future in futures:
+                future.result()
+
+    def _download_range(self, info, output_path, start, end):
+        """하나의 구간을 받고, 끊기면 받은 위치부터 이어받는 함수"""
+        url = info["url"]
+        offset = start
+        with open(output_path, "r+b") as f:
+            for attempt in range(self.max_retries + 1):
+                headers = {"Range": f"bytes={offset}-{end}"}
+                if info["etag"]:
+                    headers["If-Range"] = info["etag"]
+                try:
+                    response, _ = self._open("GET", url, headers)
+                    with response:
+                        if response.status != 206:
+                            if response.status == 200:
+                                raise Exception(f"서버가 Range 요청을 무시했습니다: {url}")
+                            raise self._status_error(response.status, url)
+                        f.seek(offset)
+                        while offset <= end:
+                            chunk = response.read(min(self.chunk_size, end - offset + 1))
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            offset += len(chunk)
+
+                    if offset <= end:
+                        raise ConnectionError(
+                            f"구간 응답이 중간에 끊겼습니다 ({offset - start}/{end - start + 1} bytes)"
+                        )
+                    return
+                except RETRYABLE_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    logger.warning(
+                        f"구간 {start}-{end} 재시도 ({attempt + 1}/{self.max_retries}): {e}"
+                    )
+                    time.sleep(min(2**attempt, 10))
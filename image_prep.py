@@ -0,0 +1,75 @@
+import os
+import time
+import hashlib
+import logging
+from file_cache import LRUFileCache
+
+logger = logging.getLogger(__name__)
+
+# 워크플로우의 ImageResizeKJv2(divisible_by=16)와 같은 배수로 맞춤
+SIZE_MULTIPLE = 16
+# PNG 압축 수준 (속도와 크기의 절충)
+PNG_COMPRESS_LEVEL = 3
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_sha256(path):
+    """파일 내용의 SHA-256 해시를 반환하는 함수"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def target_size(width, height):
+    """요청 크기를 SIZE_MULTIPLE의 배수로 내린 (너비, 높이)를 반환하는 함수"""
+    return (
+        max(SIZE_MULTIPLE, width - width % SIZE_MULTIPLE),
+        max(SIZE_MULTIPLE, height - height % SIZE_MULTIPLE),
+    )
+
+
+def normalize_image(source_path, output_path, width, height):
+    """EXIF 방향을 적용하고 가운데를 잘라 width×height RGB PNG로 저장하는 함수"""
+    # Pillow는 ComfyUI 의존성으로 설치되어 있으며, 필요할 때만 import
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        # 큰 JPEG는 디코딩 단계에서 미리 축소 (목표 크기의 2배 이상은 유지)
+        image.draft("RGB", (width * 2, height * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGB")
+        # ImageResizeKJv2(keep_proportion=crop, crop_position=center)와 같은 방식
+        image = ImageOps.fit(
+            image, (width, height), method=Image.LANCZOS, centering=(0.5, 0.5)
+        )
+        image.save(output_path, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return output_path
+
+
+class PreparedImageCache(LRUFileCache):
+    """이미지 내용 해시 + 목표 크기 기준으로 정규화된 이미지를 재사용하는 캐시"""
+
+    def prepare(self, source_path, dest_dir, width, height):
+        """정규화된 이미지를 dest_dir에 준비하고 경로를 반환하는 함수"""
+        width, height = target_size(width, height)
+        started = time.perf_counter()
+        key = f"{file_sha256(source_path)}_{width}x{height}.png"
+
+        def producer(tmp_path):
+            return normalize_image(source_path, tmp_path, width, height)
+
+        if self.enabled:
+            prepared_path = self.get_or_create(
+                key, producer, os.path.join(dest_dir, f"prepared_image_{width}x{height}.png")
+            )
+        else:
+            prepared_path = producer(
+                os.path.join(dest_dir, f"prepared_image_{width}x{height}.png")
+            )
+        logger.info(
+            f"🖼️ 이미지 정규화 완료: {source_path} → {prepared_path} "
+            f"({time.perf_counter() - started:.3f}초, 적중 {self.hits} / 미스 {self.misses})"
+        )
+        return prepared_path
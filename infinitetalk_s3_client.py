@@ -11,7 +11,8 @@ import boto3
 from botocore.client import Config
 import time
 import base64
-from typing import Optional, Dict, Any, List, Union
+import hashlib
+from typing import Optional, Dict, Any, List, Union, Callable
 import logging
 
 # Logging configuration
@@ -45,6 +46,7 @@ class InfinitetalkS3Client:
         self.runpod_api_key = runpod_api_key
         self.runpod_api_endpoint = f"https://api.runpod.ai/v2/{runpod_endpoint_id}/run"
         self.status_url = f"https://api.runpod.ai/v2/{runpod_endpoint_id}/status"
+        self.stream_url = f"https://api.runpod.ai/v2/{runpod_endpoint_id}/stream"
         
         # S3 configuration
         self.s3_endpoint_url = s3_endpoint_url
@@ -153,7 +155,13 @@ class InfinitetalkS3Client:
             logger.error(f"❌ Job submission failed: {e}")
             return None
     
-    def wait_for_completion(self, job_id: str, check_interval: int = 10, max_wait_time: int = 1800) -> Dict[str, Any]:
+    def wait_for_completion(
+        self,
+        job_id: str,
+        check_interval: int = 10,
+        max_wait_time: int = 1800,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """
         Wait for job completion
         
@@ -161,6 +169,9 @@ class InfinitetalkS3Client:
             job_id: Job ID
             check_interval: Status check interval (seconds)
             max_wait_time: Maximum wait time (seconds)
+            progress_callback: Called with the latest worker progress report
+                (percent, node, class_type, window/windows, elapsed_seconds, eta_seconds)
+                whenever an IN_PROGRESS status carries one
         
         Returns:
             Job result dictionary
@@ -192,7 +203,17 @@ class InfinitetalkS3Client:
                         'job_id': job_id
                     }
                 elif status in ['IN_QUEUE', 'IN_PROGRESS']:
-                    logger.info(f"🏃 Job in progress... (status: {status})")
+                    progress = status_data.get('output')
+                    if isinstance(progress, dict) and 'percent' in progress:
+                        eta = progress.get('eta_seconds')
+                        logger.info(
+                            f"🏃 Job in progress... {progress['percent']:.1f}%"
+                            + (f" (ETA {eta:.0f}s)" if eta is not None else "")
+                        )
+                        if progress_callback is not None:
+                            progress_callback(progress)
+                    else:
+                        logger.info(f"🏃 Job in progress... (status: {status})")
                     time.sleep(check_interval)
                 else:
                     logger.warning(f"❓ Unknown status: {status}")
@@ -212,6 +233,111 @@ class InfinitetalkS3Client:
             'job_id': job_id
         }
     
+    def stream_video_result(
+        self,
+        job_id: str,
+        output_path: str,
+        check_interval: int = 2,
+        max_wait_time: int = 1800
+    ) -> Dict[str, Any]:
+        """
+        Wait for a streaming job (RESULT_STREAMING=true worker) and save its video
+        
+        Polls /stream/{job_id} and writes each base64 chunk to disk as soon as it
+        arrives, so the whole video is never held in memory (the worker does not
+        aggregate the stream, so /status has no output for these jobs).
+        
+        Args:
+            job_id: Job ID
+            output_path: File path to save
+            check_interval: Stream poll interval (seconds)
+            max_wait_time: Maximum wait time (seconds)
+        
+        Returns:
+            Job result dictionary ('output' holds the manifest item with the job report)
+        """
+        start_time = time.time()
+        manifest_item = None
+        pending = {}
+        next_index = 0
+        digest = hashlib.sha256()
+        part_path = f"{output_path}.part"
+        part_file = None
+        
+        def failed(status: str, error: str) -> Dict[str, Any]:
+            logger.error(f"❌ {error}")
+            if part_file is not None:
+                part_file.close()
+                os.remove(part_path)
+            return {'status': status, 'error': error, 'job_id': job_id}
+        
+        while time.time() - start_time < max_wait_time:
+            try:
+                response = self.session.get(f"{self.stream_url}/{job_id}", timeout=30)
+                response.raise_for_status()
+                stream_data = response.json()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"❌ Error reading stream: {e}")
+                time.sleep(check_interval)
+                continue
+            
+            status = stream_data.get('status')
+            for entry in stream_data.get('stream') or []:
+                item = entry.get('output', entry)
+                if not isinstance(item, dict):
+                    continue
+                if 'error' in item:
+                    return failed('FAILED', f"Job returned error: {item['error']}")
+                if 'manifest' in item:
+                    manifest_item = item
+                    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                    part_file = open(part_path, 'wb')
+                elif 'chunk_index' in item:
+                    if part_file is None:
+                        return failed('FAILED', "Stream chunk received before manifest")
+                    pending[item['chunk_index']] = item['data']
+                    # Write chunks in order as soon as the next one is available
+                    while next_index in pending:
+                        data = base64.b64decode(pending.pop(next_index))
+                        digest.update(data)
+                        part_file.write(data)
+                        next_index += 1
+                elif 'video_path' in item or 'video' in item:
+                    # Network volume or non-chunked output delivered through the stream
+                    result = {'status': 'COMPLETED', 'output': item, 'job_id': job_id}
+                    if not self.save_video_result(result, output_path):
+                        result['status'] = 'FAILED'
+                    return result
+            
+            if status == 'COMPLETED':
+                break
+            if status in ['FAILED', 'CANCELLED', 'TIMED_OUT']:
+                return failed(status, f"Job ended with status {status}: {stream_data.get('error', '')}")
+            if manifest_item is not None:
+                logger.info(f"🏃 Receiving stream... {next_index}/{manifest_item['manifest']['chunk_count']} chunks")
+            else:
+                logger.info(f"🏃 Job in progress... (status: {status})")
+            time.sleep(check_interval)
+        else:
+            return failed('TIMEOUT', f"Job wait timeout ({max_wait_time} seconds)")
+        
+        if manifest_item is None:
+            return failed('FAILED', "No stream manifest available")
+        manifest = manifest_item['manifest']
+        part_file.close()
+        file_size = os.path.getsize(part_path)
+        if next_index != manifest['chunk_count'] or file_size != manifest['total_size'] or digest.hexdigest() != manifest['sha256']:
+            os.remove(part_path)
+            part_file = None
+            return failed(
+                'FAILED',
+                f"Stream integrity check failed: chunks={next_index}/{manifest['chunk_count']}, "
+                f"size={file_size}/{manifest['total_size']}, sha256={digest.hexdigest()}/{manifest['sha256']}"
+            )
+        os.replace(part_path, output_path)
+        logger.info(f"✅ Streamed video saved successfully: {output_path} ({file_size / (1024*1024):.1f}MB, {next_index} chunks)")
+        return {'status': 'COMPLETED', 'output': manifest_item, 'job_id': job_id, 'output_path': output_path}
+    
     def save_video_result(self, result: Dict[str, Any], output_path: str) -> bool:
         """
         Save video file from job result
@@ -230,6 +356,10 @@ class InfinitetalkS3Client:
             
             output = result.get('output', {})
             
+            # Streaming handler (returns aggregated list of manifest + chunks)
+            if isinstance(output, list):
+                return self.save_streamed_video(output, output_path)
+            
             # When using network_volume (returns video_path)
             if 'video_path' in output:
                 video_path = output['video_path']
@@ -260,6 +390,69 @@ class InfinitetalkS3Client:
             logger.error(f"❌ Video save failed: {e}")
             return False
     
+    def save_streamed_video(self, stream_output: List[Dict[str, Any]], output_path: str) -> bool:
+        """
+        Reassemble a video from streamed manifest + base64 chunk outputs
+        
+        Args:
+            stream_output: Aggregated stream output (manifest followed by ordered chunks)
+            output_path: File path to save
+        
+        Returns:
+            Save success status
+        """
+        try:
+            manifest = None
+            chunks = {}
+            for item in stream_output:
+                if 'error' in item:
+                    logger.error(f"Job returned error: {item['error']}")
+                    return False
+                if 'manifest' in item:
+                    manifest = item['manifest']
+                elif 'chunk_index' in item:
+                    chunks[item['chunk_index']] = item['data']
+                elif 'video_path' in item or 'video' in item:
+                    # Network volume or non-chunked output delivered through the stream
+                    return self.save_video_result({'status': 'COMPLETED', 'output': item}, output_path)
+            
+            if manifest is None:
+                logger.error("No stream manifest available")
+                return False
+            
+            chunk_count = manifest['chunk_count']
+            missing = [index for index in range(chunk_count) if index not in chunks]
+            if missing:
+                logger.error(f"Missing stream chunks: {missing[:10]} ({len(missing)} total)")
+                return False
+            
+            # Create directory
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            
+            # Decode chunks in order, hashing as we write
+            digest = hashlib.sha256()
+            with open(output_path, 'wb') as f:
+                for index in range(chunk_count):
+                    data = base64.b64decode(chunks.pop(index))
+                    digest.update(data)
+                    f.write(data)
+            
+            file_size = os.path.getsize(output_path)
+            if file_size != manifest['total_size'] or digest.hexdigest() != manifest['sha256']:
+                logger.error(
+                    f"Stream integrity check failed: size={file_size}/{manifest['total_size']}, "
+                    f"sha256={digest.hexdigest()}/{manifest['sha256']}"
+                )
+                os.remove(output_path)
+                return False
+            
+            logger.info(f"✅ Streamed video saved successfully: {output_path} ({file_size / (1024*1024):.1f}MB, {chunk_count} chunks)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Streamed video save failed: {e}")
+            return False
+    
     def download_video_from_s3(self, s3_path: str, output_path: str) -> bool:
         """
         Download video file from S3
@@ -302,7 +495,8 @@ class InfinitetalkS3Client:
         max_frame: Optional[int] = None,
         person_count: str = "single",
         input_type: str = "image",
-        use_network_volume: bool = False
+        use_network_volume: bool = False,
+        stream_output_path: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Create video from local files (including S3 upload)
@@ -318,6 +512,8 @@ class InfinitetalkS3Client:
             person_count: Number of people ("single" or "multi")
             input_type: Input type ("image" or "video")
             use_network_volume: Whether to use network volume (if True, saves result to S3)
+            stream_output_path: For a RESULT_STREAMING=true worker, read the result
+                from /stream and save the video here (see stream_video_result)
         
         Returns:
             Job result dictionary
@@ -390,6 +586,8 @@ class InfinitetalkS3Client:
         if not job_id:
             return {"error": "Job submission failed"}
         
+        if stream_output_path:
+            return self.stream_video_result(job_id, stream_output_path)
         result = self.wait_for_completion(job_id)
         return result
     
@@ -404,7 +602,8 @@ class InfinitetalkS3Client:
         height: int = 512,
         max_frame: Optional[int] = None,
         person_count: str = "single",
-        input_type: str = "image"
+        input_type: str = "image",
+        streaming: bool = False
     ) -> Dict[str, Any]:
         """
         Batch process all audio files in folder
@@ -420,6 +619,8 @@ class InfinitetalkS3Client:
             max_frame: Maximum frame count
             person_count: Number of people
             input_type: Input type
+            streaming: Whether the worker runs with RESULT_STREAMING=true
+                (results are read from /stream with stream_video_result)
         
         Returns:
             Batch processing result dictionary
@@ -514,14 +715,17 @@ class InfinitetalkS3Client:
                 })
                 continue
             
-            result = self.wait_for_completion(job_id)
+            base_filename = os.path.splitext(filename)[0]
+            output_filename = os.path.join(output_folder_path, f"result_{base_filename}.mp4")
+            if streaming:
+                # Streamed results are written to the output file while they arrive
+                result = self.stream_video_result(job_id, output_filename)
+            else:
+                result = self.wait_for_completion(job_id)
             
             if result.get('status') == 'COMPLETED':
                 # Save result file
-                base_filename = os.path.splitext(filename)[0]
-                output_filename = os.path.join(output_folder_path, f"result_{base_filename}.mp4")
-                
-                if self.save_video_result(result, output_filename):
+                if streaming or self.save_video_result(result, output_filename):
                     logger.info(f"✅ [{filename}] Processing completed")
                     results["successful"] += 1
                     results["results"].append({
@@ -0,0 +1,84 @@
+import time
+import logging
+import threading
+from comfy_client import PromptFailed
+
+logger = logging.getLogger(__name__)
+
+# 실행 중인 작업 (SIGTERM 등으로 한꺼번에 취소할 때 사용)
+_active_controls = set()
+_active_lock = threading.Lock()
+
+
+class JobControl:
+    """작업 하나의 마감 시각과 취소 요청을 관리하는 클래스
+
+    timeout_seconds가 주어지면 작업 전체의 마감 시각이 되고, 없으면 prompt마다
+    비용 모델 추정치로 실행 제한 시간을 정한다.
+    """
+
+    def __init__(self, timeout_seconds=None, job_id=None):
+        self.timeout_seconds = timeout_seconds
+        self.job_id = job_id
+        self.deadline = (
+            time.monotonic() + timeout_seconds if timeout_seconds is not None else None
+        )
+        self.cancelled = threading.Event()
+        self.cancel_reason = None
+
+    def __enter__(self):
+        with _active_lock:
+            _active_controls.add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _active_lock:
+            _active_controls.discard(self)
+
+    def cancel(self, reason):
+        """작업 취소를 요청하는 함수 (실행 중인 prompt는 다음 확인 시점에 중단됨)"""
+        if not self.cancelled.is_set():
+            self.cancel_reason = reason
+            self.cancelled.set()
+            logger.warning(f"🛑 작업 취소 요청: {reason}")
+
+    def check(self, stage):
+        """취소되었거나 작업 마감이 지났으면 PromptFailed를 발생시키는 함수 (단계 사이에서 호출)"""
+        if self.cancelled.is_set():
+            raise PromptFailed(
+                f"작업이 취소되었습니다 ({stage}): {self.cancel_reason}",
+                {"type": "cancelled", "stage": stage, "reason": self.cancel_reason},
+            )
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise PromptFailed(
+                f"작업 제한 시간 {self.timeout_seconds}초를 초과했습니다 ({stage})",
+                {"type": "timeout", "stage": stage, "timeout_seconds": self.timeout_seconds},
+            )
+
+
+def parse_timeout(job_input):
+    """작업 입력의 timeout_seconds를 검증하여 반환하는 함수 (없으면 None, 잘못되면 ValueError)"""
+    value = job_input.get("timeout_seconds")
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"timeout_seconds는 0보다 큰 숫자여야 합니다: {value!r}")
+    return value
+
+
+def cancel_job(job_id, reason):
+    """job_id 작업에 취소를 요청하고 찾았는지 반환하는 함수 (RunPod가 작업을 중지했을 때)"""
+    with _active_lock:
+        controls = [control for control in _active_controls if control.job_id == job_id]
+    for control in controls:
+        control.cancel(reason)
+    return bool(controls)
+
+
+def cancel_all(reason):
+    """실행 중인 모든 작업에 취소를 요청하고 그 수를 반환하는 함수"""
+    with _active_lock:
+        controls = list(_active_controls)
+    for control in controls:
+        control.cancel(reason)
+    return len(controls)
@@ -0,0 +1,47 @@
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# auto: 로컬 경로가 보이면 직접 사용하고 아니면 /view로 받음, local: 로컬 경로만, http: 항상 /view
+TRANSPORT_MODES = ("auto", "local", "http")
+
+
+class OutputTransport:
+    """ComfyUI 출력 파일(VHS_VideoCombine 등의 gifs 항목)을 핸들러가 읽을 수 있는 로컬 파일로 가져오는 클래스
+
+    ComfyUI가 같은 파일 시스템에 있으면 fullpath를 복사 없이 그대로 쓰고,
+    다른 장비에서 실행 중이면 /view 응답을 청크 단위로 작업 디렉토리에 저장한다.
+    """
+
+    def __init__(self, mode="auto", chunk_bytes=1024 * 1024):
+        if mode not in TRANSPORT_MODES:
+            raise ValueError(f"지원하지 않는 출력 전송 방식입니다: {mode} (지원: {TRANSPORT_MODES})")
+        self.mode = mode
+        self.chunk_bytes = chunk_bytes
+
+    def fetch(self, output, dest_dir, session):
+        """session(출력을 만든 ComfyUI)의 출력 항목 {"filename", "subfolder", "type", "fullpath"}의 로컬 경로를 반환하는 함수"""
+        fullpath = output.get("fullpath")
+        if self.mode != "http" and fullpath and os.path.exists(fullpath):
+            logger.info(f"📁 로컬 출력 파일 사용: {fullpath} ({os.path.getsize(fullpath)} bytes)")
+            return fullpath
+        if self.mode == "local":
+            raise Exception(f"출력 파일을 로컬에서 찾을 수 없습니다: {fullpath}")
+
+        filename = output["filename"]
+        output_path = os.path.join(dest_dir, os.path.basename(filename))
+        started = time.perf_counter()
+        size = session.download_view(
+            filename,
+            output.get("subfolder", ""),
+            output.get("type", "output"),
+            output_path,
+            self.chunk_bytes,
+        )
+        logger.info(
+            f"🌐 /view로 출력 파일 수신: {filename} → {output_path} "
+            f"({size} bytes, {time.perf_counter() - started:.2f}초)"
+        )
+        return output_path
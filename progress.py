@@ -0,0 +1,143 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# class_type별 상대 실행 비용 (전체 진행률 계산용, 없는 타입은 DEFAULT_NODE_WEIGHT)
+NODE_WEIGHTS = {
+    "WanVideoSampler": 80.0,
+    "WanVideoDecode": 8.0,
+    "VHS_VideoCombine": 3.0,
+    "MelBandRoFormerSampler": 3.0,
+    "MultiTalkWav2VecEmbeds": 2.0,
+    "WanVideoImageToVideoMultiTalk": 2.0,
+    "WanVideoEncode": 2.0,
+    "WanVideoClipVisionEncode": 1.0,
+    "WanVideoTextEncodeCached": 1.0,
+    "WanVideoModelLoader": 1.0,
+    "VHS_LoadVideo": 1.0,
+}
+DEFAULT_NODE_WEIGHT = 0.2
+# 윈도우마다 진행 막대가 다시 시작하는 노드 (InfiniteTalk 슬라이딩 윈도우 샘플링)
+WINDOWED_CLASS_TYPES = ("WanVideoSampler",)
+
+
+class ProgressTracker:
+    """ComfyUI 웹소켓 메시지로 워크플로우 전체 진행률과 남은 시간을 추정하는 클래스"""
+
+    def __init__(self, prompt, expected_windows=1):
+        self.class_types = {
+            node_id: node.get("class_type") for node_id, node in prompt.items()
+        }
+        self.weights = {
+            node_id: NODE_WEIGHTS.get(class_type, DEFAULT_NODE_WEIGHT)
+            for node_id, class_type in self.class_types.items()
+        }
+        self.total_weight = sum(self.weights.values()) or 1.0
+        self.expected_windows = max(1, expected_windows)
+        self.done = set()
+        self.current_node = None
+        self.node_fraction = 0.0
+        self.window = 0
+        self.last_value = None
+        self.started_at = None
+
+    def _finish_current(self):
+        if self.current_node is not None:
+            self.done.add(self.current_node)
+        self.current_node = None
+        self.node_fraction = 0.0
+        self.last_value = None
+
+    def update(self, message):
+        """메시지 하나를 반영하고, 진행 상태가 바뀌었으면 True를 반환하는 함수"""
+        message_type = message.get("type")
+        data = message.get("data") or {}
+        if message_type == "execution_start":
+            self.started_at = time.monotonic()
+        elif message_type == "execution_cached":
+            # 캐시된 노드는 실행되지 않으므로 바로 완료 처리
+            self.done.update(data.get("nodes") or [])
+        elif message_type == "executing":
+            node = data.get("node")
+            self._finish_current()
+            if node is None:
+                self.done.update(self.class_types)
+            else:
+                self.current_node = node
+                self.window = 0
+        elif message_type == "executed":
+            if data.get("node") == self.current_node:
+                self._finish_current()
+            else:
+                self.done.add(data.get("node"))
+        elif message_type == "progress":
+            node = data.get("node", self.current_node)
+            if node != self.current_node:
+                self._finish_current()
+                self.current_node = node
+                self.window = 0
+            value, maximum = data.get("value", 0), data.get("max") or 1
+            windowed = self.class_types.get(node) in WINDOWED_CLASS_TYPES
+            # 진행 값이 줄어들면 다음 윈도우의 샘플링이 시작된 것
+            if windowed and self.last_value is not None and value < self.last_value:
+                self.window += 1
+            self.last_value = value
+            if windowed:
+                windows = max(self.expected_windows, self.window + 1)
+                self.node_fraction = (self.window + value / maximum) / windows
+            else:
+                self.node_fraction = value / maximum
+        else:
+            return False
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        return True
+
+    def snapshot(self):
+        """현재 진행률(0~100), 실행 중인 노드, 윈도우, 남은 시간 추정치를 반환하는 함수"""
+        completed = sum(self.weights.get(node_id, 0.0) for node_id in self.done)
+        if self.current_node is not None and self.current_node not in self.done:
+            completed += self.weights.get(self.current_node, 0.0) * min(
+                self.node_fraction, 1.0
+            )
+        fraction = min(completed / self.total_weight, 1.0)
+
+        snapshot = {
+            "percent": round(fraction * 100, 1),
+            "node": self.current_node,
+            "class_type": self.class_types.get(self.current_node),
+        }
+        if self.class_types.get(self.current_node) in WINDOWED_CLASS_TYPES:
+            snapshot["window"] = self.window + 1
+            snapshot["windows"] = max(self.expected_windows, self.window + 1)
+        if self.started_at is not None and fraction > 0.01:
+            elapsed = time.monotonic() - self.started_at
+            snapshot["elapsed_seconds"] = round(elapsed, 1)
+            snapshot["eta_seconds"] = round(elapsed / fraction - elapsed, 1)
+        return snapshot
+
+
+class ThrottledProgress:
+    """진행 상태를 최대 interval초에 한 번만 publish로 전달하는 클래스"""
+
+    def __init__(self, publish, interval=5.0):
+        self.publish = publish
+        self.interval = interval
+        self._last_sent = 0.0
+        self._last_percent = None
+
+    def __call__(self, snapshot, force=False):
+        now = time.monotonic()
+        if not force:
+            if now - self._last_sent < self.interval:
+                return
+            if snapshot.get("percent") == self._last_percent:
+                return
+        self._last_sent = now
+        self._last_percent = snapshot.get("percent")
+        try:
+            self.publish(snapshot)
+        except Exception as e:
+            # 진행률 전송 실패로 작업이 실패하지 않도록 기록만 함
+            logger.warning(f"⚠️ 진행률 전송 실패: {e}")
@@ -0,0 +1,80 @@
+import os
+import logging
+from ffmpeg_utils import cut_audio, detect_silences
+
+logger = logging.getLogger(__name__)
+
+
+def intersect_silences(first, second):
+    """두 무음 구간 목록의 교집합을 반환하는 함수 (두 화자가 모두 조용한 구간)"""
+    result = []
+    i = j = 0
+    infinity = float("inf")
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        first_end = first[i][1] if first[i][1] is not None else infinity
+        second_end = second[j][1] if second[j][1] is not None else infinity
+        end = min(first_end, second_end)
+        if start < end:
+            result.append((start, None if end == infinity else end))
+        if first_end < second_end:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def plan_segments(duration, silences, target_seconds, min_seconds):
+    """오디오를 target_seconds 안팎의 구간 [(시작, 끝), ...]으로 나누는 함수
+
+    각 경계는 목표 지점 이전의 무음 구간 중 가장 가까운 곳의 중앙에 두고,
+    구간이 min_seconds보다 짧아지면 무음이 없어도 목표 지점에서 자른다.
+    """
+    if duration <= target_seconds + min_seconds:
+        return [(0.0, duration)]
+
+    cut_points = [
+        (start + (end if end is not None else duration)) / 2
+        for start, end in silences
+    ]
+    segments = []
+    start = 0.0
+    while duration - start > target_seconds + min_seconds:
+        target = start + target_seconds
+        candidates = [p for p in cut_points if start + min_seconds <= p <= target]
+        cut = max(candidates) if candidates else target
+        segments.append((start, cut))
+        start = cut
+    segments.append((start, duration))
+    return segments
+
+
+def split_audio(wav_paths, duration, output_dir, target_seconds, min_seconds):
+    """무음 경계에서 오디오를 나누어 [{"start", "end", "wav_paths"}, ...]를 반환하는 함수
+
+    여러 인물 오디오는 모두가 조용한 구간에서만 자르므로 같은 경계를 공유한다.
+    """
+    silences = None
+    for path in wav_paths:
+        detected = detect_silences(path)
+        silences = detected if silences is None else intersect_silences(silences, detected)
+    plan = plan_segments(duration, silences, target_seconds, min_seconds)
+    logger.info(
+        f"✂️ 오디오 {duration:.2f}초를 {len(plan)}개 구간으로 분할: "
+        + ", ".join(f"{start:.2f}-{end:.2f}" for start, end in plan)
+    )
+
+    segments = []
+    for index, (start, end) in enumerate(plan):
+        last = index == len(plan) - 1
+        segment_paths = []
+        for audio_index, path in enumerate(wav_paths):
+            output_path = os.path.join(
+                output_dir, f"segment_{index:03d}_audio_{audio_index + 1}.wav"
+            )
+            # 마지막 구간은 끝까지 잘라 길이 계산 오차로 꼬리가 잘리지 않게 하고,
+            # 더 짧은 화자의 오디오는 무음으로 채워 구간 길이를 맞춤
+            cut_audio(path, output_path, start, None if last else end, pad_to=end - start)
+            segment_paths.append(output_path)
+        segments.append({"start": start, "end": end, "wav_paths": segment_paths})
+    return segments
@@ -0,0 +1,116 @@
+import time
+from contextlib import contextmanager
+
+
+class JobTimings:
+    """작업 단계별 소요 시간과 ComfyUI 노드별 실행 시간을 기록하는 클래스"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        # 단계 이름 -> 누적 소요 시간 (구간 분할 작업에서는 구간들의 합)
+        self.phases = {}
+        # 입력 이름 -> 준비 시간
+        self.inputs = {}
+        # [{"node", "class_type", "seconds", ...}, ...] 실행 순서
+        self.nodes = []
+        self._prompt = None
+        self._current = None
+        self._queued_at = None
+        self._execution_started_at = None
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """with 블록의 소요 시간을 name 단계에 더하는 컨텍스트 매니저"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    # ------------------------------------------------------------------
+    # ComfyUI 실행 추적 (웹소켓 메시지)
+    # ------------------------------------------------------------------
+    def prompt_queued(self, prompt):
+        """프롬프트를 큐에 넣은 시점을 기록하는 함수 (이후 메시지로 대기/노드 시간 계산)"""
+        self._prompt = prompt
+        self._current = None
+        self._queued_at = time.perf_counter()
+        self._execution_started_at = None
+
+    def _close_node(self, now):
+        if self._current is not None:
+            node_id, started = self._current
+            self.nodes.append(
+                {
+                    "node": node_id,
+                    "class_type": self._prompt.get(node_id, {}).get("class_type"),
+                    "seconds": round(now - started, 3),
+                }
+            )
+            self._current = None
+
+    def _execution_started(self, now):
+        if self._execution_started_at is None:
+            self._execution_started_at = now
+            self.add("queue_wait", now - self._queued_at)
+
+    def update(self, message):
+        """웹소켓 메시지 하나를 반영하는 함수 (executing 전환마다 노드 시간을 기록)"""
+        if self._queued_at is None:
+            return
+        now = time.perf_counter()
+        message_type = message.get("type")
+        data = message.get("data") or {}
+        if message_type == "execution_start":
+            self._execution_started(now)
+        elif message_type == "execution_cached":
+            for node_id in data.get("nodes") or []:
+                self.nodes.append(
+                    {
+                        "node": node_id,
+                        "class_type": self._prompt.get(node_id, {}).get("class_type"),
+                        "seconds": 0.0,
+                        "cached": True,
+                    }
+                )
+        elif message_type == "executing":
+            self._execution_started(now)
+            self._close_node(now)
+            if data.get("node") is not None:
+                self._current = (data["node"], now)
+
+    def prompt_finished(self):
+        """실행이 끝난 시점을 기록하는 함수"""
+        if self._queued_at is None:
+            return
+        now = time.perf_counter()
+        self._close_node(now)
+        self._execution_started(now)
+        self.add("execution", now - self._execution_started_at)
+        self._queued_at = None
+
+    # ------------------------------------------------------------------
+    # 보고
+    # ------------------------------------------------------------------
+    def by_class_type(self):
+        """class_type별 실행 시간 합계를 큰 순서로 반환하는 함수"""
+        totals = {}
+        for entry in self.nodes:
+            class_type = entry["class_type"] or "unknown"
+            totals[class_type] = totals.get(class_type, 0.0) + entry["seconds"]
+        return {
+            class_type: round(seconds, 3)
+            for class_type, seconds in sorted(totals.items(), key=lambda item: -item[1])
+        }
+
+    def to_dict(self):
+        return {
+            "total_seconds": round(time.perf_counter() - self.started_at, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "inputs": self.inputs,
+            "class_types": self.by_class_type(),
+            "nodes": self.nodes,
+        }
@@ -0,0 +1,126 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# WanVideoSampler에서 사용할 수 있는 스케줄러
+SCHEDULERS = (
+    "unipc",
+    "unipc/beta",
+    "dpm++",
+    "dpm++/beta",
+    "dpm++_sde",
+    "dpm++_sde/beta",
+    "euler",
+    "euler/beta",
+    "deis",
+    "lcm",
+    "lcm/beta",
+    "flowmatch_causvid",
+    "flowmatch_distill",
+)
+
+# 튜닝 필드 -> (슬롯, 입력 이름, 타입, 최소값, 최대값 또는 허용 값)
+TUNING_FIELDS = {
+    "steps": ("sampler", "steps", int, 1, 50),
+    "start_step": ("sampler", "start_step", int, 0, 49),
+    "scheduler": ("sampler", "scheduler", str, None, SCHEDULERS),
+    "blocks_to_swap": ("block_swap", "blocks_to_swap", int, 0, 40),
+    "prefetch_blocks": ("block_swap", "prefetch_blocks", int, 0, 40),
+    "frame_window_size": ("multitalk", "frame_window_size", int, 17, 161),
+    "motion_frame": ("multitalk", "motion_frame", int, 1, 40),
+    "enable_vae_tiling": ("decode", "enable_vae_tiling", bool, None, None),
+}
+
+# 프리셋 -> input_type별 필드 값 ("balanced"는 워크플로우 JSON 기본값 그대로)
+# I2V는 0단계부터 전체를, V2V는 start_step 이후만 디노이즈함
+PRESETS = {
+    "draft": {
+        "image": {"steps": 4},
+        "video": {"steps": 3, "start_step": 2},
+    },
+    "balanced": {
+        "image": {},
+        "video": {},
+    },
+    "quality": {
+        "image": {"steps": 8},
+        "video": {"steps": 6, "start_step": 3},
+    },
+}
+
+DEFAULT_PRESET = os.getenv("DEFAULT_PRESET", "balanced")
+# 잘못된 기본 프리셋은 모든 작업을 실패시키므로 워커 시작 시 바로 실패
+if DEFAULT_PRESET not in PRESETS:
+    raise ValueError(
+        f"DEFAULT_PRESET 값이 올바르지 않습니다: {DEFAULT_PRESET!r} (사용 가능: {', '.join(PRESETS)})"
+    )
+
+
+def validate_field(name, value):
+    """튜닝 필드 하나의 타입과 범위를 검증하고 정규화된 값을 반환하는 함수"""
+    if name not in TUNING_FIELDS:
+        raise ValueError(
+            f"지원하지 않는 튜닝 필드: {name} (사용 가능: {', '.join(TUNING_FIELDS)})"
+        )
+    _, _, value_type, minimum, maximum = TUNING_FIELDS[name]
+
+    if value_type is bool:
+        if not isinstance(value, bool):
+            raise ValueError(f"{name}은(는) true/false 값이어야 합니다: {value!r}")
+        return value
+    if value_type is int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"{name}은(는) 정수여야 합니다: {value!r}")
+        if not minimum <= value <= maximum:
+            raise ValueError(f"{name}은(는) {minimum}~{maximum} 범위여야 합니다: {value}")
+        return value
+    if value not in maximum:
+        raise ValueError(f"{name}은(는) {', '.join(maximum)} 중 하나여야 합니다: {value!r}")
+    return value
+
+
+def effective_tuning(template, values):
+    """튜닝 값과 워크플로우 기본값을 합친 모든 필드의 최종 값을 반환하는 함수"""
+    return {
+        name: values.get(name, template.default_value(slot, input_name))
+        for name, (slot, input_name, *_) in TUNING_FIELDS.items()
+    }
+
+
+def resolve_tuning(job_input, template, input_type):
+    """프리셋과 작업별 튜닝 값을 검증하고 (패치 계획, 적용된 값)을 반환하는 함수"""
+    preset = job_input.get("preset", DEFAULT_PRESET)
+    if preset not in PRESETS:
+        raise ValueError(f"지원하지 않는 프리셋: {preset} (사용 가능: {', '.join(PRESETS)})")
+
+    overrides = job_input.get("tuning") or {}
+    if not isinstance(overrides, dict):
+        raise ValueError("tuning은 {필드: 값} 형태의 객체여야 합니다")
+
+    kind = "image" if input_type == "image" else "video"
+    values = dict(PRESETS[preset][kind])
+    for name, value in overrides.items():
+        values[name] = validate_field(name, value)
+
+    # 필드 간 관계는 워크플로우 기본값과 합친 최종 값으로 검증
+    effective = effective_tuning(template, values)
+    if effective["start_step"] >= effective["steps"]:
+        raise ValueError(
+            f"start_step({effective['start_step']})은 steps({effective['steps']})보다 작아야 합니다"
+        )
+    if (effective["frame_window_size"] - 1) % 4 != 0:
+        raise ValueError(
+            f"frame_window_size는 4의 배수 + 1이어야 합니다: {effective['frame_window_size']}"
+        )
+    if effective["motion_frame"] >= effective["frame_window_size"]:
+        raise ValueError(
+            f"motion_frame({effective['motion_frame']})은 frame_window_size({effective['frame_window_size']})보다 작아야 합니다"
+        )
+
+    patches = [
+        (TUNING_FIELDS[name][0], TUNING_FIELDS[name][1], value)
+        for name, value in values.items()
+    ]
+    logger.info(f"🎛️ 프리셋 '{preset}' 적용, 튜닝 값: {values}")
+    return patches, {"preset": preset, **values}
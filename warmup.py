@@ -0,0 +1,125 @@
+import os
+import math
+import time
+import wave
+import zlib
+import array
+import struct
+import logging
+from ffmpeg_utils import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# 워밍업 입력 설정 (wav2vec 입력과 같은 16kHz 모노, 작은 단색 이미지)
+WARMUP_SAMPLE_RATE = 16000
+WARMUP_TONE_HZ = 220.0
+WARMUP_IMAGE_COLOR = (128, 128, 128)
+WARMUP_PROMPT = "A person talking naturally"
+
+
+def write_tone_wav(path, seconds, sample_rate=WARMUP_SAMPLE_RATE, frequency=WARMUP_TONE_HZ):
+    """seconds초 길이의 16bit 모노 사인파 WAV를 만드는 함수 (무음이면 보컬 분리가 빈 결과를 낼 수 있음)"""
+    count = int(seconds * sample_rate)
+    samples = array.array(
+        "h",
+        (
+            int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate))
+            for i in range(count)
+        ),
+    )
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+def write_solid_png(path, width, height, color=WARMUP_IMAGE_COLOR):
+    """width×height 단색 RGB PNG를 표준 라이브러리만으로 만드는 함수"""
+
+    def chunk(kind, data):
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    row = b"\x00" + bytes(color) * width
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(row * height)))
+        f.write(chunk(b"IEND", b""))
+    return path
+
+
+def write_test_video(path, width, height, seconds, fps=25):
+    """ffmpeg testsrc로 seconds초 길이의 작은 H.264 비디오를 만드는 함수 (V2V 워밍업용)"""
+    run_ffmpeg(
+        [
+            "-f", "lavfi",
+            "-i", f"testsrc=size={width}x{height}:rate={fps}:duration={seconds:.3f}",
+            "-c:v", "libx264",
+            "-preset", "ultrafast",
+            "-pix_fmt", "yuv420p",
+            path,
+        ]
+    )
+    return path
+
+
+def build_warmup_input(output_dir, input_type, person_count, width, height, max_frame, fps=25):
+    """윈도우 하나 분량의 합성 오디오/이미지(또는 비디오)로 작업 입력을 만드는 함수"""
+    seconds = max_frame / fps
+    job_input = {
+        "input_type": input_type,
+        "person_count": person_count,
+        "prompt": WARMUP_PROMPT,
+        "width": width,
+        "height": height,
+        "max_frame": max_frame,
+        "wav_path": write_tone_wav(os.path.join(output_dir, "warmup_audio.wav"), seconds),
+    }
+    if person_count == "multi":
+        job_input["wav_path_2"] = write_tone_wav(
+            os.path.join(output_dir, "warmup_audio_2.wav"), seconds, frequency=WARMUP_TONE_HZ * 1.5
+        )
+    if input_type == "video":
+        job_input["video_path"] = write_test_video(
+            os.path.join(output_dir, "warmup_video.mp4"), width, height, seconds + 1, fps
+        )
+    else:
+        job_input["image_path"] = write_solid_png(
+            os.path.join(output_dir, "warmup_image.png"), width, height
+        )
+    return job_input
+
+
+def run_warmup(render, output_dir, input_type, person_count, width, height, max_frame):
+    """합성 입력으로 render(job_input)를 한 번 실행하고 소요 시간을 로깅하는 함수
+
+    모델 로드와 torch.compile을 첫 작업 전에 끝내 두기 위한 것으로, 실패해도 예외를 던지지 않는다.
+    """
+    logger.info(
+        f"🔥 워밍업 시작: {input_type}/{person_count}, {width}x{height}, max_frame={max_frame}"
+    )
+    started = time.perf_counter()
+    try:
+        job_input = build_warmup_input(
+            output_dir, input_type, person_count, width, height, max_frame
+        )
+        result = render(job_input)
+    except Exception as e:
+        result = {"error": str(e)}
+    elapsed = time.perf_counter() - started
+
+    if "error" in result:
+        logger.warning(
+            f"⚠️ 워밍업 실패 ({elapsed:.1f}초), 첫 작업에서 모델을 로드합니다: {result['error']}"
+        )
+    else:
+        logger.info(f"🔥 워밍업 완료: {elapsed:.1f}초")
+    result["warmup_seconds"] = round(elapsed, 3)
+    return result
@@ -0,0 +1,230 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (input_type, person_count) -> 워크플로우 파일명
+WORKFLOW_FILES = {
+    ("image", "single"): "I2V_single.json",
+    ("image", "multi"): "I2V_multi.json",
+    ("video", "single"): "V2V_single.json",
+    ("video", "multi"): "V2V_multi.json",
+}
+
+# 논리 슬롯 -> (선호 노드 ID, class_type, 패치할 주 입력 이름)
+COMMON_SLOTS = {
+    "audio1": ("125", "LoadAudio", "audio"),
+    "prompt": ("241", "WanVideoTextEncodeCached", "positive_prompt"),
+    "width": ("245", "INTConstant", "value"),
+    "height": ("246", "INTConstant", "value"),
+    "max_frames": ("270", "INTConstant", "value"),
+    "sampler": ("128", "WanVideoSampler", "force_offload"),
+    "block_swap": ("134", "WanVideoBlockSwap", "blocks_to_swap"),
+    "multitalk": ("192", "WanVideoImageToVideoMultiTalk", "frame_window_size"),
+    "wav2vec": ("194", "MultiTalkWav2VecEmbeds", "audio_scale"),
+    "decode": ("130", "WanVideoDecode", "enable_vae_tiling"),
+    "clip_vision": ("237", "WanVideoClipVisionEncode", "crop"),
+}
+WORKFLOW_SLOTS = {
+    ("image", "single"): {
+        "image": ("284", "LoadImage", "image"),
+    },
+    ("image", "multi"): {
+        "image": ("284", "LoadImage", "image"),
+        "audio2": ("307", "LoadAudio", "audio"),
+    },
+    ("video", "single"): {
+        "video": ("228", "VHS_LoadVideo", "video"),
+    },
+    ("video", "multi"): {
+        "video": ("228", "VHS_LoadVideo", "video"),
+        "audio2": ("313", "LoadAudio", "audio"),
+    },
+}
+
+
+# 최종 결과를 만드는 출력 노드 class_type (가지치기의 시작점)
+OUTPUT_CLASS_TYPES = ("VHS_VideoCombine",)
+
+
+def workflow_key(input_type, person_count):
+    """입력 타입과 인물 수를 워크플로우 키로 정규화하는 함수"""
+    return (
+        "image" if input_type == "image" else "video",
+        "single" if person_count == "single" else "multi",
+    )
+
+
+def is_link(value):
+    """["노드 ID", 출력 인덱스] 형태의 노드 연결인지 확인하는 함수"""
+    return (
+        isinstance(value, list)
+        and len(value) == 2
+        and isinstance(value[0], str)
+        and isinstance(value[1], int)
+    )
+
+
+def prune_unreachable_nodes(prompt, output_node_ids):
+    """출력 노드에서 입력 연결을 거꾸로 따라가 도달할 수 없는 노드를 제거하는 함수
+
+    (가지치기된 프롬프트, {제거된 노드 ID: class_type})을 반환한다.
+    """
+    reachable = set()
+    stack = list(output_node_ids)
+    while stack:
+        node_id = stack.pop()
+        if node_id in reachable or node_id not in prompt:
+            continue
+        reachable.add(node_id)
+        for value in prompt[node_id].get("inputs", {}).values():
+            if is_link(value):
+                stack.append(value[0])
+
+    pruned = {node_id: node for node_id, node in prompt.items() if node_id in reachable}
+    removed = {
+        node_id: node.get("class_type")
+        for node_id, node in prompt.items()
+        if node_id not in reachable
+    }
+    return pruned, removed
+
+
+class WorkflowTemplate:
+    """로드와 검증이 끝난 워크플로우와 슬롯 → 노드 ID 매핑"""
+
+    def __init__(self, key, path, graph, slots, output_nodes, pruned_nodes):
+        self.key = key
+        self.path = path
+        self.graph = graph
+        # 슬롯 이름 -> 노드 ID
+        self.slots = slots
+        self.output_nodes = output_nodes
+        # 출력에 기여하지 않아 제거된 노드 {노드 ID: class_type}
+        self.pruned_nodes = pruned_nodes
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def node_id(self, slot):
+        if slot not in self.slots:
+            raise KeyError(f"{self.name} 워크플로우에 '{slot}' 슬롯이 없습니다")
+        return self.slots[slot]
+
+    def has_slot(self, slot):
+        return slot in self.slots
+
+    def default_value(self, slot, input_name):
+        """템플릿에 기록된 슬롯 입력의 기본값을 반환하는 함수"""
+        return self.graph[self.node_id(slot)]["inputs"].get(input_name)
+
+    def build(self, patches):
+        """템플릿을 복사하고 패치 계획 [(슬롯, 입력 이름, 값), ...]을 적용한 프롬프트를 반환하는 함수"""
+        # 노드 dict와 inputs dict만 복사 (연결 리스트와 값은 공유해도 수정되지 않음)
+        prompt = {
+            node_id: {**node, "inputs": dict(node["inputs"])}
+            for node_id, node in self.graph.items()
+        }
+        for slot, input_name, value in patches:
+            prompt[self.node_id(slot)]["inputs"][input_name] = value
+        return prompt
+
+    def describe(self, prompt):
+        """로깅용으로 각 슬롯의 주 입력 값을 반환하는 함수"""
+        values = {}
+        for slot, node_id in self.slots.items():
+            _, _, input_name = self._slot_spec(slot)
+            values[f"{slot}({node_id})"] = prompt.get(node_id, {}).get("inputs", {}).get(input_name)
+        return values
+
+    def _slot_spec(self, slot):
+        return {**COMMON_SLOTS, **WORKFLOW_SLOTS[self.key]}[slot]
+
+
+class WorkflowRegistry:
+    """모든 워크플로우를 시작 시 한 번 로드하고 슬롯을 검증하는 레지스트리"""
+
+    def __init__(self, workflow_dir):
+        self.workflow_dir = workflow_dir
+        self.templates = {}
+        for key, filename in WORKFLOW_FILES.items():
+            self.templates[key] = self._load(key, os.path.join(workflow_dir, filename))
+        logger.info(
+            f"✅ 워크플로우 {len(self.templates)}개 로드 및 검증 완료: "
+            + ", ".join(f"{t.name}={t.slots}" for t in self.templates.values())
+        )
+
+    def get(self, input_type, person_count):
+        return self.templates[workflow_key(input_type, person_count)]
+
+    @staticmethod
+    def _resolve_slot(graph, name, preferred_id, class_type, input_name, path):
+        """선호 ID를 먼저 확인하고, 없으면 유일한 같은 class_type 노드로 슬롯을 해석하는 함수"""
+        node = graph.get(preferred_id)
+        if node is not None and node.get("class_type") == class_type:
+            node_id = preferred_id
+        else:
+            candidates = [
+                node_id
+                for node_id, node in graph.items()
+                if node.get("class_type") == class_type
+            ]
+            if len(candidates) != 1:
+                found = node.get("class_type") if node else "없음"
+                raise Exception(
+                    f"워크플로우 검증 실패 ({path}): '{name}' 슬롯의 노드 {preferred_id}는 "
+                    f"{class_type}이어야 합니다 (현재: {found}, 같은 타입 노드 {len(candidates)}개)"
+                )
+            node_id = candidates[0]
+            logger.warning(
+                f"⚠️ '{name}' 슬롯 노드 ID가 {preferred_id}에서 {node_id}(으)로 바뀌었습니다 ({path})"
+            )
+
+        inputs = graph[node_id].get("inputs", {})
+        if input_name not in inputs or is_link(inputs[input_name]):
+            raise Exception(
+                f"워크플로우 검증 실패 ({path}): 노드 {node_id}({class_type})에 "
+                f"'{input_name}' 값 입력이 없습니다"
+            )
+        return node_id
+
+    def _load(self, key, path):
+        with open(path, "r") as file:
+            graph = json.load(file)
+
+        for node_id, node in graph.items():
+            if "class_type" not in node or not isinstance(node.get("inputs"), dict):
+                raise Exception(f"워크플로우 검증 실패 ({path}): 노드 {node_id} 형식 오류")
+            for input_name, value in node["inputs"].items():
+                if is_link(value) and value[0] not in graph:
+                    raise Exception(
+                        f"워크플로우 검증 실패 ({path}): 노드 {node_id}.{input_name}이(가) "
+                        f"존재하지 않는 노드 {value[0]}에 연결되어 있습니다"
+                    )
+
+        # 출력 노드에 기여하지 않는 노드(PreviewAny, 연결되지 않은 로더 등)를 미리 제거
+        output_nodes = [
+            node_id
+            for node_id, node in graph.items()
+            if node["class_type"] in OUTPUT_CLASS_TYPES
+        ]
+        if not output_nodes:
+            raise Exception(f"워크플로우 검증 실패 ({path}): 출력 노드가 없습니다")
+        graph, pruned_nodes = prune_unreachable_nodes(graph, output_nodes)
+        if pruned_nodes:
+            logger.info(
+                f"✂️ {os.path.basename(path)}: 출력에 기여하지 않는 노드 {len(pruned_nodes)}개 제거 {pruned_nodes}"
+            )
+
+        # 슬롯은 가지치기 후의 그래프에서 해석 (출력과 끊어진 슬롯은 부팅 시 실패)
+        slots = {}
+        for name, (preferred_id, class_type, input_name) in {
+            **COMMON_SLOTS,
+            **WORKFLOW_SLOTS[key],
+        }.items():
+            slots[name] = self._resolve_slot(
+                graph, name, preferred_id, class_type, input_name, path
+            )
+        return WorkflowTemplate(key, path, graph, slots, output_nodes, pruned_nodes)
@@ -0,0 +1,173 @@
+import os
+import re
+import time
+import shutil
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# VHS_VideoCombine 출력 파일명의 카운터 부분 (예: WanVideo2_1_InfiniteTalk_00001-audio.mp4)
+OUTPUT_COUNTER_PATTERN = re.compile(r"^(.*_\d{5})")
+
+
+def get_path_size(path):
+    """파일 또는 디렉토리 전체의 크기(bytes)를 반환하는 함수"""
+    if not os.path.isdir(path) or os.path.islink(path):
+        try:
+            return os.lstat(path).st_size
+        except FileNotFoundError:
+            return 0
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def remove_path(path):
+    """파일 또는 디렉토리를 삭제하고 삭제한 크기를 반환하는 함수"""
+    size = get_path_size(path)
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+class WorkspaceManager:
+    """작업별 스크래치 디렉토리와 ComfyUI 임시 출력을 관리하는 클래스"""
+
+    def __init__(self, root, budget_bytes, comfy_temp_dirs):
+        self.root = os.path.abspath(root)
+        self.budget_bytes = budget_bytes
+        # ComfyUI 인스턴스가 여러 개면 인스턴스마다 임시 출력 디렉토리가 있음
+        if isinstance(comfy_temp_dirs, str):
+            comfy_temp_dirs = [comfy_temp_dirs]
+        self.comfy_temp_dirs = [os.path.abspath(path) for path in comfy_temp_dirs]
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def _is_managed(self, path):
+        path = os.path.abspath(path)
+        return any(
+            path.startswith(base + os.sep) for base in [self.root] + self.comfy_temp_dirs
+        )
+
+    def create(self, task_id):
+        """작업용 절대 경로 스크래치 디렉토리를 만들고 반환하는 함수"""
+        self.enforce_budget()
+        task_dir = os.path.join(self.root, task_id)
+        os.makedirs(task_dir, exist_ok=True)
+        with self._lock:
+            self._active[task_id] = time.time()
+        logger.info(f"📂 작업 디렉토리 생성: {task_dir}")
+        return task_dir
+
+    def release(self, task_id, output_paths=()):
+        """결과 전달 후 작업 디렉토리와 ComfyUI 임시 출력을 삭제하는 함수"""
+        with self._lock:
+            self._active.pop(task_id, None)
+
+        freed = remove_path(os.path.join(self.root, task_id))
+        for output_path in output_paths:
+            if not output_path or not self._is_managed(output_path):
+                continue
+            freed += self._remove_output_group(output_path)
+        logger.info(f"🧹 작업 {task_id} 정리 완료: {freed} bytes 회수")
+        return freed
+
+    def _remove_output_group(self, output_path):
+        """출력 파일과 같은 카운터를 가진 부속 파일(-audio.mp4, .png 등)을 함께 삭제하는 함수"""
+        directory, filename = os.path.split(os.path.abspath(output_path))
+        match = OUTPUT_COUNTER_PATTERN.match(filename)
+        if not match:
+            return remove_path(output_path)
+
+        freed = 0
+        prefix = match.group(1)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if name.startswith(prefix):
+                freed += remove_path(os.path.join(directory, name))
+        return freed
+
+    def _list_entries(self, directory):
+        entries = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        mtime = entry.stat(follow_symlinks=False).st_mtime
+                    except FileNotFoundError:
+                        continue
+                    entries.append((mtime, entry.path, entry.name))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def enforce_budget(self):
+        """디스크 사용량이 예산을 넘으면 오래된 작업 디렉토리/임시 출력부터 삭제하는 함수"""
+        if self.budget_bytes <= 0:
+            return 0
+
+        with self._lock:
+            active = dict(self._active)
+        # 진행 중인 작업보다 먼저 만들어진 임시 출력만 정리 대상
+        oldest_active = min(active.values(), default=time.time())
+
+        candidates = []
+        for mtime, path, name in self._list_entries(self.root):
+            if name not in active:
+                candidates.append((mtime, path))
+        for temp_dir in self.comfy_temp_dirs:
+            for mtime, path, _ in self._list_entries(temp_dir):
+                if mtime < oldest_active:
+                    candidates.append((mtime, path))
+
+        usage = get_path_size(self.root) + sum(
+            get_path_size(temp_dir) for temp_dir in self.comfy_temp_dirs
+        )
+        if usage <= self.budget_bytes:
+            return 0
+
+        freed = 0
+        for _, path in sorted(candidates):
+            if usage - freed <= self.budget_bytes:
+                break
+            freed += remove_path(path)
+            logger.info(f"🧹 디스크 예산 초과로 삭제: {path}")
+
+        logger.info(
+            f"디스크 사용량 {usage} bytes, 예산 {self.budget_bytes} bytes, {freed} bytes 회수"
+        )
+        return freed
+
+    def sweep_orphans(self):
+        """워커 시작 시 이전에 비정상 종료된 작업이 남긴 파일을 삭제하는 함수"""
+        with self._lock:
+            active = set(self._active)
+
+        freed = 0
+        removed = 0
+        for _, path, name in self._list_entries(self.root):
+            if name not in active:
+                freed += remove_path(path)
+                removed += 1
+        if not active:
+            for temp_dir in self.comfy_temp_dirs:
+                for _, path, _ in self._list_entries(temp_dir):
+                    freed += remove_path(path)
+                    removed += 1
+
+        logger.info(f"🧹 고아 작업 파일 {removed}개 정리: {freed} bytes 회수")
+        return freed